@@ -62,6 +62,45 @@ def get_config() -> "ct.Config":
         default=100,
     )
 
+    # Streaming.
+    parser.add_argument(
+        "--miner.warm_up",
+        action="store_true",
+        help="If set, the miner runs a throwaway inference with its models at startup.",
+        default=False,
+    )
+    parser.add_argument(
+        "--miner.stream_delay",
+        type=float,
+        help="Seconds to pause between streamed chunks to simulate generation, 0 sends as fast as the client reads.",
+        default=0.0,
+    )
+    parser.add_argument(
+        "--miner.min_chunk_size",
+        type=int,
+        help="Smallest number of tokens sent per streamed chunk.",
+        default=1,
+    )
+    parser.add_argument(
+        "--miner.max_chunk_size",
+        type=int,
+        help="Largest number of tokens sent per streamed chunk, used while the client falls behind.",
+        default=64,
+    )
+
+    parser.add_argument(
+        "--miner.prompt_cache_size",
+        type=int,
+        help="Maximum number of prompt completions kept to replay repeated prompts.",
+        default=1024,
+    )
+    parser.add_argument(
+        "--miner.prompt_cache_max_age",
+        type=int,
+        help="Number of blocks a cached completion is replayed for.",
+        default=10,
+    )
+
     # Switches.
     parser.add_argument(
         "--miner.no_serve",
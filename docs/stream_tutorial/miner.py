@@ -5,16 +5,169 @@ import argparse
 import threading
 import traceback
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from functools import partial
 from starlette.types import Send
 
 import cybertensor as ct
-from typing import List, Dict, Tuple, Union, Callable, Awaitable
+from typing import Any, List, Dict, Optional, Tuple, Union, Callable, Awaitable
 
 from protocol import StreamPrompting
 from config import get_config, check_config
 
 
+def load_gpt2_tokenizer():
+    """Loads the GPT-2 tokenizer. transformers is imported here, so the module can be used without it."""
+    from transformers import GPT2Tokenizer
+
+    return GPT2Tokenizer.from_pretrained("gpt2")
+
+
+class ModelRegistry:
+    """
+    Loads the models and tokenizers of a miner once and shares them between requests, instead of loading them
+    again in every request.
+
+    Example:
+        registry = ModelRegistry()
+        registry.register("tokenizer", load_gpt2_tokenizer)
+        registry.load_all()
+        tokenizer = registry.get("tokenizer")
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warm_ups: Dict[str, Callable[[Any], None]] = {}
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warm_up: Optional[Callable[[Any], None]] = None,
+    ):
+        """
+        Registers a model by name.
+
+        Args:
+            name (str): The name the model is looked up by.
+            loader (Callable[[], Any]): Loads and returns the model.
+            warm_up (Callable[[Any], None], optional): Runs a throwaway inference with the loaded model, so that the
+                first request does not pay for lazy initialisation.
+        """
+        self._loaders[name] = loader
+        if warm_up is not None:
+            self._warm_ups[name] = warm_up
+
+    def get(self, name: str) -> Any:
+        """Returns the model, loading it on first use."""
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    start_time = time.time()
+                    model = self._models[name] = self._loaders[name]()
+                    ct.logging.info(
+                        f"Loaded {name} in {time.time() - start_time:.2f}s"
+                    )
+        return model
+
+    def load_all(self, warm_up: bool = False):
+        """Loads every registered model and optionally warms them up."""
+        for name in self._loaders:
+            model = self.get(name)
+            if warm_up and name in self._warm_ups:
+                self._warm_ups[name](model)
+
+
+class AdaptiveChunker:
+    """
+    Picks how many tokens to send per chunk of a streaming response from how fast the client consumes them.
+
+    `send` only returns once the ASGI server accepted the chunk, so a slow send means the client or the network is
+    not keeping up: the chunk size doubles to send fewer, larger chunks. A fast send halves it again, so a client
+    that keeps up receives tokens with low latency.
+
+    Args:
+        min_size (int): Smallest number of tokens per chunk.
+        max_size (int): Largest number of tokens per chunk.
+        slow_send (float): Seconds above which a send counts as slow.
+    """
+
+    def __init__(self, min_size: int = 1, max_size: int = 64, slow_send: float = 0.005):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.slow_send = slow_send
+        self.size = min_size
+
+    def record(self, send_time: float):
+        """Adapts the chunk size to the time the last send took."""
+        if send_time > self.slow_send:
+            self.size = min(self.max_size, self.size * 2)
+        else:
+            self.size = max(self.min_size, self.size // 2)
+
+
+class PromptCache:
+    """
+    Bounded cache of the completions streamed for recent prompts, keyed by the hash of the synapse's
+    `required_hash_fields`, i.e. its messages. Validators send the same prompt to many miners and retry it, a
+    cached completion is replayed without running the model again.
+
+    Entries older than `max_age` blocks are dropped, and beyond `max_size` entries the least recently used go first.
+
+    Args:
+        max_size (int): Maximum number of completions kept.
+        max_age (int): Number of blocks a completion is served from the cache.
+    """
+
+    def __init__(self, max_size: int = 1024, max_age: int = 10):
+        self.max_size = max_size
+        self.max_age = max_age
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str, block: int) -> Optional[str]:
+        """Returns the completion cached for the prompt, or None if it is missing or too old."""
+        entry = self._entries.get(key)
+        if entry is None or block - entry[1] > self.max_age:
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, completion: str, block: int):
+        """Caches the completion streamed for the prompt at the given block."""
+        self._entries[key] = (completion, block)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __str__(self) -> str:
+        return (
+            f"PromptCache(size={len(self)}, hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions}, hit_rate={self.hit_rate:.2f})"
+        )
+
+
 class StreamMiner(ABC):
     def __init__(self, config=None, axon=None, wallet=None, cwtensor=None):
         # Setup base config from Miner.config() and merge with subclassed config.
@@ -25,10 +178,19 @@ class StreamMiner(ABC):
         check_config(StreamMiner, self.config)
         ct.logging.info(self.config)  # TODO: duplicate print?
 
-        self.prompt_cache: Dict[str, Tuple[str, int]] = {}
+        self.prompt_cache = PromptCache(
+            max_size=self.config.miner.prompt_cache_size,
+            max_age=self.config.miner.prompt_cache_max_age,
+        )
+        self.current_block: int = 0
 
         # Activating Bittensor's logging with the set configurations.
         ct.logging(config=self.config, logging_dir=self.config.full_path)
+
+        # Load the models once at startup, requests share them.
+        self.models = ModelRegistry()
+        self.register_models(self.models)
+        self.models.load_all(warm_up=self.config.miner.warm_up)
         ct.logging.info("Setting up bittensor objects.")
 
         # Wallet holds cryptographic information, ensuring secure transactions and communication.
@@ -85,14 +247,22 @@ class StreamMiner(ABC):
     @abstractmethod
     def add_args(cls, parser: argparse.ArgumentParser): ...
 
+    def register_models(self, models: ModelRegistry):
+        """
+        Registers the models and tokenizers the miner serves requests with. They are loaded at startup and
+        retrieved in `prompt` with `self.models.get(name)`.
+        """
+        pass
+
     def _prompt(self, synapse: StreamPrompting) -> StreamPrompting:
         """
         A wrapper method around the `prompt` method that will be defined by the subclass.
 
         This method acts as an intermediary layer to perform pre-processing before calling the
-        actual `prompt` method implemented in the subclass. Specifically, it checks whether a
-        prompt is in cache to avoid reprocessing recent requests. If the prompt is not in the
-        cache, the subclass `prompt` method is called.
+        actual `prompt` method implemented in the subclass. Specifically, it checks whether the
+        prompt was answered recently and if so replays the cached completion as a stream. If the
+        prompt is not in the cache, the subclass `prompt` method is called and the completion it
+        streams is cached once the stream finished.
 
         Args:
             synapse (StreamPrompting): The incoming request object encapsulating the details of the request.
@@ -101,14 +271,51 @@ class StreamMiner(ABC):
             StreamPrompting: The response object to be sent back in reply to the incoming request, essentially
             the filled synapse request object.
 
-        Raises:
-            ValueError: If the prompt is found in the cache indicating it was sent recently.
-
         Example:
             This method is not meant to be called directly but is invoked internally when a request
             is received, and it subsequently calls the `prompt` method of the subclass.
         """
-        return self.prompt(synapse)
+        key = synapse.body_hash
+        completion = self.prompt_cache.get(key, self.current_block)
+        if completion is not None:
+            ct.logging.trace(f"Replaying cached completion for prompt {key}")
+            return synapse.create_streaming_response(
+                partial(self._replay, completion)
+            )
+
+        response = self.prompt(synapse)
+        response.token_streamer = partial(
+            self._record, key, response.token_streamer
+        )
+        return response
+
+    async def _replay(self, completion: str, send: Send, chunk_size: int = 1024):
+        """Streams a cached completion back in chunks of `chunk_size` characters."""
+        for start in range(0, len(completion), chunk_size):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": completion[start : start + chunk_size].encode("utf-8"),
+                    "more_body": True,
+                }
+            )
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _record(
+        self, key: str, token_streamer: Callable[[Send], Awaitable[None]], send: Send
+    ):
+        """Runs the token streamer of `prompt` and caches what it sent once it finished without error."""
+        chunks: List[bytes] = []
+
+        async def recording_send(message):
+            if message.get("type") == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await token_streamer(recording_send)
+        self.prompt_cache.put(
+            key, b"".join(chunks).decode("utf-8", errors="replace"), self.current_block
+        )
 
     @abstractmethod
     def prompt(self, synapse: StreamPrompting) -> StreamPrompting:
@@ -167,6 +374,7 @@ class StreamMiner(ABC):
 
         # --- Run until should_exit = True.
         self.last_epoch_block = self.cwtensor.get_current_block()
+        self.current_block = self.last_epoch_block
         ct.logging.info(f"Miner starting at block: {self.last_epoch_block}")
 
         # This loop maintains the miner's operations until intentionally stopped.
@@ -185,6 +393,7 @@ class StreamMiner(ABC):
                     # --- Wait for next bloc.
                     time.sleep(1)
                     current_block = self.cwtensor.get_current_block()
+                    self.current_block = current_block
 
                     # --- Check if we should exit.
                     if self.should_exit:
@@ -206,7 +415,8 @@ class StreamMiner(ABC):
                     f"Trust:{metagraph.T[self.my_subnet_uid]} | "
                     f"Consensus:{metagraph.C[self.my_subnet_uid] } | "
                     f"Incentive:{metagraph.I[self.my_subnet_uid]} | "
-                    f"Emission:{metagraph.E[self.my_subnet_uid]}"
+                    f"Emission:{metagraph.E[self.my_subnet_uid]} | "
+                    f"{self.prompt_cache}"
                 )
                 ct.logging.info(log)
 
@@ -297,6 +507,16 @@ class StreamingTemplateMiner(StreamMiner):
         """
         pass
 
+    def register_models(self, models: ModelRegistry):
+        """
+        Registers the GPT-2 tokenizer, warmed up by tokenizing a short text.
+        """
+        models.register(
+            "gpt2",
+            loader=load_gpt2_tokenizer,
+            warm_up=lambda tokenizer: tokenizer("warm up", return_tensors="pt"),
+        )
+
     def prompt(self, synapse: StreamPrompting) -> StreamPrompting:
         """
         Generates a streaming response for the provided synapse.
@@ -319,21 +539,27 @@ class StreamingTemplateMiner(StreamMiner):
             are generated to suit their specific applications.
         """
         ct.logging.trace("HI. PROMPT()")
-        tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+        tokenizer = self.models.get("gpt2")
 
         # Simulated function to decode token IDs into strings. In a real-world scenario,
         # this can be replaced with an actual model inference step.
         def model(ids):
             return (tokenizer.decode(id) for id in ids)
 
+        stream_delay = self.config.miner.stream_delay
+        chunker = AdaptiveChunker(
+            min_size=self.config.miner.min_chunk_size,
+            max_size=self.config.miner.max_chunk_size,
+        )
+
         async def _prompt(text: str, send: Send):
             """
             Asynchronously processes the input text and sends back tokens as a streaming response.
 
             This function takes an input text, tokenizes it using the GPT-2 tokenizer, and then
-            uses the simulated model to decode token IDs into strings. It then sends each token
-            back to the client as a streaming response, with a delay between tokens to simulate
-            the effect of real-time streaming.
+            uses the simulated model to decode token IDs into strings. It then sends the tokens
+            back to the client as a streaming response, in chunks sized by how fast the client
+            consumes them, optionally pausing between chunks to simulate real-time generation.
 
             Args:
                 text (str): The input text message to be processed.
@@ -352,15 +578,16 @@ class StreamingTemplateMiner(StreamMiner):
             ct.logging.debug(f"Input text: {text}")
             ct.logging.debug(f"Input ids: {input_ids}")
 
-            N = 3  # Number of tokens to send back to the client at a time
             for token in model(input_ids):
                 ct.logging.trace(f"appending token: {token}")
                 buffer.append(token)
-                # If buffer has N tokens, send them back to the client.
-                if len(buffer) == N:
-                    time.sleep(0.1)
+                # If buffer has a chunk worth of tokens, send them back to the client.
+                if len(buffer) >= chunker.size:
+                    if stream_delay:
+                        # Never block the event loop, other requests are served meanwhile.
+                        await asyncio.sleep(stream_delay)
                     joined_buffer = "".join(buffer)
-                    ct.logging.debug(f"sedning tokens: {joined_buffer}")
+                    start_time = time.monotonic()
                     await send(
                         {
                             "type": "http.response.body",
@@ -368,20 +595,20 @@ class StreamingTemplateMiner(StreamMiner):
                             "more_body": True,
                         }
                     )
-                    ct.logging.debug(f"Streamed tokens: {joined_buffer}")
+                    chunker.record(time.monotonic() - start_time)
+                    ct.logging.trace(f"Streamed tokens: {joined_buffer}")
                     buffer = []  # Clear the buffer for next batch of tokens
 
-            # Send any remaining tokens in the buffer
-            if buffer:
-                joined_buffer = "".join(buffer)
-                await send(
-                    {
-                        "type": "http.response.body",
-                        "body": joined_buffer.encode("utf-8"),
-                        "more_body": False,  # No more tokens to send
-                    }
-                )
-                ct.logging.trace(f"Streamed tokens: {joined_buffer}")
+            # Send any remaining tokens in the buffer and end the response.
+            joined_buffer = "".join(buffer)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": joined_buffer.encode("utf-8"),
+                    "more_body": False,  # No more tokens to send
+                }
+            )
+            ct.logging.trace(f"Streamed tokens: {joined_buffer}")
 
         message = synapse.messages[0]
         ct.logging.trace(f"message in _prompt: {message}")
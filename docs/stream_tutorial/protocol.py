@@ -1,3 +1,5 @@
+import codecs
+
 import pydantic
 import cybertensor as ct
 
@@ -26,7 +28,10 @@ class StreamPrompting(ct.StreamingSynapse):
 
     - `completion` (str): Stores the processed result of the streaming tokens. As tokens are streamed, decoded, and
                           processed, they are accumulated in the completion attribute. This represents the "final"
-                          product or result of the streaming process.
+                          product or result of the streaming process. While a stream is being consumed, the tokens
+                          are buffered and the attribute holds the text received before the stream started; it is
+                          updated when the stream ends, and by `deserialize` and `extract_response_json`. Call one
+                          of those to read the partial completion mid-stream.
     - `required_hash_fields` (List[str]): A list of fields that are required for the hash.
 
     Methods:
@@ -66,18 +71,35 @@ class StreamPrompting(ct.StreamingSynapse):
     completion: str = pydantic.Field(
         "",
         title="Completion",
-        description="Completion status of the current StreamPrompting object. This attribute is mutable and can be updated.",
+        description="Completion status of the current StreamPrompting object. This attribute is mutable and can be updated. "
+        "It is only updated when the stream ends or `deserialize` is called, reading it mid-stream returns stale text.",
     )
 
+    # Decoded text received since `completion` was last updated. Appending to a list and joining once avoids
+    # copying (and validating) the whole completion for every token of a long stream.
+    _pending_completion: List[str] = pydantic.PrivateAttr(default_factory=list)
+
+    def _flush_completion(self) -> str:
+        """Appends the text buffered while streaming to `completion` and returns it."""
+        if self._pending_completion:
+            self.completion = (self.completion or "") + "".join(
+                self._pending_completion
+            )
+        # Always start a new list, `copy()` shares private attributes between the copies of a synapse.
+        self._pending_completion = []
+        return self.completion
+
     async def process_streaming_response(self, response: StreamingResponse):
         """
         `process_streaming_response` is an asynchronous method designed to process the incoming streaming response from the
         Bittensor network. It's the heart of the StreamPrompting class, ensuring that streaming tokens, which represent
         prompts or messages, are decoded and appropriately managed.
 
-        As the streaming response is consumed, the tokens are decoded from their 'utf-8' encoded format, split based on
-        newline characters, and concatenated into the `completion` attribute. This accumulation of decoded tokens in the
-        `completion` attribute allows for a continuous and coherent accumulation of the streaming content.
+        As the streaming response is consumed, the chunks are decoded from 'utf-8' with an incremental decoder, so a
+        multi-byte character split across two chunks is decoded once both arrived, and split based on newline
+        characters. The tokens are buffered and joined into the `completion` attribute when the stream ends.
+
+        Per chunk logging is only done with trace logging on.
 
         Args:
             response: The streaming response object containing the content chunks to be processed. Each chunk in this
@@ -88,15 +110,25 @@ class StreamPrompting(ct.StreamingSynapse):
         ct.logging.debug(
             "Processing streaming response (StreamingSynapse base class)."
         )
-        async for chunk in response.content.iter_any():
-            ct.logging.debug(f"Processing chunk: {chunk}")
-            tokens = chunk.decode("utf-8").split("\n")
-            for token in tokens:
-                ct.logging.debug(f"--processing token: {token}")
-                if token:
-                    self.completion += token
-            ct.logging.debug(f"yielding tokens {tokens}")
-            yield tokens
+        self._flush_completion()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            async for chunk in response.content.iter_any():
+                text = decoder.decode(chunk)
+                if not text:
+                    continue
+                tokens = text.split("\n")
+                self._pending_completion.extend(token for token in tokens if token)
+                if ct.logging.__trace_on__:
+                    ct.logging.trace(f"Processing chunk: {chunk}, yielding tokens {tokens}")
+                yield tokens
+            # Bytes of an incomplete character at the end of the stream are replaced.
+            text = decoder.decode(b"", final=True)
+            if text:
+                self._pending_completion.append(text)
+                yield [text]
+        finally:
+            self._flush_completion()
 
     def deserialize(self) -> str:
         """
@@ -105,7 +137,7 @@ class StreamPrompting(ct.StreamingSynapse):
         Returns:
             str: The completion result.
         """
-        return self.completion
+        return self._flush_completion()
 
     def extract_response_json(self, response: StreamingResponse) -> dict:
         """
@@ -150,5 +182,5 @@ class StreamPrompting(ct.StreamingSynapse):
             "axon": extract_info("bt_header_axon"),
             "roles": self.roles,
             "messages": self.messages,
-            "completion": self.completion,
+            "completion": self._flush_completion(),
         }
@@ -63,6 +63,11 @@ class Miner(BaseMinerNeuron):
 
         The 'forward' function is a placeholder and should be overridden with logic that is appropriate for
         the miner's intended operation. This method demonstrates a basic transformation of input data.
+
+        If computing a response is expensive and it only depends on the query, decorate this method with
+        `template.utils.response_cache.cached_forward` to answer repeated queries from `self.response_cache`.
+        To process concurrent requests together, e.g. in one model call, inherit `template.base.miner.BatchedMinerMixin`,
+        implement `forward_batch` and return `await self.forward_batched(synapse)` from here.
         """
         # TODO(developer): Replace with actual implementation logic.
         synapse.dummy_output = synapse.dummy_input * 2
@@ -96,15 +101,17 @@ class Miner(BaseMinerNeuron):
 
         In practice, it would be wise to blacklist requests from entities that are not validators, or do not have
         enough stake. This can be checked via metagraph.S and metagraph.validator_permit. You can always attain
-        the uid of the sender via a metagraph.hotkeys.index( synapse.dendrite.hotkey ) call.
+        the uid of the sender via a self.hotkey_index.uid( synapse.dendrite.hotkey ) call, which unlike
+        metagraph.hotkeys.index does not scan all hotkeys on every request.
 
         Otherwise, allow the request to be processed further.
         """
         # TODO(developer): Define how miners should blacklist requests.
-        uid = self.metagraph.hotkeys.index(synapse.dendrite.hotkey)
+        hotkey_index = self.hotkey_index
+        uid = hotkey_index.uid(synapse.dendrite.hotkey)
         if (
                 not self.config.blacklist.allow_non_registered
-                and synapse.dendrite.hotkey not in self.metagraph.hotkeys
+                and uid is None
         ):
             # Ignore requests from un-registered entities.
             ct.logging.trace(
@@ -114,12 +121,17 @@ class Miner(BaseMinerNeuron):
 
         if self.config.blacklist.force_validator_permit:
             # If the config is set to force validator permit, then we should only allow requests from validators.
-            if not self.metagraph.validator_permit[uid]:
+            if not hotkey_index.has_validator_permit(synapse.dendrite.hotkey):
                 ct.logging.warning(
                     f"Blacklisting a request from non-validator hotkey {synapse.dendrite.hotkey}"
                 )
                 return True, "Non-validator hotkey"
 
+        # Shed load from callers exceeding their stake weighted quota, or when too many requests are in flight.
+        admitted, reason = self.admit(synapse)
+        if not admitted:
+            return True, reason
+
         ct.logging.trace(
             f"Not Blacklisting recognized hotkey {synapse.dendrite.hotkey}"
         )
@@ -146,12 +158,9 @@ class Miner(BaseMinerNeuron):
         - A higher stake results in a higher priority value.
         """
         # TODO(developer): Define how miners should prioritize requests.
-        caller_uid = self.metagraph.hotkeys.index(
+        priority = self.hotkey_index.stake_of(
             synapse.dendrite.hotkey
-        )  # Get the caller index.
-        priority = float(
-            self.metagraph.S[caller_uid]
-        )  # Return the stake as the priority.
+        )  # Return the stake as the priority, 0 for unregistered callers.
         ct.logging.trace(
             f"Prioritizing {synapse.dendrite.hotkey} with value: ", priority
         )
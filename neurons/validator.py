@@ -67,12 +67,13 @@ if __name__ == "__main__":
     with Validator() as validator:
         while True:
             try:
-                validator.metagraph.sync(cwtensor=validator.cwtensor)
                 ct.logging.info(
                     f"Validator {'is up and running' if validator.thread and validator.thread.is_alive() else 'is running and not working'}\t"
                     f"step {validator.step if validator.step else '-'}\t"
                     f"block {validator.block if validator.block else None:>,}\t\t"
-                    f"blocks until sync {validator.config.neuron.epoch_length - validator.block + validator.metagraph.last_update[validator.uid]}"
+                    f"blocks until sync {validator.sync_scheduler.blocks_until_sync(validator.block)}\t"
+                    f"full syncs {validator.sync_scheduler.full_syncs}\t"
+                    f"avoided syncs {validator.sync_scheduler.avoided_syncs}"
                 )
                 if validator.thread is None or not validator.thread.is_alive():
                     ct.logging.debug("Stopped")
@@ -0,0 +1,86 @@
+"""
+Measures chunk throughput and end-to-end latency of a streaming validator query against the mock network.
+
+Usage:
+    python scripts/benchmark_streaming.py [--axons 64] [--length 65536] [--chunk_size 64] [--chunk_delay 0] [--latency 0.1]
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import time
+
+import cybertensor as ct
+from cybertensor.mock.wallet_mock import get_mock_wallet
+
+from template.mock import AxonProfile, LatencyModel, MockDendrite, MockStream, lognormal
+
+PROTOCOL_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "docs", "stream_tutorial", "protocol.py"
+)
+
+
+def load_stream_prompting():
+    spec = importlib.util.spec_from_file_location("stream_protocol", PROTOCOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.StreamPrompting
+
+
+async def consume(stream):
+    chunks, first_chunk = 0, None
+    async for chunk in stream:
+        if isinstance(chunk, list):
+            chunks += 1
+            first_chunk = first_chunk or time.perf_counter()
+    return chunks, first_chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--axons", type=int, default=64)
+    parser.add_argument("--length", type=int, default=65536)
+    parser.add_argument("--chunk_size", type=int, default=64)
+    parser.add_argument("--chunk_delay", type=float, default=0.0)
+    parser.add_argument("--failure_rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.1, help="Median seconds until the first chunk.")
+    args = parser.parse_args()
+
+    # The mock network needs no external address.
+    ct.utils.networking.get_external_ip = lambda: "127.0.0.1"
+    dendrite = MockDendrite(
+        get_mock_wallet(),
+        stream=MockStream(
+            chunk_sizes=(args.chunk_size,),
+            chunk_delay=args.chunk_delay,
+            failure_rate=args.failure_rate,
+            seed=0,
+        ),
+        latency=LatencyModel(AxonProfile(latency=lognormal(args.latency)), seed=0),
+    )
+    axons = [
+        ct.AxonInfo(
+            version=1, ip="127.0.0.1", port=8091 + i, ip_type=4, hotkey=f"miner-hotkey-{i}", coldkey="mock-coldkey"
+        )
+        for i in range(args.axons)
+    ]
+    synapse = load_stream_prompting()(roles=["user"], messages=["x" * args.length])
+
+    async def run():
+        start = time.perf_counter()
+        streams = await dendrite(axons, synapse, deserialize=False, streaming=True)
+        results = await asyncio.gather(*(consume(stream) for stream in streams))
+        return start, time.perf_counter(), results
+
+    start, end, results = asyncio.run(run())
+    chunks = sum(count for count, _ in results)
+    first = [first_chunk - start for _, first_chunk in results if first_chunk]
+    print(f"{args.axons} axons, {args.length} bytes each in chunks of {args.chunk_size}")
+    print(f"  end-to-end     {end - start:10.3f} s")
+    print(f"  first chunk    {min(first):10.3f} s (min) {max(first):10.3f} s (max)")
+    print(f"  throughput     {chunks / (end - start):10.0f} chunks / s")
+
+
+if __name__ == "__main__":
+    main()
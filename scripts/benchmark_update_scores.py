@@ -0,0 +1,62 @@
+"""
+Benchmarks the sparse, in-place score update against the previous dense scatter implementation.
+
+Usage:
+    python scripts/benchmark_update_scores.py [--sample_size 50] [--concurrent_forwards 4] [--device cpu]
+"""
+
+import argparse
+import timeit
+
+import torch
+
+from template.utils.scores import sparse_ema_update_
+
+
+def dense_update(scores, uids, rewards, alpha):
+    # The previous implementation: scatter into a full-length copy and blend all n uids.
+    scattered_rewards = scores.scatter(0, uids, rewards)
+    return alpha * scattered_rewards + (1 - alpha) * scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sample_size", type=int, default=50)
+    parser.add_argument("--concurrent_forwards", type=int, default=4)
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    alpha = 0.1
+    for n in (4096, 65536):
+        scores = torch.rand(n, device=args.device)
+        forwards = [
+            (
+                torch.randperm(n, device=args.device)[: args.sample_size],
+                torch.rand(args.sample_size, device=args.device),
+            )
+            for _ in range(args.concurrent_forwards)
+        ]
+        all_uids = torch.cat([uids for uids, _ in forwards])
+        all_rewards = torch.cat([rewards for _, rewards in forwards])
+
+        def dense():
+            s = scores
+            for uids, rewards in forwards:
+                s = dense_update(s, uids, rewards, alpha)
+
+        def sparse():
+            for uids, rewards in forwards:
+                sparse_ema_update_(scores, uids, rewards, alpha, unique=True)
+
+        def sparse_batched():
+            sparse_ema_update_(scores, all_uids, all_rewards, alpha)
+
+        print(f"n={n}, {args.concurrent_forwards} forwards of {args.sample_size} uids")
+        for name, fn in (("dense", dense), ("sparse", sparse), ("sparse batched", sparse_batched)):
+            seconds = timeit.timeit(fn, number=args.repeat) / args.repeat
+            print(f"  {name:<15} {seconds * 1e6:10.1f} us / step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+from collections.abc import Mapping
+from typing import Any, AsyncIterator, Iterable, List, Tuple, Union
+
+import cybertensor as ct
+from cybertensor.subnets import SubnetsAPI
+
+
+class ConcurrentSubnetsAPI(SubnetsAPI):
+    """
+    SubnetsAPI that serves many independent inputs at once. `query_many` prepares the synapses of all inputs in
+    bulk and sends them over the shared dendrite, and with it one pool of HTTP connections, keeping at most
+    `concurrency` queries in flight. Results are streamed back as they complete.
+
+    Subclasses implement `prepare_synapse` and `process_responses` as for `SubnetsAPI`, and may override
+    `prepare_synapses` to build the synapses of a batch of inputs more efficiently.
+    """
+
+    def prepare_synapses(self, inputs: Iterable[Any]) -> List[ct.Synapse]:
+        """
+        Prepares the synapses of many inputs. An input that is a mapping is passed to `prepare_synapse` as keyword
+        arguments, any other input as its only argument.
+        """
+        return [
+            self.prepare_synapse(**item) if isinstance(item, Mapping) else self.prepare_synapse(item)
+            for item in inputs
+        ]
+
+    async def _query_one(
+        self,
+        index: int,
+        synapse: ct.Synapse,
+        axons: Union[ct.AxonInfo, List[ct.AxonInfo]],
+        deserialize: bool,
+        timeout: float,
+    ) -> Tuple[int, Any]:
+        try:
+            responses = await self.dendrite(
+                axons=axons,
+                synapse=synapse,
+                deserialize=deserialize,
+                timeout=timeout,
+            )
+            return index, self.process_responses(responses)
+        except Exception as err:
+            ct.logging.debug(f"Query {index} with synapse {synapse.name} failed: {err}")
+            return index, err
+
+    async def query_many(
+        self,
+        inputs: Iterable[Any],
+        axons: Union[ct.AxonInfo, List[ct.AxonInfo]],
+        concurrency: int = 16,
+        deserialize: bool = False,
+        timeout: float = 12,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Queries the API nodes with every input, at most `concurrency` at a time.
+
+        Args:
+            inputs (Iterable[Any]): The inputs, see `prepare_synapses`.
+            axons (Union[cybertensor.AxonInfo, List[cybertensor.AxonInfo]]): The axon(s) every input is sent to.
+            concurrency (int, optional): Maximum number of queries in flight. Defaults to 16.
+            deserialize (bool, optional): Whether to deserialize the responses. Defaults to False.
+            timeout (float, optional): The timeout in seconds for each query. Defaults to 12.
+
+        Yields:
+            Tuple[int, Any]: The index of the input and the result of `process_responses` for it, in order of
+                completion. If a query raised, the exception is yielded in place of its result.
+
+        Example:
+            async for index, outputs in api.query_many(range(100), axons=axons, concurrency=32):
+                ...
+        """
+        synapses = iter(enumerate(self.prepare_synapses(inputs)))
+        pending = set()
+        try:
+            while True:
+                for index, synapse in synapses:
+                    pending.add(
+                        asyncio.ensure_future(
+                            self._query_one(index, synapse, axons, deserialize, timeout)
+                        )
+                    )
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # The consumer may stop iterating early, do not leave its queries running.
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
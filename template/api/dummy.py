@@ -22,12 +22,12 @@
 from typing import List, Union, Any
 
 import cybertensor as ct
-from cybertensor.subnets import SubnetsAPI
 
+from template.api.base import ConcurrentSubnetsAPI
 from template.protocol import Dummy
 
 
-class DummyAPI(SubnetsAPI):
+class DummyAPI(ConcurrentSubnetsAPI):
 
     def __init__(self, wallet: "ct.Wallet", netuid: int = 1):
         super().__init__(wallet)
@@ -18,11 +18,16 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import time
 import torch
 import random
-from typing import List, Optional, Union, Iterable
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, Iterable
 import cybertensor as ct
 
+from template.api.node_selection import NodeSelector
+from template.utils.metagraph import MetagraphDiffer, synced_metagraph
+
 
 async def ping_uids(
         dendrite: ct.dendrite,
@@ -69,11 +74,27 @@ async def ping_uids(
     return successful_uids, failed_uids
 
 
+def get_candidate_uids(metagraph: ct.metagraph, n: float = 0.1) -> List[int]:
+    """
+    Returns the uids that may serve API requests: the top `n` fraction of the uids by stake that have a validator
+    trust above zero.
+    Args:
+        metagraph (cybertensor.metagraph): The metagraph instance containing network information.
+        n (float, optional): The fraction of top nodes to consider based on stake. Defaults to 0.1.
+    Returns:
+        list: The candidate UIDs.
+    """
+    stake = metagraph.S.float()
+    mask = (metagraph.validator_trust > 0) & (stake > torch.quantile(stake, 1 - n))
+    return metagraph.uids[mask].tolist()
+
+
 async def get_query_api_nodes(
         dendrite: ct.dendrite,
         metagraph: ct.metagraph,
         n: Optional[float] = 0.1,
-        timeout: Optional[int] = 3
+        timeout: Optional[int] = 3,
+        selector: Optional[NodeSelector] = None,
 ) -> List[int]:
     """
     Fetches the available API nodes to query for the particular subnet.
@@ -82,26 +103,22 @@ async def get_query_api_nodes(
         metagraph (cybertensor.metagraph): The metagraph instance containing network information.
         n (float, optional): The fraction of top nodes to consider based on stake. Defaults to 0.1.
         timeout (int, optional): The timeout in seconds for pinging nodes. Defaults to 3.
+        selector (NodeSelector, optional): Picks the nodes by their health. Nodes are picked at random if not given.
     Returns:
         list: A list of UIDs representing the available API nodes.
     """
     ct.logging.debug(
         f"Fetching available API nodes for subnet {metagraph.netuid}"
     )
-    vtrust_uids = [
-        uid.item()
-        for uid in metagraph.uids
-        if metagraph.validator_trust[uid] > 0
-    ]
-    top_uids = torch.where(metagraph.S > torch.quantile(metagraph.S, 1 - n))
-    top_uids = top_uids[0].tolist()
-    init_query_uids = set(top_uids).intersection(set(vtrust_uids))
+    init_query_uids = get_candidate_uids(metagraph, n=n)
     query_uids, _ = await ping_uids(
         dendrite=dendrite, metagraph=metagraph, uids=init_query_uids, timeout=timeout
     )
     ct.logging.debug(
         f"Available API node UIDs for subnet {metagraph.netuid}: {query_uids}"
     )
+    if selector is not None:
+        return selector.choose(query_uids, k=3)
     if len(query_uids) > 3:
         query_uids = random.sample(query_uids, 3)
     return query_uids
@@ -117,6 +134,9 @@ async def get_query_api_axons(
 ) -> List[ct.AxonInfo]:
     """
     Retrieves the axons of query API nodes based on their availability and stake.
+
+    Every call creates a dendrite, possibly syncs a metagraph and pings the candidates. Use a long-lived
+    `QueryAxonResolver` to resolve axons repeatedly, e.g. for every request of an API gateway.
     Args:
         wallet (cybertensor.Wallet): The wallet instance to use for querying nodes.
         metagraph (cybertensor.metagraph, optional): The metagraph instance containing network information.
@@ -139,3 +159,190 @@ async def get_query_api_axons(
             dendrite, metagraph, n=n, timeout=timeout
         )
     return [metagraph.axons[uid] for uid in query_uids]
+
+
+class QueryAxonResolver:
+    """
+    Resolves the axons of query API nodes from memory. Keeps one dendrite, and with it one pool of HTTP
+    connections, for all pings, re-syncs the metagraph only once it is older than `metagraph_ttl` and remembers
+    ping results for `ping_ttl` seconds. The ping results of uids whose axon changed are dropped on re-sync.
+
+    Nodes are picked by the health `selector` learns from the requests sent through `query`.
+
+    Args:
+        wallet (cybertensor.Wallet): The wallet instance to use for querying nodes.
+        metagraph (cybertensor.metagraph, optional): The metagraph to use, created on first use if not given.
+        netuid (int, optional): The network ID to get the nodes APIs. Defaults to 1.
+        network (str, optional): The network the metagraph is created for. Defaults to "space-pussy".
+        n (float, optional): The fraction of top nodes to consider based on stake. Defaults to 0.1.
+        timeout (int, optional): The timeout in seconds for pinging nodes. Defaults to 3.
+        metagraph_ttl (float, optional): Seconds after which the metagraph is synced again. Defaults to 600.
+        ping_ttl (float, optional): Seconds a ping result is reused. Defaults to 60.
+        dendrite (cybertensor.dendrite, optional): The dendrite to use, created from the wallet if not given.
+        selector (NodeSelector, optional): Picks the API nodes by their health.
+        time_fn (Callable[[], float], optional): Monotonic time source in seconds.
+
+    Example:
+        resolver = QueryAxonResolver(wallet, netuid=1)
+        axons = await resolver.get_query_api_axons()
+        ...
+        await resolver.close()
+    """
+
+    def __init__(
+            self,
+            wallet: ct.Wallet,
+            metagraph: Optional[ct.metagraph] = None,
+            netuid: int = 1,
+            network: str = "space-pussy",
+            n: float = 0.1,
+            timeout: int = 3,
+            metagraph_ttl: float = 600.0,
+            ping_ttl: float = 60.0,
+            dendrite: Optional[ct.dendrite] = None,
+            selector: Optional[NodeSelector] = None,
+            time_fn: Callable[[], float] = time.monotonic,
+    ):
+        self.dendrite = dendrite if dendrite is not None else ct.dendrite(wallet=wallet)
+        self.metagraph = metagraph
+        self.netuid = netuid
+        self.network = network
+        self.n = n
+        self.timeout = timeout
+        self.metagraph_ttl = metagraph_ttl
+        self.ping_ttl = ping_ttl
+        self.time_fn = time_fn
+        self.selector = selector if selector is not None else NodeSelector()
+
+        self.metagraph_syncs: int = 0
+        self.pings: int = 0
+        self.ping_hits: int = 0
+        # uid -> (successful, expiry)
+        self._pings: Dict[int, Tuple[bool, float]] = {}
+        self._differ = MetagraphDiffer(metagraph)
+        self._synced_at: Optional[float] = None if metagraph is None else time_fn()
+        self._sync_lock: Optional[asyncio.Lock] = None
+
+    async def refresh_metagraph(self, force: bool = False) -> ct.metagraph:
+        """
+        Syncs a new metagraph in the default executor if it is older than `metagraph_ttl`, or if `force` is
+        set, then replaces the metagraph with it.
+        """
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            if (
+                    not force
+                    and self._synced_at is not None
+                    and self.time_fn() - self._synced_at < self.metagraph_ttl
+            ):
+                return self.metagraph
+
+            loop = asyncio.get_running_loop()
+            if self.metagraph is None:
+                self.metagraph = await loop.run_in_executor(
+                    None, lambda: ct.metagraph(netuid=self.netuid, network=self.network)
+                )
+            else:
+                # Queries keep using the current metagraph until the synced one replaces it.
+                self.metagraph = await loop.run_in_executor(None, synced_metagraph, self.metagraph)
+            self.metagraph_syncs += 1
+            self._synced_at = self.time_fn()
+
+            # Ping results only hold for the axon that was pinged.
+            delta = self._differ.update(self.metagraph)
+            for uid in delta.changed + delta.removed:
+                self._pings.pop(uid, None)
+            return self.metagraph
+
+    async def ping(self, uids: Iterable[int]) -> Tuple[List[int], List[int]]:
+        """
+        Like `ping_uids`, but only pings the uids without a ping result younger than `ping_ttl`.
+        Returns:
+            tuple: The UIDs that responded and the UIDs that failed to respond.
+        """
+        uids = list(uids)
+        now = self.time_fn()
+        stale = [
+            uid for uid in uids
+            if uid not in self._pings or self._pings[uid][1] <= now
+        ]
+        self.ping_hits += len(uids) - len(stale)
+        if stale:
+            self.pings += len(stale)
+            successful, _ = await ping_uids(
+                self.dendrite, self.metagraph, stale, timeout=self.timeout
+            )
+            successful = set(successful)
+            expiry = self.time_fn() + self.ping_ttl
+            for uid in stale:
+                self._pings[uid] = (uid in successful, expiry)
+        successful_uids = [uid for uid in uids if self._pings[uid][0]]
+        failed_uids = [uid for uid in uids if not self._pings[uid][0]]
+        return successful_uids, failed_uids
+
+    async def get_available_uids(self) -> List[int]:
+        """Returns the UIDs of all candidate API nodes that responded to their last ping."""
+        metagraph = await self.refresh_metagraph()
+        available_uids, _ = await self.ping(get_candidate_uids(metagraph, n=self.n))
+        return available_uids
+
+    async def get_query_api_nodes(self) -> List[int]:
+        """Returns up to 3 available API node UIDs, picked by their health."""
+        return self.selector.choose(await self.get_available_uids(), k=3)
+
+    async def query(
+            self,
+            synapse: ct.Synapse,
+            deserialize: bool = False,
+            timeout: float = 12,
+    ) -> Any:
+        """
+        Sends the synapse to the healthiest available API node, hedged to a second node if it is slow, and returns
+        the first successful response. See `NodeSelector.query`.
+        Args:
+            synapse (cybertensor.Synapse): The request to send.
+            deserialize (bool, optional): Whether to deserialize the response. Defaults to False.
+            timeout (float, optional): The timeout in seconds for the query. Defaults to 12.
+        Returns:
+            The response of the API node.
+        """
+        available_uids = await self.get_available_uids()
+        metagraph = self.metagraph
+
+        async def send(uid: int):
+            responses = await self.dendrite(
+                axons=[metagraph.axons[uid]],
+                # Every node gets its own copy, the dendrite fills in the response.
+                synapse=synapse.copy(deep=True),
+                deserialize=False,
+                timeout=timeout,
+            )
+            return responses[0]
+
+        response = await self.selector.query(available_uids, send)
+        if deserialize and response is not None and self.selector.is_success(response):
+            return response.deserialize()
+        return response
+
+    async def get_query_api_axons(
+            self, uids: Optional[Union[List[int], int]] = None
+    ) -> List[ct.AxonInfo]:
+        """
+        Retrieves the axons of query API nodes, see `get_query_api_axons`.
+        Args:
+            uids (Union[List[int], int], optional): The specific UID(s) of the API node(s) to query. Defaults to None.
+        Returns:
+            list: A list of axon objects for the available API nodes.
+        """
+        if uids is not None:
+            metagraph = await self.refresh_metagraph()
+            query_uids = [uids] if isinstance(uids, int) else uids
+        else:
+            query_uids = await self.get_query_api_nodes()
+            metagraph = self.metagraph
+        return [metagraph.axons[uid] for uid in query_uids]
+
+    async def close(self):
+        """Closes the HTTP session of the dendrite."""
+        await self.dendrite.aclose_session()
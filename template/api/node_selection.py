@@ -0,0 +1,194 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import cybertensor as ct
+
+
+def is_successful(response: Any) -> bool:
+    """Whether the dendrite got a 200 response from the axon."""
+    dendrite = getattr(response, "dendrite", None)
+    return dendrite is not None and dendrite.status_code == 200
+
+
+@dataclass
+class NodeHealth:
+    """
+    Health of an API node, learned from the requests sent to it.
+
+    Attributes:
+        latency (float): Exponential moving average of the request latency in seconds.
+        success_rate (float): Exponential moving average of the share of successful requests.
+        in_flight (int): Requests sent to the node that did not finish yet.
+        requests (int): Requests that finished.
+        failures (int): Requests that failed.
+    """
+
+    latency: float
+    success_rate: float = 1.0
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+
+
+class NodeSelector:
+    """
+    Picks API nodes by health instead of at random and hedges slow requests.
+
+    Every node is scored by its expected cost, its latency average times its load, divided by its success rate.
+    A node is picked with the power of two choices: of two random candidates the one with the lower cost wins.
+    This steers traffic to fast, healthy nodes without sending everything to the single best one, and unknown
+    nodes still get traffic to learn their health.
+
+    Args:
+        alpha (float): Weight of a new sample in the latency and success rate averages.
+        default_latency (float): Latency in seconds assumed for nodes without requests.
+        hedge_factor (float): A request is hedged to a second node once it took `hedge_factor` times the latency
+            average of its node.
+        min_hedge_delay (float): Minimum number of seconds before a request is hedged.
+        is_success (Callable[[Any], bool]): Whether a response counts as a success.
+        rng (random.Random, optional): Random number generator used for the choices.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        default_latency: float = 1.0,
+        hedge_factor: float = 2.0,
+        min_hedge_delay: float = 0.05,
+        is_success: Callable[[Any], bool] = is_successful,
+        rng: Optional[random.Random] = None,
+    ):
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.hedge_factor = hedge_factor
+        self.min_hedge_delay = min_hedge_delay
+        self.is_success = is_success
+        self.rng = rng or random.Random()
+
+        self.hedges: int = 0
+        self.nodes: Dict[int, NodeHealth] = {}
+
+    def health(self, uid: int) -> NodeHealth:
+        if uid not in self.nodes:
+            self.nodes[uid] = NodeHealth(latency=self.default_latency)
+        return self.nodes[uid]
+
+    def cost(self, uid: int) -> float:
+        """Expected cost of sending a request to the node, lower is better."""
+        health = self.health(uid)
+        return health.latency * (1 + health.in_flight) / max(health.success_rate, 0.05)
+
+    def choose(
+        self, candidates: Iterable[int], k: int = 1, exclude: Iterable[int] = ()
+    ) -> List[int]:
+        """Picks up to `k` distinct nodes from `candidates` with the power of two choices."""
+        excluded = set(exclude)
+        remaining = [uid for uid in candidates if uid not in excluded]
+        chosen = []
+        while remaining and len(chosen) < k:
+            if len(remaining) == 1:
+                index = 0
+            else:
+                first, second = self.rng.sample(range(len(remaining)), 2)
+                index = first if self.cost(remaining[first]) <= self.cost(remaining[second]) else second
+            chosen.append(remaining.pop(index))
+        return chosen
+
+    def record(self, uid: int, latency: float, success: bool):
+        """Updates the health of the node with a finished request."""
+        health = self.health(uid)
+        health.requests += 1
+        health.failures += not success
+        health.success_rate += self.alpha * (float(success) - health.success_rate)
+        # Failures often return fast, only successful requests tell how fast a node serves.
+        if success:
+            health.latency += self.alpha * (latency - health.latency)
+
+    def hedge_delay(self, uid: int) -> float:
+        return max(self.min_hedge_delay, self.hedge_factor * self.health(uid).latency)
+
+    async def _send(
+        self, uid: int, send: Callable[[int], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        health = self.health(uid)
+        health.in_flight += 1
+        start_time = time.monotonic()
+        try:
+            response = await send(uid)
+            success = self.is_success(response)
+        except Exception as err:
+            ct.logging.debug(f"Request to API node {uid} failed: {err}")
+            response, success = None, False
+        finally:
+            health.in_flight -= 1
+        self.record(uid, time.monotonic() - start_time, success)
+        return response, success
+
+    async def query(
+        self, candidates: Iterable[int], send: Callable[[int], Awaitable[Any]]
+    ) -> Any:
+        """
+        Sends a request to the best of two random candidates. If it is still running after the hedge delay of its
+        node, or fails, the request is also sent to a second node. The first successful response is returned and
+        the other request is cancelled.
+
+        Args:
+            candidates (Iterable[int]): UIDs of the API nodes that may serve the request.
+            send (Callable[[int], Awaitable[Any]]): Sends the request to a node and returns its response.
+
+        Returns:
+            Any: The first successful response, or the last failed one if all failed.
+        """
+        candidates = list(candidates)
+        chosen = self.choose(candidates)
+        if not chosen:
+            raise ValueError("No API node available to query.")
+        primary = chosen[0]
+
+        pending = {asyncio.ensure_future(self._send(primary, send))}
+        hedged = False
+        response = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else self.hedge_delay(primary),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    response, success = task.result()
+                    if success:
+                        return response
+                if not hedged:
+                    # The primary is slow or failed, race a second node.
+                    hedged = True
+                    second = self.choose(candidates, exclude=[primary])
+                    if second:
+                        self.hedges += 1
+                        pending.add(asyncio.ensure_future(self._send(second[0], send)))
+            return response
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the cancelled requests unwind so their nodes are no longer counted as loaded.
+            await asyncio.gather(*pending, return_exceptions=True)
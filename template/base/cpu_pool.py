@@ -0,0 +1,126 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+import concurrent.futures
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Optional
+
+import cybertensor as ct
+
+
+class CpuPool:
+    """
+    Runs CPU bound functions in a pool of worker processes or threads, so that the event loop serving requests
+    stays responsive while the work scales across cores.
+
+    Thread pools accept any callable, including closures and bound methods, and suit work that releases the GIL,
+    e.g. torch or numpy kernels. They are the default. Process pools side-step the GIL but are opt-in: `fn` and its
+    arguments must be picklable, i.e. module level functions and plain data, and worker processes are forked from
+    a process that already runs the axon and other threads. A lock held by one of those threads at the time of the
+    fork stays locked in the worker, so the work must not touch such locks, e.g. logging handlers or the chain
+    connection. "spawn" and "forkserver" do not work here since the protobuf stubs cosmpy puts on `sys.path`
+    shadow `google.protobuf` in a fresh interpreter.
+
+    The pool is created on first use and recreated on the next use after `shutdown`.
+
+    Args:
+        kind (str): "thread" or "process".
+        workers (int, optional): Number of workers, the number of cores by default.
+    """
+
+    def __init__(self, kind: str = "thread", workers: Optional[int] = None):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown cpu pool kind {kind}, use 'thread' or 'process'.")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+
+        self.submitted: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.peak_queue_depth: int = 0
+        self.latencies = deque(maxlen=1024)
+
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of submitted calls that have not finished yet."""
+        return self.submitted - self.completed - self.failed
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted calls waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # Forked explicitly, the default start method is "spawn" on macOS and "forkserver" on Linux
+                    # from Python 3.14.
+                    self._executor = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("fork"),
+                    )
+                else:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="cpu-pool"
+                    )
+            return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)` in the pool and returns its result without blocking the event loop.
+
+        Raises:
+            Exception: Whatever `fn` raised.
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        start_time = time.monotonic()
+        self.submitted += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            result = await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+        except BaseException:
+            self.failed += 1
+            raise
+        self.completed += 1
+        self.latencies.append(time.monotonic() - start_time)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers. Calls still queued are cancelled, calls already running finish if `wait` is set."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            ct.logging.debug(f"Shutting down {self}")
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __str__(self) -> str:
+        return (
+            f"CpuPool(kind={self.kind}, workers={self.workers}, in_flight={self.in_flight}, "
+            f"queue_depth={self.queue_depth}, peak_queue_depth={self.peak_queue_depth}, "
+            f"completed={self.completed}, failed={self.failed})"
+        )
@@ -18,16 +18,156 @@
 
 import time
 import asyncio
+import inspect
+import functools
 import threading
 import argparse
-from typing import Optional
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Set, Tuple
 
 import traceback
 
 import cybertensor as ct
 
+from template.base.cpu_pool import CpuPool
 from template.base.neuron import BaseNeuron
 from template.utils.config import add_miner_args
+from template.utils.latency import LatencySamples
+from template.utils.metagraph import HotkeyIndex, MetagraphDiffer
+from template.utils.rate_limit import AdmissionController
+from template.utils.response_cache import ResponseCache
+
+
+class BatchStats:
+    """
+    Batch sizes and queueing delays of the requests coalesced by a `RequestBatcher`.
+
+    Args:
+        max_samples (int): Number of most recent queueing delays kept for the percentiles.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self.batches: int = 0
+        self.requests: int = 0
+        self.failed_batches: int = 0
+        self.batch_sizes = Counter()
+        self.queue_delays = LatencySamples(max_samples)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0 <= q <= 1) of the recent queueing delays in seconds."""
+        return self.queue_delays.percentile(q)
+
+    def __str__(self) -> str:
+        return (
+            f"BatchStats(batches={self.batches}, requests={self.requests}, failed_batches={self.failed_batches}, "
+            f"mean_batch_size={self.mean_batch_size:.2f}, sizes={dict(sorted(self.batch_sizes.items()))}, "
+            f"{self.queue_delays.summary(prefix='queue_delay_', digits=4)})"
+        )
+
+
+class RequestBatcher:
+    """
+    Coalesces concurrent requests into batches for a `forward_batch` function.
+
+    A request waits at most `max_delay` seconds for others to join its batch, and a batch is dispatched as soon as
+    it holds `max_batch_size` requests. Under load batches fill up without waiting; when idle a request is only
+    delayed by `max_delay`. The result of `forward_batch` is handed back to every waiting request, an exception is
+    raised in all of them. Call `close` on shutdown to wait for the batches still running.
+
+    Args:
+        forward_batch (Callable[[List[Synapse]], Awaitable[List[Synapse]]]): Processes a batch of requests and
+            returns the responses in the same order.
+        max_batch_size (int): Maximum number of requests per batch.
+        max_delay (float): Maximum number of seconds a request waits for its batch to fill.
+    """
+
+    def __init__(
+        self,
+        forward_batch: Callable[[List[ct.Synapse]], Awaitable[List[ct.Synapse]]],
+        max_batch_size: int = 8,
+        max_delay: float = 0.01,
+    ):
+        self.forward_batch = forward_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+        self.stats = BatchStats()
+        self._pending: List[Tuple[ct.Synapse, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Batches being processed, referenced until they finish so they are not garbage collected.
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, synapse: ct.Synapse) -> ct.Synapse:
+        """Adds the request to the next batch and returns its response once the batch was processed."""
+        loop = self._loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((synapse, future, time.monotonic()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._on_batch_done)
+
+    def _on_batch_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            ct.logging.error(f"Batch of {self.forward_batch} failed: {task.exception()}")
+
+    async def close(self):
+        """Dispatches the requests still waiting for their batch and waits until every batch has finished."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Runs `close` on the event loop serving the requests, from another thread."""
+        if self._loop is None or self._loop.is_closed() or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop).result(timeout)
+        except Exception as err:
+            ct.logging.warning(f"Batches did not finish on shutdown: {err}")
+
+    async def _run_batch(self, batch: List[Tuple[ct.Synapse, asyncio.Future, float]]):
+        now = time.monotonic()
+        self.stats.batches += 1
+        self.stats.requests += len(batch)
+        self.stats.batch_sizes[len(batch)] += 1
+        self.stats.queue_delays.extend(now - enqueued_at for _, _, enqueued_at in batch)
+
+        try:
+            responses = await self.forward_batch([synapse for synapse, _, _ in batch])
+            if len(responses) != len(batch):
+                raise ValueError(
+                    f"forward_batch returned {len(responses)} responses for {len(batch)} requests"
+                )
+        except Exception as err:
+            self.stats.failed_batches += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for (_, future, _), response in zip(batch, responses):
+            # The request may have been cancelled, e.g. by the axon timing it out.
+            if not future.done():
+                future.set_result(response)
 
 
 class BaseMinerNeuron(BaseNeuron):
@@ -55,13 +195,38 @@ class BaseMinerNeuron(BaseNeuron):
                 "You are allowing non-registered entities to send requests to your miner. This is a security risk."
             )
 
+        # Constant time lookups of callers for the blacklist, priority and forward functions.
+        self.hotkey_index = HotkeyIndex(self.metagraph)
+        # Tracks which uids changed on resync, so the index is only rebuilt when needed.
+        self.metagraph_differ = MetagraphDiffer(self.metagraph)
+
+        # Stake weighted per-caller rate limits and a bound on the requests in flight, enforced by `admit`.
+        self.admission = AdmissionController(
+            rate=self.config.blacklist.rate_limit,
+            min_rate=self.config.blacklist.min_rate_limit,
+            burst=self.config.blacklist.burst,
+            max_pending=self.config.blacklist.max_pending,
+        )
+
+        # Serves repeated queries to forward functions decorated with `cached_forward`.
+        self.response_cache = ResponseCache(
+            ttl=self.config.neuron.response_cache_ttl,
+            max_size=self.config.neuron.response_cache_size,
+        )
+
+        # Runs CPU bound work off the axon event loop, see `run_cpu`.
+        self.cpu_pool = CpuPool(
+            kind=self.config.neuron.cpu_pool,
+            workers=self.config.neuron.cpu_workers,
+        )
+
         # The axon handles request processing, allowing validators to send this miner requests.
         self.axon = ct.axon(wallet=self.wallet, config=self.config)
 
         # Attach determiners which functions are called when servicing a request.
         ct.logging.info("Attaching forward function to miner axon.")
         self.axon.attach(
-            forward_fn=self.forward,
+            forward_fn=self.release_after(self.forward),
             blacklist_fn=self.blacklist,
             priority_fn=self.priority,
         )
@@ -73,6 +238,71 @@ class BaseMinerNeuron(BaseNeuron):
         self.thread: threading.Thread = None
         self.lock = asyncio.Lock()
 
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs a CPU bound function, e.g. hashing, tokenization or a model call, in the cpu pool and awaits its result.
+        The axon keeps serving other requests, including their blacklist and priority checks, meanwhile.
+
+        With the opt-in process pool, `--neuron.cpu_pool process`, `fn` and its arguments must be picklable, i.e.
+        module level functions rather than closures or bound methods. See `CpuPool`.
+
+        Example:
+            synapse.dummy_output = await self.run_cpu(expensive_function, synapse.dummy_input)
+        """
+        return await self.cpu_pool.run(fn, *args, **kwargs)
+
+    @staticmethod
+    def admission_key(synapse: ct.Synapse) -> Hashable:
+        """Identifies a request across the blacklist and forward functions."""
+        dendrite = synapse.dendrite
+        return dendrite.hotkey, dendrite.uuid, dendrite.nonce
+
+    def admit(self, synapse: ct.Synapse) -> Tuple[bool, str]:
+        """
+        Applies the per-caller rate limit and the bound on requests in flight. Call it from the blacklist function,
+        after the checks that do not depend on load, so that floods are shed before the body is deserialized.
+
+        Args:
+            synapse (cybertensor.Synapse): A synapse object constructed from the headers of the incoming request.
+
+        Returns:
+            Tuple[bool, str]: Whether the request is admitted, and the reason if it is not.
+        """
+        if self.config.blacklist.rate_limit <= 0:
+            return True, "Rate limiting disabled"
+        hotkey = synapse.dendrite.hotkey
+        admitted, reason = self.admission.admit(
+            hotkey,
+            stake_share=self.hotkey_index.stake_share(hotkey),
+            key=self.admission_key(synapse),
+            timeout=synapse.timeout or 12.0,
+        )
+        if not admitted:
+            ct.logging.trace(
+                f"Refusing request of {hotkey}: {reason}, {self.admission.stats[hotkey]}"
+            )
+        return admitted, reason
+
+    def release_after(
+        self, forward_fn: Callable[[ct.Synapse], Awaitable[ct.Synapse]]
+    ) -> Callable[[ct.Synapse], Awaitable[ct.Synapse]]:
+        """
+        Wraps a forward function to free the admission of its request once it returns. The wrapper keeps the
+        signature of `forward_fn`, so the axon passes the synapse under whatever name `forward_fn` gives it.
+        """
+        forward_sig = inspect.signature(forward_fn)
+
+        @functools.wraps(forward_fn)
+        async def forward(*args, **kwargs) -> ct.Synapse:
+            synapse = next(iter(forward_sig.bind(*args, **kwargs).arguments.values()))
+            try:
+                return await forward_fn(*args, **kwargs)
+            finally:
+                if synapse.dendrite is not None:
+                    self.admission.release(self.admission_key(synapse))
+
+        return forward
+
     def run(self):
         """
         Initiates and manages the main loop for the miner on the cybertensor network. The main loop handles graceful
@@ -117,17 +347,13 @@ class BaseMinerNeuron(BaseNeuron):
         # This loop maintains the miner's operations until intentionally stopped.
         try:
             while not self.should_exit:
-                while (
-                    self.block - self.metagraph.last_update[self.uid]
-                    < self.config.neuron.epoch_length
-                ):
+                # Wake up on every new block until the epoch boundary is crossed.
+                while not self.should_sync_metagraph():
                     ct.logging.trace(
-                        f'block {self.block}, last_update {self.metagraph.last_update[self.uid]}, '
-                        f'epoch_length {self.config.neuron.epoch_length}, '
-                        f'blocks from last update {self.block - self.metagraph.last_update[self.uid]}'
+                        f"block {self.block}, "
+                        f"blocks until sync {self.sync_scheduler.blocks_until_sync(self.block)}"
                     )
-                    # Wait before checking again.
-                    time.sleep(5)
+                    self.block_clock.wait_for_next_block_blocking()
 
                     # Check if we should exit.
                     if self.should_exit:
@@ -136,11 +362,14 @@ class BaseMinerNeuron(BaseNeuron):
                 # Sync metagraph and potentially set weights.
                 self.sync()
                 self.step += 1
-                time.sleep(5)
+
+                # Sync at most once per block.
+                self.block_clock.wait_for_next_block_blocking()
 
         # If someone intentionally stops the miner, it'll safely terminate operations.
         except KeyboardInterrupt:
             self.axon.stop()
+            self.cpu_pool.shutdown()
             ct.logging.success("Miner killed by keyboard interrupt.")
             exit()
 
@@ -169,6 +398,7 @@ class BaseMinerNeuron(BaseNeuron):
             ct.logging.debug("Stopping miner in background thread.")
             self.should_exit = True
             self.thread.join(5)
+            self.cpu_pool.shutdown()
             self.is_running = False
             ct.logging.debug("Stopped")
 
@@ -201,3 +431,56 @@ class BaseMinerNeuron(BaseNeuron):
 
         # Sync the metagraph.
         self.metagraph.sync(cwtensor=self.cwtensor)
+
+        # Swap in a fresh index if the sync changed it, requests being served keep the snapshot they already hold.
+        delta = self.metagraph_differ.update(self.metagraph)
+        if not self.hotkey_index.is_current(self.metagraph, delta):
+            self.hotkey_index = HotkeyIndex(self.metagraph)
+
+
+class BatchedMinerMixin(ABC):
+    """
+    Opt-in batching for miners: concurrent requests are coalesced and processed together by `forward_batch`, e.g.
+    in a single model call over all inputs. Inherit it before `BaseMinerNeuron`, implement `forward_batch` and
+    return `await self.forward_batched(synapse)` from `forward`.
+
+    Example:
+        class Miner(BatchedMinerMixin, BaseMinerNeuron):
+            async def forward(self, synapse):
+                return await self.forward_batched(synapse)
+
+            async def forward_batch(self, synapses):
+                ...
+    """
+
+    def __init__(self, config: Optional[ct.Config] = None):
+        super().__init__(config=config)
+
+        # Coalesces concurrent requests for `forward_batch`, see `forward_batched`.
+        self.batcher = RequestBatcher(
+            forward_batch=self.forward_batch,
+            max_batch_size=self.config.neuron.max_batch_size,
+            max_delay=self.config.neuron.max_batch_delay,
+        )
+
+    @abstractmethod
+    async def forward_batch(self, synapses: List[ct.Synapse]) -> List[ct.Synapse]:
+        """
+        Processes a batch of requests at once.
+
+        Args:
+            synapses (List[cybertensor.Synapse]): The requests of the batch.
+
+        Returns:
+            List[cybertensor.Synapse]: The responses, in the order of the requests.
+        """
+        ...
+
+    async def forward_batched(self, synapse: ct.Synapse) -> ct.Synapse:
+        """Serves the request as part of the next batch processed by `forward_batch`."""
+        return await self.batcher.submit(synapse)
+
+    def stop_run_thread(self):
+        super().stop_run_thread()
+        # Waits for the batches still running so their errors are reported.
+        self.batcher.shutdown()
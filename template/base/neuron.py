@@ -25,7 +25,9 @@ from abc import ABC, abstractmethod
 
 # Sync calls set weights and also resyncs the metagraph.
 from template.utils.config import check_config, add_args, config
-from template.utils.misc import ttl_get_block
+from template.utils.metagraph import MetagraphSyncScheduler
+from template.utils.block_clock import BlockClock
+from template.utils.misc import BlockCache
 from template import __spec_version__ as spec_version
 from template.mock import MockCwtensor, MockMetagraph
 
@@ -60,7 +62,7 @@ class BaseNeuron(ABC):
 
     @property
     def block(self):
-        return ttl_get_block(self)
+        return self.block_clock.block
 
     def __init__(self, config: Optional[ct.Config] = None):
         base_config = copy.deepcopy(config or BaseNeuron.config())
@@ -102,6 +104,16 @@ class BaseNeuron(ABC):
         ct.logging.info(f"Cwtensor: {self.cwtensor}")
         ct.logging.info(f"Metagraph: {self.metagraph}")
 
+        # One chain query serves all threads asking for the block at the same time.
+        self.block_cache = BlockCache(fetch=self.cwtensor.get_current_block)
+
+        # Predicts block arrivals so the run loops wake up right when a new block lands.
+        self.block_clock = BlockClock(
+            get_block=self.block_cache.get,
+            get_block_async=self.block_cache.get_async,
+            block_time=self.config.neuron.block_time,
+        )
+
         # Check if the miner is registered on the cybertensor network before proceeding further.
         self.check_registered()
 
@@ -114,6 +126,12 @@ class BaseNeuron(ABC):
         )
         self.step = 0
 
+        # Decides when a full metagraph sync is due by querying only this neuron's last update.
+        self.sync_scheduler = MetagraphSyncScheduler(
+            epoch_length=self.config.neuron.epoch_length,
+            query_last_update=self.get_last_update,
+        )
+
     @abstractmethod
     async def forward(self, synapse: ct.Synapse) -> ct.Synapse:
         ...
@@ -135,6 +153,8 @@ class BaseNeuron(ABC):
             if self.should_set_weights():
                 self.set_weights()
 
+            self.sync_scheduler.record_full_sync()
+
         # Always save state.
         self.save_state()
 
@@ -150,14 +170,28 @@ class BaseNeuron(ABC):
             )
             exit()
 
+    def get_last_update(self) -> int:
+        """
+        Queries the chain for the block at which this neuron was last updated. Only the neuron of our own uid is
+        fetched, which is much cheaper than a full metagraph sync.
+        """
+        neuron = self.cwtensor.neuron_for_uid(
+            uid=self.uid, netuid=self.config.netuid
+        )
+        if neuron is None or neuron.is_null:
+            return int(self.metagraph.last_update[self.uid])
+        return neuron.last_update
+
     def should_sync_metagraph(self):
         """
         Check if enough epoch blocks have elapsed since the last checkpoint to sync.
         """
-        self.metagraph.sync(cwtensor=self.cwtensor)
-        return (
-            self.block - self.metagraph.last_update[self.uid]
-        ) > self.config.neuron.epoch_length
+        should_sync = self.sync_scheduler.should_sync(self.block)
+        ct.logging.trace(
+            f"should_sync_metagraph() {should_sync}, full syncs {self.sync_scheduler.full_syncs}, "
+            f"avoided syncs {self.sync_scheduler.avoided_syncs}"
+        )
+        return should_sync
 
     def should_set_weights(self) -> bool:
         # Don't set weights on initialization.
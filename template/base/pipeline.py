@@ -0,0 +1,161 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import asyncio
+from traceback import format_exception
+from typing import Awaitable, Callable, Optional
+
+import cybertensor as ct
+
+from template.utils.latency import LatencySamples
+
+
+class ForwardStats:
+    """
+    Counters and latency samples of the forwards run by a `ForwardPipeline`.
+
+    Args:
+        max_samples (int): Number of most recent latencies kept for the percentiles.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self.started: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.latencies = LatencySamples(max_samples)
+
+    @property
+    def in_flight(self) -> int:
+        return self.started - self.completed - self.failed
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0 <= q <= 1) of the recent forward latencies in seconds."""
+        return self.latencies.percentile(q)
+
+    def __str__(self) -> str:
+        return (
+            f"ForwardStats(started={self.started}, completed={self.completed}, failed={self.failed}, "
+            f"in_flight={self.in_flight}, {self.latencies.summary()})"
+        )
+
+
+class ForwardPipeline:
+    """
+    Keeps `concurrency` forwards in flight at all times. As soon as any forward finishes a new one is started,
+    so a slow batch of miners only occupies its own slot instead of holding back the whole round.
+
+    New forwards are only started while the pipeline is not paused and a slot is free, which bounds the load the
+    validator puts on the network and on itself.
+
+    Args:
+        forward_fn (Callable[[], Awaitable]): Coroutine function running a single forward.
+        concurrency (int): Number of forwards kept in flight.
+        min_interval (float): Minimum number of seconds a slot is occupied, so that forwards which return
+            immediately (e.g. when no miner is available) do not spin.
+        on_complete (Callable[[], None], optional): Called after every successful forward.
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[], Awaitable],
+        concurrency: int,
+        min_interval: float = 0.0,
+        on_complete: Optional[Callable[[], None]] = None,
+    ):
+        self.forward_fn = forward_fn
+        self.concurrency = max(1, concurrency)
+        self.min_interval = min_interval
+        self.on_complete = on_complete
+        self.stats = ForwardStats()
+        self._stopping: bool = False
+        self._resumed: Optional[asyncio.Event] = None
+
+    def _resumed_event(self) -> asyncio.Event:
+        # Created lazily so the event belongs to the loop running the pipeline.
+        if self._resumed is None:
+            self._resumed = asyncio.Event()
+            self._resumed.set()
+        return self._resumed
+
+    def _bind_to_running_loop(self):
+        # An event is bound to the loop it is created on (Python < 3.10) or first waited on, so a pipeline that is
+        # run again on a new loop, e.g. by a restarted validator thread, gets a new one that keeps the pause state.
+        paused = self._resumed is not None and not self._resumed.is_set()
+        self._resumed = None
+        if paused:
+            self.pause()
+
+    def pause(self):
+        """Stops starting new forwards. Forwards in flight keep running."""
+        self._resumed_event().clear()
+
+    def resume(self):
+        """Starts new forwards again after `pause`."""
+        self._resumed_event().set()
+
+    def stop(self):
+        """Stops starting new forwards and lets `run` return once the forwards in flight have finished."""
+        self._stopping = True
+        self._resumed_event().set()
+
+    async def _run_one(self):
+        start_time = time.monotonic()
+        try:
+            await self.forward_fn()
+        except Exception as err:
+            self.stats.failed += 1
+            ct.logging.error(
+                f"Forward failed: {err}\n{''.join(format_exception(type(err), err, err.__traceback__))}"
+            )
+        else:
+            latency = time.monotonic() - start_time
+            self.stats.completed += 1
+            self.stats.latencies.append(latency)
+            ct.logging.debug(f"Forward completed in {latency:.3f}s, {self.stats}")
+            if self.on_complete is not None:
+                self.on_complete()
+
+        # Keep the slot busy for at least `min_interval` seconds.
+        remaining = self.min_interval - (time.monotonic() - start_time)
+        if remaining > 0 and not self._stopping:
+            await asyncio.sleep(remaining)
+
+    async def run(self):
+        """Runs forwards until `stop` is called, then waits for the forwards in flight."""
+        self._stopping = False
+        self._bind_to_running_loop()
+        resumed = self._resumed_event()
+        in_flight = set()
+        while True:
+            while not self._stopping and len(in_flight) < self.concurrency:
+                if not resumed.is_set():
+                    if in_flight:
+                        break
+                    await resumed.wait()
+                    continue
+                self.stats.started += 1
+                in_flight.add(asyncio.ensure_future(self._run_one()))
+
+            if not in_flight:
+                if self._stopping:
+                    return
+                continue
+
+            _, in_flight = await asyncio.wait(
+                in_flight, return_when=asyncio.FIRST_COMPLETED
+            )
@@ -19,21 +19,26 @@
 # DEALINGS IN THE SOFTWARE.
 
 
-import copy
-import time
 
+import os
 import torch
 import asyncio
+import concurrent.futures
 import argparse
 import threading
 import cybertensor as ct
 
-from typing import List
+from functools import partial
+from typing import Callable, List, Tuple
 from traceback import print_exception
 
 from template.base.neuron import BaseNeuron
+from template.base.pipeline import ForwardPipeline
 from template.mock import MockDendrite
 from template.utils.config import add_validator_args
+from template.utils.checkpoint import CheckpointStore
+from template.utils.metagraph import MetagraphDiffer, synced_metagraph
+from template.utils.scores import sparse_ema_update_
 
 
 class BaseValidatorNeuron(BaseNeuron):
@@ -50,10 +55,12 @@ class BaseValidatorNeuron(BaseNeuron):
 
     def __init__(self, config=None):
         super().__init__(config=config)
-        self.load_state()
 
         # Save a copy of the hotkeys to local memory.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+        self.hotkeys = list(self.metagraph.hotkeys)
+
+        # Tracks per-uid fingerprints so resyncs only touch the uids that changed.
+        self.metagraph_differ = MetagraphDiffer(self.metagraph)
 
         # Dendrite lets us send messages to other nodes (axons) in the network.
         if self.config.mock:
@@ -68,6 +75,10 @@ class BaseValidatorNeuron(BaseNeuron):
             self.metagraph.n, dtype=torch.float32, device=self.device
         )
 
+        # Writes the state atomically and incrementally, see `write_state`.
+        self.checkpoint_store = CheckpointStore(self.config.neuron.full_path)
+        self.load_state()
+
         # Init sync with the network. Updates the metagraph.
         self.sync()
 
@@ -77,14 +88,27 @@ class BaseValidatorNeuron(BaseNeuron):
         else:
             ct.logging.warning("axon off, not serving ip to chain.")
 
-        # Create asyncio event loop to manage async tasks.
-        self.loop = asyncio.get_event_loop()
+        # The event loop is created and owned by the thread executing `run`, see `submit_forward` and `submit_sync`
+        # to schedule work on it from other threads.
+        self.loop: asyncio.AbstractEventLoop = None
+        # Runs blocking chain and disk operations so they overlap with the forwards, created and shut down with
+        # the loop. A single worker keeps them in order.
+        self.executor: concurrent.futures.ThreadPoolExecutor = None
+
+        # Keeps the configured number of forwards in flight, starting a new one as soon as any finishes.
+        self.forward_pipeline = ForwardPipeline(
+            forward_fn=self.forward,
+            concurrency=self.config.neuron.num_concurrent_forwards,
+            min_interval=self.config.neuron.min_forward_interval,
+            on_complete=self._on_forward_complete,
+        )
 
         # Instantiate runners
         self.should_exit: bool = False
         self.is_running: bool = False
         self.thread: threading.Thread = None
-        self.lock = asyncio.Lock()
+        # Serializes syncs, created on the validator loop in `run`.
+        self.lock: asyncio.Lock = None
 
     def serve_axon(self):
         """Serve axon to enable external connections."""
@@ -112,12 +136,108 @@ class BaseValidatorNeuron(BaseNeuron):
             )
             pass
 
-    async def concurrent_forward(self):
-        coroutines = [
-            self.forward()
-            for _ in range(self.config.neuron.num_concurrent_forwards)
-        ]
-        await asyncio.gather(*coroutines)
+    def _on_forward_complete(self):
+        self.step += 1
+
+    def _submit(self, coroutine) -> concurrent.futures.Future:
+        if self.loop is None or self.loop.is_closed():
+            coroutine.close()
+            raise RuntimeError(
+                "The validator loop is not running, start it with run() or run_in_background_thread()."
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def submit_forward(self) -> concurrent.futures.Future:
+        """
+        Schedules a single forward on the validator loop. Safe to call from any thread.
+
+        Returns:
+            concurrent.futures.Future: Resolves once the forward has finished.
+        """
+        return self._submit(self.forward())
+
+    def submit_sync(self) -> concurrent.futures.Future:
+        """
+        Schedules a sync of the metagraph, weights and state on the validator loop. Safe to call from any thread.
+
+        Returns:
+            concurrent.futures.Future: Resolves once the sync has finished.
+        """
+        return self._submit(self.sync_async(force=True))
+
+    async def run_in_executor(self, fn: Callable, *args, **kwargs):
+        """Runs a blocking call, e.g. a chain or disk operation, in the executor without blocking the loop."""
+        return await self.loop.run_in_executor(
+            self.executor, partial(fn, *args, **kwargs)
+        )
+
+    async def sync_async(self, force: bool = False) -> bool:
+        """
+        Asynchronous counterpart of `sync`, run one at a time. Syncs the metagraph and sets weights once an epoch
+        has passed. Chain and disk operations, including the check whether a sync is due, run in the executor, so
+        forwards keep querying miners meanwhile, including while weight setting waits for finalization. The
+        scores and hotkeys are only modified on the validator loop, and weights and state are written from
+        snapshots.
+
+        Args:
+            force (bool): Check the registration and save the state even if no metagraph sync is due.
+
+        Returns:
+            bool: Whether the metagraph was synced.
+        """
+        async with self.lock:
+            should_sync = await self.run_in_executor(self.should_sync_metagraph)
+            if not should_sync and not force:
+                return False
+
+            # Ensure miner or validator hotkey is still registered on the network.
+            await self.run_in_executor(self.check_registered)
+
+            if should_sync:
+                # The forwards keep reading the current metagraph until the synced one replaces it on the loop.
+                self.metagraph = await self.run_in_executor(
+                    synced_metagraph, self.metagraph, cwtensor=self.cwtensor
+                )
+                self.apply_metagraph_delta()
+
+                if await self.run_in_executor(self.should_set_weights):
+                    await self.run_in_executor(
+                        self.set_weights, self.scores.clone()
+                    )
+
+                self.sync_scheduler.record_full_sync()
+
+            # Always save state.
+            await self.run_in_executor(self.write_state, self.get_state())
+            return should_sync
+
+    async def run_async(self):
+        """
+        Keeps `num_concurrent_forwards` forwards in flight through the forward pipeline, while waking up on every
+        block to sync the metagraph and set weights once an epoch has passed.
+        """
+        # Check that validator is registered on the network.
+        await self.sync_async(force=True)
+
+        ct.logging.info(
+            f"Starting validator forward pipeline at step {self.step}\tblock {self.block:>,}"
+        )
+        pipeline = asyncio.ensure_future(self.forward_pipeline.run())
+        try:
+            while not self.should_exit and not pipeline.done():
+                # Sleep until the next block is expected instead of polling the chain.
+                block = await self.block_clock.wait_for_next_block()
+
+                # Sync metagraph and potentially set weights, if an epoch has passed.
+                if await self.sync_async():
+                    ct.logging.info(
+                        f"Synced at step {self.step}\tblock {block:>,}\t{self.forward_pipeline.stats}"
+                    )
+        finally:
+            self.forward_pipeline.stop()
+            await pipeline
+            # The dendrite session is bound to this loop.
+            await self.dendrite.aclose_session()
 
     def run(self):
         """
@@ -126,8 +246,8 @@ class BaseValidatorNeuron(BaseNeuron):
 
         This function performs the following primary tasks:
         1. Check for registration on the cybertensor network.
-        2. Continuously forwards queries to the miners on the network, rewarding their responses and updating
-        the scores accordingly.
+        2. Continuously forwards queries to the miners on the network through the forward pipeline, rewarding their
+        responses and updating the scores accordingly.
         3. Periodically resynchronizes with the chain; updating the metagraph with the latest network state and setting
         weights.
 
@@ -143,29 +263,19 @@ class BaseValidatorNeuron(BaseNeuron):
             Exception: For unforeseen errors during the miner's operation, which are logged for diagnosis.
         """
 
-        # Check that validator is registered on the network.
-        self.sync()
+        # The loop lives as long as this thread runs the validator, so connections stay warm across steps.
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.lock = asyncio.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="validator-executor"
+        )
 
         ct.logging.info(f"Validator starting at block: {self.block}")
 
         # This loop maintains the validator's operations until intentionally stopped.
         try:
-            while True:
-                if self.should_sync_metagraph():
-                    ct.logging.info(f"Starting validator forward function at step {self.step}\tblock {self.block:>,}")
-
-                    # Run multiple forwards concurrently.
-                    self.loop.run_until_complete(self.concurrent_forward())
-
-                    # Check if we should exit.
-                    if self.should_exit:
-                        break
-
-                    # Sync metagraph and potentially set weights.
-                    self.sync()
-
-                    self.step += 1
-                time.sleep(5)
+            self.loop.run_until_complete(self.run_async())
 
         # If someone intentionally stops the validator, it'll safely terminate operations.
         except KeyboardInterrupt:
@@ -180,6 +290,23 @@ class BaseValidatorNeuron(BaseNeuron):
                 print_exception(type(err), err, err.__traceback__)
             )
 
+        finally:
+            # Cancel work submitted from other threads that is still pending, then release the loop.
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True)
+            )
+            self.loop.close()
+            # Waits for a chain or disk operation that is still running, e.g. a state write.
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _stop_pipeline(self):
+        """Stops starting new forwards so the validator loop can wind down quickly."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.forward_pipeline.stop)
+
     def run_in_background_thread(self):
         """
         Starts the validator's operations in a background thread upon entering the context.
@@ -200,6 +327,7 @@ class BaseValidatorNeuron(BaseNeuron):
         if self.is_running:
             ct.logging.debug("Stopping validator in background thread.")
             self.should_exit = True
+            self._stop_pipeline()
             self.thread.join(5)
             self.is_running = False
             ct.logging.debug("Stopped")
@@ -224,18 +352,25 @@ class BaseValidatorNeuron(BaseNeuron):
         if self.is_running:
             ct.logging.debug("Stopping validator in background thread.")
             self.should_exit = True
+            self._stop_pipeline()
             self.thread.join(timeout=5)
             self.is_running = False
             ct.logging.debug("Stopped")
 
-    def set_weights(self):
+    def set_weights(self, scores: torch.FloatTensor = None):
         """
         Sets the validator weights to the metagraph hotkeys based on the scores it has received from the miners.
         The weights determine the trust and incentive level the validator assigns to miner nodes on the network.
+
+        Args:
+            scores (torch.FloatTensor, optional): Snapshot of the scores to set weights from. Defaults to the live
+                `self.scores`.
         """
+        if scores is None:
+            scores = self.scores
 
-        # Check if self.scores contains any NaN values and log a warning if it does.
-        if torch.isnan(self.scores).any():
+        # Check if scores contains any NaN values and log a warning if it does.
+        if torch.isnan(scores).any():
             ct.logging.warning(
                 "Scores contain NaN values. This may be due to a lack of responses from miners, or a bug in your "
                 "reward functions."
@@ -243,7 +378,7 @@ class BaseValidatorNeuron(BaseNeuron):
 
         # Calculate the average reward for each uid across non-zero values.
         # Replace any NaN values with 0.
-        raw_weights = torch.nn.functional.normalize(self.scores, p=1, dim=0)
+        raw_weights = torch.nn.functional.normalize(scores, p=1, dim=0)
 
         ct.logging.debug("raw_weights", raw_weights)
         ct.logging.debug("raw_weight_uids", self.metagraph.uids.to("cpu"))
@@ -289,40 +424,54 @@ class BaseValidatorNeuron(BaseNeuron):
         """Resyncs the metagraph and updates the hotkeys and moving averages based on the new metagraph."""
         ct.logging.trace("resync_metagraph()")
 
-        # Copies state of metagraph before syncing.
-        previous_metagraph = copy.deepcopy(self.metagraph)
-
         # Sync the metagraph.
-        self.metagraph.sync(cwtensor=self.cwtensor)
+        self.metagraph = synced_metagraph(self.metagraph, cwtensor=self.cwtensor)
 
-        # Check if the metagraph axon info has changed.
-        if previous_metagraph.axons == self.metagraph.axons:
+        self.apply_metagraph_delta()
+
+    def apply_metagraph_delta(self):
+        """Updates the hotkeys and moving averages of the uids that changed since the previous metagraph sync."""
+        # Check which uids have changed since the previous sync.
+        delta = self.metagraph_differ.update(self.metagraph)
+        if not delta:
             return
 
         ct.logging.info(
-            "Metagraph updated, re-syncing hotkeys, dendrite pool and moving averages"
+            f"Metagraph updated ({len(delta.replaced)} replaced, {len(delta.axons_changed)} axons changed, "
+            f"{len(delta.added)} added, {len(delta.removed)} removed), re-syncing hotkeys and moving averages"
         )
         # Zero out all hotkeys that have been replaced.
-        for uid, hotkey in enumerate(self.hotkeys):
-            if hotkey != self.metagraph.hotkeys[uid]:
-                self.scores[uid] = 0  # hotkey has been replaced
+        if delta.replaced:
+            replaced = torch.tensor(delta.replaced, dtype=torch.long)
+            self.scores[replaced.to(self.scores.device)] = 0
+            for uid in delta.replaced:
+                self.hotkeys[uid] = self.metagraph.hotkeys[uid]
 
         # Check to see if the metagraph has changed size.
         # If so, we need to add new hotkeys and moving averages.
-        if len(self.hotkeys) < len(self.metagraph.hotkeys):
+        if delta.added or delta.removed or len(self.scores) != self.metagraph.n:
             # Update the size of the moving average scores.
-            new_moving_average = torch.zeros((self.metagraph.n)).to(
-                self.device
+            new_moving_average = torch.zeros(
+                int(self.metagraph.n), dtype=torch.float32, device=self.device
             )
-            min_len = min(len(self.hotkeys), len(self.scores))
+            min_len = min(len(new_moving_average), len(self.scores))
             new_moving_average[:min_len] = self.scores[:min_len]
             self.scores = new_moving_average
 
-        # Update the hotkeys.
-        self.hotkeys = copy.deepcopy(self.metagraph.hotkeys)
+            # Update the hotkeys.
+            del self.hotkeys[int(self.metagraph.n):]
+            self.hotkeys.extend(self.metagraph.hotkeys[len(self.hotkeys):])
+
+    def update_scores(
+        self, rewards: torch.FloatTensor, uids: List[int], unique: bool = True
+    ):
+        """
+        Performs exponential moving average on the scores based on the rewards received from the miners. Only the
+        scores of the given uids are updated, in place.
 
-    def update_scores(self, rewards: torch.FloatTensor, uids: List[int]):
-        """Performs exponential moving average on the scores based on the rewards received from the miners."""
+        The uids of a single forward are assumed to be mutually exclusive. Pass `unique=False` if they may repeat,
+        e.g. when the rewards of several forwards are passed at once, see `update_scores_batch`.
+        """
 
         # Check if rewards contains NaN values.
         if torch.isnan(rewards).any():
@@ -332,52 +481,94 @@ class BaseValidatorNeuron(BaseNeuron):
 
         # Check if `uids` is already a tensor and clone it to avoid the warning.
         if isinstance(uids, torch.Tensor):
-            uids_tensor = uids.clone().detach()
+            uids_tensor = uids.clone().detach().to(self.device)
         else:
-            uids_tensor = torch.tensor(uids).to(self.device)
+            uids_tensor = torch.tensor(uids, dtype=torch.long).to(self.device)
+        rewards = rewards.to(self.device)
 
-        # Compute forward pass rewards, assumes uids are mutually exclusive.
-        # shape: [ metagraph.n ]
-        scattered_rewards: torch.FloatTensor = self.scores.scatter(
-            0, uids_tensor, rewards
-        ).to(self.device)
-        ct.logging.debug(f"Scattered rewards: {rewards}")
+        # Uids picked before a resync shrank the metagraph no longer have a score.
+        in_range = uids_tensor < len(self.scores)
+        if not in_range.all():
+            ct.logging.debug(
+                f"Skipping rewards of uids no longer in the scores: {uids_tensor[~in_range]}"
+            )
+            uids_tensor, rewards = uids_tensor[in_range], rewards[in_range]
 
-        # Update scores with rewards produced by this step.
-        # shape: [ metagraph.n ]
+        # Update the scores of the rewarded uids with the rewards produced by this step.
         alpha: float = self.config.neuron.moving_average_alpha
-        self.scores: torch.FloatTensor = alpha * scattered_rewards + (
-            1 - alpha
-        ) * self.scores.to(self.device)
-        ct.logging.debug(f"Updated moving avg scores: {self.scores}")
+        sparse_ema_update_(self.scores, uids_tensor, rewards, alpha, unique=unique)
+        ct.logging.debug(
+            f"Updated moving avg scores of uids {uids_tensor}: {self.scores[uids_tensor]}"
+        )
+
+    def update_scores_batch(
+        self, batch: List[Tuple[torch.FloatTensor, List[int]]]
+    ):
+        """
+        Updates the scores with the (rewards, uids) pairs of several forwards in a single call.
+
+        Args:
+            batch (List[Tuple[torch.FloatTensor, List[int]]]): The rewards and uids of each forward.
+        """
+        if not batch:
+            return
+        rewards = torch.cat([rewards.to(self.device) for rewards, _ in batch])
+        uids = torch.cat(
+            [torch.as_tensor(uids, dtype=torch.long).to(self.device) for _, uids in batch]
+        )
+        self.update_scores(rewards, uids, unique=False)
 
     def save_state(self):
         """Saves the state of the validator to a file."""
         ct.logging.info("Saving validator state.")
-        ct.logging.debug(f"Saving validator state in the {self.config.neuron.full_path + '/state.pt'}.")
+        ct.logging.debug(f"Saving validator state in the {self.checkpoint_store.state_path}.")
 
         # Save the state of the validator to file.
-        torch.save(
-            {
-                "step": self.step,
-                "scores": self.scores,
-                "hotkeys": self.hotkeys,
-            },
-            self.config.neuron.full_path + "/state.pt",
-        )
+        self.write_state(self.get_state())
+
+    def get_state(self) -> dict:
+        """Returns a snapshot of the validator state that stays consistent while forwards keep running."""
+        return {
+            "step": self.step,
+            "scores": self.scores.clone(),
+            "hotkeys": list(self.hotkeys),
+        }
+
+    def write_state(self, state: dict):
+        """Writes a state snapshot taken with `get_state` to file, unless it is unchanged since the last write."""
+        if not self.checkpoint_store.save(**state):
+            ct.logging.trace(
+                f"Validator state unchanged, skipped {self.checkpoint_store.skipped_writes} writes."
+            )
 
     def load_state(self):
         """Loads the state of the validator from a file."""
         ct.logging.info("Loading validator state.")
-        ct.logging.debug(f"Loading validator state from the {self.config.neuron.full_path + '/state.pt'}.")
+        ct.logging.debug(f"Loading validator state from the {self.checkpoint_store.state_path}.")
 
         # Load the state of the validator from file.
-        try:
-            state = torch.load(self.config.neuron.full_path + "/state.pt")
-            self.step = state["step"]
-            self.scores = state["scores"]
-            self.hotkeys = state["hotkeys"]
-            ct.logging.debug(f"Loaded validator state\t step: {self.step}\t scores: {self.scores}")
-        except FileNotFoundError:
+        state = self.checkpoint_store.load()
+        legacy_path = self.config.neuron.full_path + "/state.pt"
+        if state is None and os.path.exists(legacy_path):
+            # State written by earlier versions, converted on the next save.
+            state = torch.load(legacy_path)
+        if state is None:
             self.step = 1
             ct.logging.debug(f"Instantiated validator state\t step: {self.step}\t")
+            return
+
+        self.step = state["step"]
+        self.scores = state["scores"].to(self.device)
+        self.hotkeys = list(state["hotkeys"])
+        ct.logging.debug(f"Loaded validator state\t step: {self.step}\t scores: {self.scores}")
+
+        # Reset the uids whose hotkey changed while the validator was down and match the current metagraph size.
+        for uid, hotkey in enumerate(self.metagraph.hotkeys[: len(self.hotkeys)]):
+            if self.hotkeys[uid] != hotkey and uid < len(self.scores):
+                self.scores[uid] = 0
+        n = int(self.metagraph.n)
+        if len(self.scores) != n:
+            scores = torch.zeros(n, dtype=torch.float32, device=self.device)
+            scores[: min(n, len(self.scores))] = self.scores[:n]
+            self.scores = scores
+        self.hotkeys = list(self.metagraph.hotkeys)
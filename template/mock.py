@@ -1,8 +1,15 @@
+import os
+import math
+import heapq
 import asyncio
+import dataclasses
 import random
 import time
-from typing import List
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
+import aiohttp
+import torch
 import cybertensor as ct
 
 
@@ -34,12 +41,141 @@ class MockCwtensor(ct.MockCwtensor):
             )
 
 
+@dataclass
+class MockSubnet:
+    """
+    Neurons of a mock subnet as columns, one entry per uid, to build metagraphs of realistic size (thousands of
+    neurons) in one pass instead of registering every neuron on the mock chain and syncing them back.
+
+    Attributes:
+        hotkeys (List[str]): Hotkey of every neuron.
+        coldkeys (List[str]): Coldkey of every neuron.
+        stake (torch.FloatTensor): Total stake of every neuron.
+        validator_permit (torch.BoolTensor): Whether every neuron may set weights.
+        validator_trust (torch.FloatTensor): Validator trust of every neuron.
+        ips (List[str]): Axon ip of every neuron.
+        ports (torch.LongTensor): Axon port of every neuron.
+        block (int): Block the subnet is at.
+    """
+
+    hotkeys: List[str]
+    coldkeys: List[str]
+    stake: torch.FloatTensor
+    validator_permit: torch.BoolTensor
+    validator_trust: torch.FloatTensor
+    ips: List[str]
+    ports: torch.LongTensor
+    block: int = 0
+
+    def __len__(self) -> int:
+        return len(self.hotkeys)
+
+    @classmethod
+    def build(
+        cls,
+        n: int,
+        stake: Optional[torch.Tensor] = None,
+        validator_permit: Optional[torch.Tensor] = None,
+        max_validators: int = 64,
+        hotkeys: Optional[List[str]] = None,
+        coldkeys: Optional[List[str]] = None,
+        ips: Optional[List[str]] = None,
+        ports: Optional[torch.Tensor] = None,
+        block: int = 0,
+        seed: Optional[int] = None,
+    ) -> "MockSubnet":
+        """
+        Builds a mock subnet of `n` neurons. Columns not given get defaults like those of `MockCwtensor`.
+
+        Args:
+            n (int): Number of neurons.
+            stake (torch.Tensor, optional): Stakes, drawn from a lognormal distribution by default.
+            validator_permit (torch.Tensor, optional): Permits, given to the `max_validators` largest stakes by
+                default, as the chain does.
+            max_validators (int): Number of validator permits given by default.
+            hotkeys (List[str], optional): Hotkeys, "miner-hotkey-<uid>" by default.
+            coldkeys (List[str], optional): Coldkeys, "mock-coldkey" by default.
+            ips (List[str], optional): Axon ips, "127.0.0.0" by default.
+            ports (torch.Tensor, optional): Axon ports, 8091 by default.
+            block (int): Block the subnet is at.
+            seed (int, optional): Seed of the stakes drawn by default.
+
+        Returns:
+            MockSubnet: The subnet.
+        """
+        if stake is None:
+            generator = torch.Generator()
+            generator.manual_seed(seed if seed is not None else random.randrange(2**63))
+            stake = torch.empty(n).log_normal_(mean=10.0, std=2.0, generator=generator)
+        stake = torch.as_tensor(stake, dtype=torch.float32)
+        if validator_permit is None:
+            validator_permit = torch.zeros(n, dtype=torch.bool)
+            validator_permit[torch.topk(stake, min(n, max_validators)).indices] = True
+        validator_permit = torch.as_tensor(validator_permit, dtype=torch.bool)
+        return cls(
+            hotkeys=list(hotkeys) if hotkeys is not None else [f"miner-hotkey-{uid}" for uid in range(n)],
+            coldkeys=list(coldkeys) if coldkeys is not None else ["mock-coldkey"] * n,
+            stake=stake,
+            validator_permit=validator_permit,
+            validator_trust=validator_permit.float(),
+            ips=list(ips) if ips is not None else ["127.0.0.0"] * n,
+            ports=torch.as_tensor(ports, dtype=torch.int64) if ports is not None else torch.full((n,), 8091),
+            block=block,
+        )
+
+    def save(self, path: str, params: Optional[dict] = None):
+        """Snapshots the subnet to `path`, along with the `build` parameters it was built with, if given."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        torch.save({"subnet": dataclasses.asdict(self), "params": params}, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "MockSubnet":
+        """Restores a subnet snapshot from `path`."""
+        return cls(**torch.load(path)["subnet"])
+
+    @classmethod
+    def load_or_build(cls, path: str, n: int, **kwargs) -> "MockSubnet":
+        """
+        Restores the subnet snapshot at `path` if it was built with the same parameters, or builds it with
+        `build(n, **kwargs)` and snapshots it there, so that the next test run starts fast.
+        """
+        params = dict(kwargs, n=n)
+        if os.path.exists(path):
+            snapshot = torch.load(path)
+            if _same_params(snapshot["params"], params):
+                return cls(**snapshot["subnet"])
+            ct.logging.debug(f"Rebuilding the mock subnet snapshot {path}, its build parameters changed.")
+        subnet = cls.build(n, **kwargs)
+        subnet.save(path, params=params)
+        return subnet
+
+
+def _same_params(a: Optional[dict], b: dict) -> bool:
+    if a is None or a.keys() != b.keys():
+        return False
+    for key, value in a.items():
+        other = b[key]
+        if isinstance(value, torch.Tensor) or isinstance(other, torch.Tensor):
+            if not torch.equal(torch.as_tensor(value), torch.as_tensor(other)):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
 class MockMetagraph(ct.metagraph):
-    def __init__(self, netuid=1, network="mock", cwtensor=None):
+    def __init__(self, netuid=1, network="mock", cwtensor=None, subnet: Optional[MockSubnet] = None):
         super().__init__(
             netuid=netuid, network=network, sync=False
         )
 
+        if subnet is not None:
+            # Large subnets are filled from their columns, without the mock chain.
+            self.load_subnet(subnet)
+            ct.logging.info(f"Metagraph: {self}")
+            return
+
         if cwtensor is not None:
             self.cwtensor = cwtensor
         self.sync(cwtensor=cwtensor)
@@ -51,15 +187,306 @@ class MockMetagraph(ct.metagraph):
         ct.logging.info(f"Metagraph: {self}")
         ct.logging.info(f"Axons: {self.axons}")
 
+    def load_subnet(self, subnet: MockSubnet):
+        """Sets the metagraph to the neurons of the mock subnet."""
+        n = len(subnet)
+        zeros = torch.zeros(n, dtype=torch.float32)
+        self.n = self._create_tensor(n, dtype=torch.int64)
+        self.block = self._create_tensor(subnet.block, dtype=torch.int64)
+        self.uids = torch.nn.Parameter(torch.arange(n, dtype=torch.int64), requires_grad=False)
+        for name in ("trust", "consensus", "incentive", "dividends", "ranks", "emission"):
+            setattr(self, name, torch.nn.Parameter(zeros.clone(), requires_grad=False))
+        self.active = torch.nn.Parameter(torch.ones(n, dtype=torch.int64), requires_grad=False)
+        self.last_update = torch.nn.Parameter(
+            torch.full((n,), subnet.block, dtype=torch.int64), requires_grad=False
+        )
+        self.validator_permit = torch.nn.Parameter(subnet.validator_permit.clone(), requires_grad=False)
+        self.validator_trust = torch.nn.Parameter(subnet.validator_trust.clone(), requires_grad=False)
+        self.total_stake = torch.nn.Parameter(subnet.stake.clone(), requires_grad=False)
+        self.stake = torch.nn.Parameter(subnet.stake.clone(), requires_grad=False)
+        self.axons = [
+            ct.AxonInfo(version=1, ip=ip, port=port, ip_type=4, hotkey=hotkey, coldkey=coldkey)
+            for ip, port, hotkey, coldkey in zip(
+                subnet.ips, subnet.ports.tolist(), subnet.hotkeys, subnet.coldkeys
+            )
+        ]
+
+
+Distribution = Callable[[random.Random], float]
+
+
+def fixed(seconds: float) -> Distribution:
+    """Every response takes `seconds`."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Distribution:
+    """Response times spread evenly between `low` and `high` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Distribution:
+    """Response times with a long tail, `median` seconds for half of the responses."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+def bimodal(fast: float, slow: float, slow_rate: float = 0.1, sigma: float = 0.25) -> Distribution:
+    """Mostly fast responses around `fast` seconds, a share `slow_rate` of them around `slow` seconds."""
+    fast_dist, slow_dist = lognormal(fast, sigma), lognormal(slow, sigma)
+    return lambda rng: slow_dist(rng) if rng.random() < slow_rate else fast_dist(rng)
+
+
+@dataclass
+class AxonProfile:
+    """
+    How an axon of the mock network responds.
+
+    Attributes:
+        latency (Distribution): Draws the seconds the axon takes to respond.
+        error_rate (float): Share of requests the axon fails with a 500.
+        timeout_rate (float): Share of requests the axon never answers, they time out.
+    """
+
+    latency: Distribution = field(default_factory=lambda: uniform(0, 1))
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+
+
+class LatencyModel:
+    """
+    Latency and failures of the mock network, drawn per axon from its profile with a seeded random number
+    generator, so a simulation is reproducible.
+
+    Args:
+        default (AxonProfile, optional): Profile of the axons without their own.
+        profiles (Dict[str, AxonProfile], optional): Profiles by axon hotkey.
+        seed (int, optional): Seed of the random number generator.
+    """
+
+    def __init__(
+        self,
+        default: Optional[AxonProfile] = None,
+        profiles: Optional[Dict[str, AxonProfile]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.default = default or AxonProfile()
+        self.profiles = profiles or {}
+        self.rng = random.Random(seed)
+
+    def sample(self, axon: ct.AxonInfo) -> Tuple[float, int]:
+        """
+        Draws the response of the axon to a request.
+
+        Returns:
+            Tuple[float, int]: The seconds until the response and its status code, 200, 500 or 408. A timed out
+                request has an infinite delay.
+        """
+        profile = self.profiles.get(axon.hotkey, self.default)
+        draw = self.rng.random()
+        if draw < profile.timeout_rate:
+            return math.inf, 408
+        delay = max(0.0, profile.latency(self.rng))
+        if draw < profile.timeout_rate + profile.error_rate:
+            return delay, 500
+        return delay, 200
+
+
+class Clock:
+    """Wall clock time, delays are waited."""
+
+    def time(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, delay: float):
+        await asyncio.sleep(delay)
+
+
+class VirtualClock(Clock):
+    """
+    Simulated time for benchmarks and tests. Sleeping advances the clock instead of waiting: pending sleeps are
+    woken one at a time in order of their wake up time, each one setting the clock to it. Every sleep still
+    yields to the event loop, so concurrent requests interleave as they would with real delays.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = 0
+        self._scheduled = False
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._seq += 1
+        heapq.heappush(self._sleepers, (self.now + max(0.0, delay), self._seq, future))
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._advance)
+        await future
+
+    def _advance(self):
+        # Runs once the tasks that were ready registered their sleeps, so the earliest one wakes first.
+        self._scheduled = False
+        while self._sleepers:
+            wake, _, future = heapq.heappop(self._sleepers)
+            if future.cancelled():
+                continue
+            self.now = max(self.now, wake)
+            future.set_result(None)
+            break
+        if self._sleepers:
+            self._scheduled = True
+            asyncio.get_running_loop().call_soon(self._advance)
+
+
+def default_stream_body(synapse: ct.Synapse) -> str:
+    """Echoes the messages of the synapse, if it has any."""
+    return "\n".join(getattr(synapse, "messages", None) or ["mock stream"])
+
+
+@dataclass
+class MockStream:
+    """
+    Shape of the streaming responses of the mock network.
+
+    Attributes:
+        body (Callable[[cybertensor.Synapse], Union[str, bytes]]): Returns the content an axon streams back.
+        chunk_sizes (Sequence[int]): Sizes in bytes of the chunks the content is split into, cycled through.
+            Sizes that split a multi-byte character test incremental decoding.
+        chunk_delay (float): Seconds between two chunks.
+        failure_rate (float): Share of streams that drop the connection.
+        fail_after (int): Number of chunks a failing stream sends before it drops.
+        seed (int, optional): Seed of the random number generator picking the failing streams.
+    """
+
+    body: Callable[[ct.Synapse], Union[str, bytes]] = default_stream_body
+    chunk_sizes: Sequence[int] = (16,)
+    chunk_delay: float = 0.0
+    failure_rate: float = 0.0
+    fail_after: int = 1
+    seed: Optional[int] = None
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+
+class MockStreamContent:
+    """Mocks the `content` of an aiohttp response, yielding the chunks of a streamed body."""
+
+    def __init__(
+        self,
+        body: bytes,
+        stream: MockStream,
+        fail: bool,
+        deadline: float,
+        clock: Clock,
+        first_chunk_delay: float = 0.0,
+    ):
+        self.body = body
+        self.stream = stream
+        self.fail = fail
+        self.deadline = deadline
+        self.clock = clock
+        self.first_chunk_delay = first_chunk_delay
+
+    async def _wait(self, delay: float):
+        remaining = self.deadline - self.clock.time()
+        if delay >= remaining:
+            await self.clock.sleep(max(0.0, remaining))
+            raise asyncio.TimeoutError()
+        if delay:
+            await self.clock.sleep(delay)
+
+    async def iter_any(self) -> AsyncGenerator[bytes, None]:
+        sizes = self.stream.chunk_sizes
+        position, index = 0, 0
+        await self._wait(self.first_chunk_delay)
+        while position < len(self.body):
+            if self.fail and index >= self.stream.fail_after:
+                raise aiohttp.ClientPayloadError("Mock connection dropped mid-stream.")
+            if index:
+                await self._wait(self.stream.chunk_delay)
+            size = max(1, sizes[index % len(sizes)])
+            yield self.body[position : position + size]
+            position += size
+            index += 1
+
+
+class MockStreamResponse:
+    """Mocks the aiohttp response `StreamingSynapse.process_streaming_response` consumes."""
+
+    def __init__(self, content: MockStreamContent):
+        self.content = content
+
 
 class MockDendrite(ct.dendrite):
     """
     Replaces a real cybertensor network request with a mock request that just returns some static response for all axons
-    that are passed and adds some random delay.
+    that are passed after a delay.
+
+    The delay and status of every response are drawn from `latency`, see `LatencyModel`, and waited on `clock`. Use
+    a `VirtualClock` to simulate slow miners and timeouts without waiting for them. Streaming synapses get a stream
+    shaped by `stream` from every axon, see `MockStream`, whose first chunk arrives after the drawn delay.
     """
 
-    def __init__(self, wallet):
+    def __init__(
+        self,
+        wallet,
+        stream: Optional[MockStream] = None,
+        latency: Optional[LatencyModel] = None,
+        clock: Optional[Clock] = None,
+    ):
         super().__init__(wallet)
+        self.stream = stream or MockStream()
+        self.latency = latency or LatencyModel()
+        self.clock = clock or Clock()
+
+    async def call_stream(
+            self,
+            target_axon: Union[ct.AxonInfo, ct.axon],
+            synapse: ct.StreamingSynapse,
+            timeout: float = 12.0,
+            deserialize: bool = True,
+    ) -> AsyncGenerator:
+        """
+        Streams a mock response from an axon. Like the real dendrite, it yields the chunks processed by
+        `synapse.process_streaming_response` and finally the filled synapse, deserialized if requested.
+        """
+        s = self.preprocess_synapse_for_request(target_axon, synapse.copy(), timeout)
+        start_time = self.clock.time()
+        delay, status_code = self.latency.sample(target_axon)
+        body = self.stream.body(s)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        fail = self.stream.rng.random() < self.stream.failure_rate
+        response = MockStreamResponse(
+            MockStreamContent(
+                body,
+                self.stream,
+                fail,
+                deadline=start_time + timeout,
+                clock=self.clock,
+                first_chunk_delay=delay,
+            )
+        )
+        if status_code == 500:
+            await self.clock.sleep(min(delay, timeout))
+            s.dendrite.status_code = 500
+            s.dendrite.status_message = "Internal Server Error"
+        else:
+            try:
+                async for chunk in s.process_streaming_response(response):
+                    yield chunk
+                s.dendrite.status_code = 200
+                s.dendrite.status_message = "OK"
+            except Exception as err:
+                self._handle_request_errors(s, type(s).__name__, err)
+        s.dendrite.process_time = str(self.clock.time() - start_time)
+        yield s.deserialize() if deserialize else s
 
     async def forward(
             self,
@@ -70,8 +497,13 @@ class MockDendrite(ct.dendrite):
             run_async: bool = True,
             streaming: bool = False,
     ):
-        if streaming:
-            raise NotImplementedError("Streaming not implemented yet.")
+        if not isinstance(axons, list):
+            axons = [axons]
+        if streaming or isinstance(synapse, ct.StreamingSynapse):
+            return [
+                self.call_stream(axon, synapse, timeout=timeout, deserialize=deserialize)
+                for axon in axons
+            ]
 
         async def query_all_axons(streaming: bool):
             """Queries all axons for responses."""
@@ -79,25 +511,31 @@ class MockDendrite(ct.dendrite):
             async def single_axon_response(i, axon):
                 """Queries a single axon for a response."""
 
-                start_time = time.time()
                 s = synapse.copy()
                 # Attach some more required data so it looks real
                 s = self.preprocess_synapse_for_request(axon, s, timeout)
-                # We just want to mock the response, so we'll just fill in some data
-                process_time = random.random()
-                if process_time < timeout:
-                    s.dendrite.process_time = str(time.time() - start_time)
+                # Draw how long the axon takes and whether it succeeds, and actually wait for it
+                start_time = self.clock.time()
+                delay, status_code = self.latency.sample(axon)
+                if delay >= timeout:
+                    status_code = 408
+                await self.clock.sleep(min(delay, timeout))
+                s.dendrite.process_time = str(self.clock.time() - start_time)
+
+                if status_code == 200:
                     # Update the status code and status message of the dendrite to match the axon
                     # TODO (developer): replace with your own expected synapse data
                     s.dummy_output = s.dummy_input * 2
                     s.dendrite.status_code = 200
                     s.dendrite.status_message = "OK"
-                    synapse.dendrite.process_time = str(process_time)
+                elif status_code == 500:
+                    s.dummy_output = 0
+                    s.dendrite.status_code = 500
+                    s.dendrite.status_message = "Internal Server Error"
                 else:
                     s.dummy_output = 0
                     s.dendrite.status_code = 408
                     s.dendrite.status_message = "Timeout"
-                    synapse.dendrite.process_time = str(timeout)
 
                 # Return the updated synapse object after deserializing if requested
                 if deserialize:
@@ -1,3 +1,10 @@
+from . import block_clock
+from . import checkpoint
 from . import config
+from . import latency
+from . import metagraph
 from . import misc
+from . import rate_limit
+from . import response_cache
+from . import scores
 from . import uids
@@ -0,0 +1,221 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+
+class BlockClock:
+    """
+    Tracks the chain block height and predicts when the next blocks will arrive from the observed block times.
+
+    Instead of polling the chain at a fixed interval, waiters sleep until the predicted arrival of the block they
+    wait for and only then query the chain. Reading `block` returns the last observed block without a chain query
+    until the next block is expected.
+
+    The asynchronous waits never query the chain on the event loop: they await `get_block_async`, or run
+    `get_block` in the default executor if it is not given.
+
+    The time source and the sleep functions can be replaced, e.g. to drive the clock from a simulated chain such
+    as `MockCwtensor.do_block_step` in tests.
+
+    Args:
+        get_block (Callable[[], int]): Returns the current block from the chain, e.g. `cwtensor.get_current_block`.
+        get_block_async (Callable[[], Awaitable[int]], optional): Asynchronous counterpart of `get_block`, e.g.
+            `BlockCache.get_async`.
+        block_time (float): Initial estimate of the block time in seconds, used until block times are observed.
+        min_poll_interval (float): Minimum number of seconds between two chain queries.
+        max_samples (int): Number of observed block times the estimate is computed from.
+        time_fn (Callable[[], float]): Monotonic time source in seconds.
+        sleep (Callable[[float], Awaitable]): Asynchronous sleep function.
+        blocking_sleep (Callable[[float], None]): Blocking sleep function.
+    """
+
+    def __init__(
+        self,
+        get_block: Callable[[], int],
+        block_time: float = 5.0,
+        min_poll_interval: float = 1.0,
+        max_samples: int = 32,
+        time_fn: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+        blocking_sleep: Callable[[float], None] = time.sleep,
+        get_block_async: Optional[Callable[[], Awaitable[int]]] = None,
+    ):
+        self.get_block = get_block
+        self.get_block_async = get_block_async
+        self.default_block_time = block_time
+        self.min_poll_interval = min_poll_interval
+        self.time_fn = time_fn
+        self.sleep = sleep
+        self.blocking_sleep = blocking_sleep
+
+        self.queries: int = 0
+        self._lock = threading.Lock()
+        self._block: Optional[int] = None
+        self._block_seen_at: Optional[float] = None
+        self._last_poll_at: Optional[float] = None
+        # (block, time) of every observed block transition. Unlike the first observation, each of these times is
+        # an upper bound of when the block was produced, late by at most the poll interval.
+        self._transitions = deque(maxlen=max_samples)
+
+    def _snapshot(self) -> Tuple[Optional[int], Optional[float], List[Tuple[int, float]]]:
+        """The current block, when it was seen and the transitions, read consistently under the lock."""
+        with self._lock:
+            return self._block, self._block_seen_at, list(self._transitions)
+
+    @staticmethod
+    def _estimate_block_time(transitions: List[Tuple[int, float]], default: float) -> float:
+        if len(transitions) < 2:
+            return default
+        (first_block, first_seen), (last_block, last_seen) = transitions[0], transitions[-1]
+        # A long baseline keeps the estimate accurate even though every observation is late by a random amount.
+        return (last_seen - first_seen) / (last_block - first_block)
+
+    @property
+    def block_time(self) -> float:
+        """The estimated block time in seconds."""
+        _, _, transitions = self._snapshot()
+        return self._estimate_block_time(transitions, self.default_block_time)
+
+    def observe(self) -> int:
+        """Queries the chain for the current block and updates the block time estimate."""
+        return self._record(int(self.get_block()))
+
+    async def observe_async(self) -> int:
+        """Like `observe`, but queries the chain without blocking the event loop."""
+        if self.get_block_async is not None:
+            block = await self.get_block_async()
+        else:
+            block = await asyncio.get_running_loop().run_in_executor(None, self.get_block)
+        return self._record(int(block))
+
+    def _record(self, block: int) -> int:
+        now = self.time_fn()
+        with self._lock:
+            self.queries += 1
+            if self._block is None or block < self._block:
+                self._transitions.clear()
+                self._block, self._block_seen_at = block, now
+            elif block > self._block:
+                self._transitions.append((block, now))
+                self._block, self._block_seen_at = block, now
+            self._last_poll_at = now
+            return self._block
+
+    def _block_produced_at(self) -> float:
+        """Best estimate of when the current block was produced."""
+        current, seen_at, transitions = self._snapshot()
+        if not transitions:
+            return seen_at
+        block_time = self._estimate_block_time(transitions, self.default_block_time)
+        # Every transition time is late, so the earliest extrapolation is the tightest bound.
+        return min(
+            observed_at + (current - block) * block_time
+            for block, observed_at in transitions
+        )
+
+    def next_block_eta(self) -> float:
+        """Seconds until the next block is expected, zero if it is already due."""
+        if self._block_seen_at is None:
+            return 0.0
+        return max(
+            0.0, self._block_produced_at() + self.block_time - self.time_fn()
+        )
+
+    def _is_poll_due(self) -> bool:
+        """Whether the next block is expected and the chain was not queried within `min_poll_interval`."""
+        if self._block is None:
+            return True
+        return (
+            self.next_block_eta() <= 0
+            and self.time_fn() - self._last_poll_at >= self.min_poll_interval
+        )
+
+    @property
+    def block(self) -> int:
+        """
+        The current block. The chain is only queried once the next block is expected, and then at most once
+        per `min_poll_interval`.
+        """
+        if self._is_poll_due():
+            return self.observe()
+        return self._block
+
+    async def block_async(self) -> int:
+        """Like `block`, but queries the chain without blocking the event loop."""
+        if self._is_poll_due():
+            return await self.observe_async()
+        return self._block
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        return None if timeout is None else self.time_fn() + timeout
+
+    def _delay(
+        self, block: int, target_block: int, deadline: Optional[float]
+    ) -> Optional[float]:
+        """How long to sleep before checking again, or None once `target_block` is reached or `deadline` passed."""
+        if block >= target_block:
+            return None
+        now = self.time_fn()
+        expected_at = (
+            self._block_produced_at() + (target_block - block) * self.block_time
+        )
+        delay = max(self.min_poll_interval, expected_at - now)
+        if deadline is not None:
+            if now >= deadline:
+                return None
+            delay = min(delay, deadline - now)
+        return delay
+
+    async def wait_for_block(
+        self, target_block: int, timeout: Optional[float] = None
+    ) -> int:
+        """
+        Sleeps until `target_block` is reached or `timeout` seconds have passed.
+
+        Returns:
+            int: The current block, which is lower than `target_block` only if the timeout expired.
+        """
+        deadline = self._deadline(timeout)
+        while True:
+            delay = self._delay(await self.block_async(), target_block, deadline)
+            if delay is None:
+                return self._block
+            await self.sleep(delay)
+
+    async def wait_for_next_block(self, timeout: Optional[float] = None) -> int:
+        """Sleeps until the block after the current one is reached or `timeout` seconds have passed."""
+        return await self.wait_for_block(await self.block_async() + 1, timeout=timeout)
+
+    def wait_for_block_blocking(
+        self, target_block: int, timeout: Optional[float] = None
+    ) -> int:
+        """Blocking version of `wait_for_block` for callers that do not run an event loop."""
+        deadline = self._deadline(timeout)
+        while True:
+            delay = self._delay(self.block, target_block, deadline)
+            if delay is None:
+                return self._block
+            self.blocking_sleep(delay)
+
+    def wait_for_next_block_blocking(self, timeout: Optional[float] = None) -> int:
+        """Blocking version of `wait_for_next_block` for callers that do not run an event loop."""
+        return self.wait_for_block_blocking(self.block + 1, timeout=timeout)
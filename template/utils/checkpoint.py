@@ -0,0 +1,262 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import glob
+import zlib
+import struct
+from typing import List, Optional, Tuple
+
+import torch
+import cybertensor as ct
+
+# state.bin: magic, version, hotkeys generation, hotkeys log length, step, number of scores, crc32 of the scores.
+STATE_HEADER = struct.Struct("<4sHIQqII")
+STATE_MAGIC = b"CTVS"
+STATE_VERSION = 1
+# hotkeys.<generation>.bin and .log: a table of (uid, hotkey) records. The table sets every uid once, the log
+# appends the records of the uids that changed since. A record with an empty hotkey resizes the table to `uid`.
+HOTKEY_RECORD = struct.Struct("<IH")
+
+
+def _encode_hotkeys(records: List[Tuple[int, str]]) -> bytes:
+    chunks = []
+    for uid, hotkey in records:
+        encoded = hotkey.encode()
+        chunks.append(HOTKEY_RECORD.pack(uid, len(encoded)))
+        chunks.append(encoded)
+    return b"".join(chunks)
+
+
+def _apply_hotkeys(hotkeys: List[str], data: bytes) -> int:
+    """
+    Applies the encoded hotkey records in `data` to `hotkeys` in place. A truncated trailing record is ignored.
+
+    Returns:
+        int: The number of records applied.
+    """
+    offset, records = 0, 0
+    while offset + HOTKEY_RECORD.size <= len(data):
+        uid, length = HOTKEY_RECORD.unpack_from(data, offset)
+        offset += HOTKEY_RECORD.size
+        if offset + length > len(data):
+            break
+        if length == 0:
+            del hotkeys[uid:]
+            hotkeys.extend([""] * (uid - len(hotkeys)))
+        else:
+            if uid >= len(hotkeys):
+                hotkeys.extend([""] * (uid + 1 - len(hotkeys)))
+            hotkeys[uid] = data[offset : offset + length].decode()
+        offset += length
+        records += 1
+    return records
+
+
+def _diff_hotkeys(previous: List[str], current: List[str]) -> List[Tuple[int, str]]:
+    """Returns the records turning `previous` into `current`."""
+    records = []
+    if len(current) != len(previous):
+        records.append((len(current), ""))
+    for uid in range(min(len(previous), len(current))):
+        if previous[uid] != current[uid]:
+            records.append((uid, current[uid]))
+    records.extend((uid, current[uid]) for uid in range(len(previous), len(current)))
+    return records
+
+
+def _atomic_write(path: str, data: bytes):
+    """Writes `data` to a temporary file and renames it over `path`, so `path` is either old or new, never torn."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointStore:
+    """
+    Stores the validator state (step, scores and hotkeys) in a compact binary layout and writes it atomically.
+
+    The scores are written as a raw float32 array to `state.bin`, replaced through a temporary file and a rename,
+    so a crash mid-write leaves the previous checkpoint intact. The hotkeys rarely change, so they are written once
+    as a table and only the changed uids are appended to a log afterwards. `state.bin` records how much of the log
+    belongs to it, so the hotkeys and scores loaded always come from the same checkpoint. The table is rewritten
+    under a new generation once the log grows larger than it.
+
+    Saving a state equal to the last saved one does not touch the disk.
+
+    Args:
+        directory (str): Directory the checkpoint files are kept in.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.writes: int = 0
+        self.skipped_writes: int = 0
+
+        self._generation: Optional[int] = None
+        self._saved_generation: Optional[int] = None
+        self._log_length: int = 0
+        self._log_records: int = 0
+        self._step: Optional[int] = None
+        self._scores: Optional[torch.Tensor] = None
+        self._hotkeys: Optional[List[str]] = None
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.directory, "state.bin")
+
+    def _hotkeys_path(self, generation: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"hotkeys.{generation}.{suffix}")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.state_path)
+
+    def save(self, step: int, scores: torch.Tensor, hotkeys: List[str]) -> bool:
+        """
+        Saves the state, unless it equals the last saved one.
+
+        Returns:
+            bool: Whether the state was written.
+        """
+        scores = scores.detach().to("cpu", torch.float32)
+        if (
+            step == self._step
+            and self._scores is not None
+            and torch.equal(scores, self._scores)
+            and hotkeys == self._hotkeys
+        ):
+            self.skipped_writes += 1
+            return False
+
+        if self._hotkeys is None or hotkeys != self._hotkeys:
+            records = (
+                None
+                if self._hotkeys is None
+                else _diff_hotkeys(self._hotkeys, hotkeys)
+            )
+            if records is None or self._log_records + len(records) > max(
+                64, len(hotkeys)
+            ):
+                self._write_hotkeys_table(hotkeys)
+            else:
+                self._append_hotkeys_log(records)
+
+        payload = scores.numpy().tobytes()
+        header = STATE_HEADER.pack(
+            STATE_MAGIC,
+            STATE_VERSION,
+            self._generation,
+            self._log_length,
+            step,
+            len(scores),
+            zlib.crc32(payload),
+        )
+        new_generation = self._generation != self._saved_generation
+        _atomic_write(self.state_path, header + payload)
+        self._saved_generation = self._generation
+        if new_generation:
+            self._remove_stale_generations()
+
+        self.writes += 1
+        self._step, self._scores, self._hotkeys = step, scores.clone(), list(hotkeys)
+        return True
+
+    def _generations(self) -> List[Tuple[int, str]]:
+        generations = []
+        for path in glob.glob(os.path.join(self.directory, "hotkeys.*.*")):
+            generation = os.path.basename(path).split(".")[1]
+            if generation.isdigit():
+                generations.append((int(generation), path))
+        return generations
+
+    def _write_hotkeys_table(self, hotkeys: List[str]):
+        # Never overwrite the generation the checkpoint on disk refers to.
+        generation = 1 + max(
+            [generation for generation, _ in self._generations()], default=-1
+        )
+        _atomic_write(
+            self._hotkeys_path(generation, "bin"),
+            _encode_hotkeys([(len(hotkeys), "")] + list(enumerate(hotkeys))),
+        )
+        # Start the log of the new generation empty, a leftover of an interrupted save is not referenced.
+        open(self._hotkeys_path(generation, "log"), "wb").close()
+        self._generation, self._log_length, self._log_records = generation, 0, 0
+
+    def _append_hotkeys_log(self, records: List[Tuple[int, str]]):
+        data = _encode_hotkeys(records)
+        with open(self._hotkeys_path(self._generation, "log"), "r+b") as f:
+            # Drop anything past the last checkpoint, e.g. records of a save interrupted before state.bin was written.
+            f.truncate(self._log_length)
+            f.seek(self._log_length)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_length += len(data)
+        self._log_records += len(records)
+
+    def _remove_stale_generations(self):
+        for generation, path in self._generations():
+            if generation != self._generation:
+                os.remove(path)
+
+    def load(self) -> Optional[dict]:
+        """
+        Loads the last saved state.
+
+        Returns:
+            Optional[dict]: The `step`, `scores` and `hotkeys` of the state, or None if no valid state is stored.
+        """
+        try:
+            with open(self.state_path, "rb") as f:
+                data = f.read()
+            (
+                magic,
+                version,
+                generation,
+                log_length,
+                step,
+                n,
+                crc,
+            ) = STATE_HEADER.unpack_from(data)
+            payload = data[STATE_HEADER.size :]
+            if (
+                magic != STATE_MAGIC
+                or version != STATE_VERSION
+                or len(payload) != 4 * n
+                or zlib.crc32(payload) != crc
+            ):
+                raise ValueError("corrupt state file")
+
+            hotkeys = []
+            with open(self._hotkeys_path(generation, "bin"), "rb") as f:
+                _apply_hotkeys(hotkeys, f.read())
+            with open(self._hotkeys_path(generation, "log"), "rb") as f:
+                log_records = _apply_hotkeys(hotkeys, f.read(log_length))
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error) as err:
+            ct.logging.warning(f"Ignoring invalid validator state in {self.directory}: {err}")
+            return None
+
+        scores = torch.frombuffer(bytearray(payload), dtype=torch.float32)
+        self._generation = self._saved_generation = generation
+        self._log_length, self._log_records = log_length, log_records
+        self._step, self._scores, self._hotkeys = step, scores.clone(), list(hotkeys)
+        return {"step": step, "scores": scores, "hotkeys": hotkeys}
@@ -78,6 +78,13 @@ def add_args(cls, parser):
         default=100,
     )
 
+    parser.add_argument(
+        "--neuron.block_time",
+        type=float,
+        help="Initial estimate of the block time in seconds, refined from the observed blocks.",
+        default=5.0,
+    )
+
     parser.add_argument(
         "--mock",
         action="store_true",
@@ -131,6 +138,50 @@ def add_miner_args(cls, parser):
         default="miner",
     )
 
+    parser.add_argument(
+        "--neuron.cpu_pool",
+        type=str,
+        choices=["thread", "process"],
+        help="Pool used by run_cpu: threads for work releasing the GIL, forked processes for pure python work. "
+        "Processes need picklable module level functions and arguments.",
+        default="thread",
+    )
+
+    parser.add_argument(
+        "--neuron.cpu_workers",
+        type=int,
+        help="Number of workers of the run_cpu pool, the number of cores by default.",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--neuron.max_batch_size",
+        type=int,
+        help="Maximum number of requests coalesced into one forward_batch call.",
+        default=8,
+    )
+
+    parser.add_argument(
+        "--neuron.max_batch_delay",
+        type=float,
+        help="Maximum number of seconds a request waits for its batch to fill before forward_batch is called.",
+        default=0.01,
+    )
+
+    parser.add_argument(
+        "--neuron.response_cache_ttl",
+        type=float,
+        help="Seconds a response is served from the cache of forward functions decorated with cached_forward.",
+        default=12.0,
+    )
+
+    parser.add_argument(
+        "--neuron.response_cache_size",
+        type=int,
+        help="Maximum number of responses kept by the cache of forward functions decorated with cached_forward.",
+        default=1024,
+    )
+
     parser.add_argument(
         "--blacklist.force_validator_permit",
         action="store_true",
@@ -145,6 +196,34 @@ def add_miner_args(cls, parser):
         default=False,
     )
 
+    parser.add_argument(
+        "--blacklist.rate_limit",
+        type=float,
+        help="Requests per second shared by all callers in proportion to their stake. 0 disables rate limiting.",
+        default=100.0,
+    )
+
+    parser.add_argument(
+        "--blacklist.min_rate_limit",
+        type=float,
+        help="Requests per second allowed for every caller regardless of its stake.",
+        default=1.0,
+    )
+
+    parser.add_argument(
+        "--blacklist.burst",
+        type=float,
+        help="Seconds worth of its rate limit a caller may spend at once.",
+        default=10.0,
+    )
+
+    parser.add_argument(
+        "--blacklist.max_pending",
+        type=int,
+        help="Maximum number of admitted requests in flight, further requests are rejected in the blacklist.",
+        default=256,
+    )
+
     parser.add_argument(
         "--wandb.project_name",
         type=str,
@@ -184,6 +263,13 @@ def add_validator_args(cls, parser):
         default=1,
     )
 
+    parser.add_argument(
+        "--neuron.min_forward_interval",
+        type=float,
+        help="Minimum number of seconds between two forwards started in the same concurrent slot.",
+        default=1.0,
+    )
+
     parser.add_argument(
         "--neuron.sample_size",
         type=int,
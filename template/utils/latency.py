@@ -0,0 +1,57 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+
+class LatencySamples:
+    """
+    The most recent latency samples of an operation, in seconds, and their percentiles.
+
+    Args:
+        max_samples (int): Number of most recent samples kept, older ones are dropped.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self.samples = deque(maxlen=max_samples)
+
+    def append(self, seconds: float):
+        self.samples.append(seconds)
+
+    def extend(self, seconds: Iterable[float]):
+        self.samples.extend(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0 <= q <= 1) of the samples, or None if there are none."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self, prefix: str = "", digits: int = 3) -> str:
+        """Returns the median and 95th percentile as `<prefix>p50=<s>s, <prefix>p95=<s>s`."""
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return (
+            f"{prefix}p50={p50 and round(p50, digits)}s, {prefix}p95={p95 and round(p95, digits)}s"
+        )
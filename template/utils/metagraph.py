@@ -0,0 +1,251 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cybertensor as ct
+
+# (hotkey, axon ip, axon port, axon version)
+UidFingerprint = Tuple[str, str, int, int]
+
+
+def fingerprint_metagraph(metagraph: "ct.metagraph") -> List[UidFingerprint]:
+    """
+    Builds a compact fingerprint of every uid in the metagraph. Only plain strings and integers are kept, so
+    the fingerprint is cheap to store and compare compared to a deep copy of the metagraph.
+
+    Args:
+        metagraph (cybertensor.metagraph): The metagraph to fingerprint.
+
+    Returns:
+        List[UidFingerprint]: One (hotkey, ip, port, version) tuple per uid.
+    """
+    return [
+        (hotkey, axon.ip, axon.port, axon.version)
+        for hotkey, axon in zip(metagraph.hotkeys, metagraph.axons)
+    ]
+
+
+def synced_metagraph(
+    metagraph: "ct.metagraph", cwtensor: "ct.cwtensor" = None, lite: bool = True, **kwargs
+) -> "ct.metagraph":
+    """
+    Syncs a new metagraph of the subnet of `metagraph`, leaving `metagraph` untouched. `sync` resizes and replaces
+    the metagraph attributes one by one, so readers of a metagraph that is synced in place, e.g. from another
+    thread, can see it half updated. Syncing a new one and then swapping the reference keeps every reader on a
+    consistent state, without copying the old one.
+
+    Args:
+        metagraph (cybertensor.metagraph): The metagraph to replace.
+        cwtensor (cybertensor.cwtensor, optional): The connection to sync with.
+        lite (bool): Whether to sync the lite version of the metagraph, without weights and bonds.
+        **kwargs: Further arguments of `metagraph.sync`, e.g. `block`.
+
+    Returns:
+        cybertensor.metagraph: The synced metagraph.
+    """
+    synced = ct.metagraph(
+        netuid=metagraph.netuid, network=metagraph.network, lite=lite, sync=False
+    )
+    synced.sync(cwtensor=cwtensor, lite=lite, **kwargs)
+    return synced
+
+
+@dataclass
+class MetagraphDelta:
+    """
+    Changes between two metagraph states.
+
+    Attributes:
+        replaced (List[int]): Uids whose hotkey changed, i.e. the slot was taken by a new neuron.
+        axons_changed (List[int]): Uids that kept their hotkey but changed axon ip, port or version.
+        added (List[int]): Uids that did not exist in the previous state.
+        removed (List[int]): Uids that no longer exist in the new state.
+    """
+
+    replaced: List[int] = field(default_factory=list)
+    axons_changed: List[int] = field(default_factory=list)
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[int]:
+        """All existing uids whose fingerprint changed."""
+        return sorted(self.replaced + self.axons_changed)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.replaced or self.axons_changed or self.added or self.removed
+        )
+
+
+class MetagraphDiffer:
+    """
+    Keeps the fingerprint of the last seen metagraph state and reports what changed after each sync.
+
+    Example:
+        differ = MetagraphDiffer(metagraph)
+        metagraph.sync(cwtensor=cwtensor)
+        delta = differ.update(metagraph)
+        if delta:
+            ...
+    """
+
+    def __init__(self, metagraph: "ct.metagraph" = None):
+        self.fingerprints: List[UidFingerprint] = (
+            fingerprint_metagraph(metagraph) if metagraph is not None else []
+        )
+
+    def update(self, metagraph: "ct.metagraph") -> MetagraphDelta:
+        """
+        Compares the metagraph to the stored fingerprint, then stores the new fingerprint.
+
+        Args:
+            metagraph (cybertensor.metagraph): The freshly synced metagraph.
+
+        Returns:
+            MetagraphDelta: The uids that were replaced, changed, added or removed since the last update.
+        """
+        new_fingerprints = fingerprint_metagraph(metagraph)
+        old_fingerprints = self.fingerprints
+        delta = MetagraphDelta()
+
+        for uid, (old, new) in enumerate(zip(old_fingerprints, new_fingerprints)):
+            if old == new:
+                continue
+            if old[0] != new[0]:
+                delta.replaced.append(uid)
+            else:
+                delta.axons_changed.append(uid)
+
+        delta.added = list(range(len(old_fingerprints), len(new_fingerprints)))
+        delta.removed = list(range(len(new_fingerprints), len(old_fingerprints)))
+
+        self.fingerprints = new_fingerprints
+        return delta
+
+
+class HotkeyIndex:
+    """
+    Read-only lookup tables of a metagraph state for the request path of the axon: the uid of a hotkey and the
+    stake and validator permit of every uid as plain python values, each retrieved in constant time.
+
+    The index is a snapshot. Build a new one after the metagraph was synced and replace the old one, readers on
+    other threads keep using the snapshot they hold. `is_current` tells whether a sync left the indexed values
+    unchanged, so the rebuild can be skipped.
+
+    Args:
+        metagraph (cybertensor.metagraph): The metagraph to index.
+    """
+
+    def __init__(self, metagraph: "ct.metagraph"):
+        self.block: int = int(metagraph.block)
+        self.uids: Dict[str, int] = {
+            hotkey: uid for uid, hotkey in enumerate(metagraph.hotkeys)
+        }
+        self.stake: List[float] = [float(stake) for stake in metagraph.S.tolist()]
+        self.validator_permit: List[bool] = [
+            bool(permit) for permit in metagraph.validator_permit.tolist()
+        ]
+        self.total_stake: float = sum(self.stake)
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def __contains__(self, hotkey: str) -> bool:
+        return hotkey in self.uids
+
+    def uid(self, hotkey: str) -> Optional[int]:
+        """Returns the uid of the hotkey, or None if it is not registered."""
+        return self.uids.get(hotkey)
+
+    def stake_of(self, hotkey: str) -> float:
+        """Returns the stake of the hotkey, 0 if it is not registered."""
+        uid = self.uids.get(hotkey)
+        return 0.0 if uid is None else self.stake[uid]
+
+    def stake_share(self, hotkey: str) -> float:
+        """Returns the share of the total stake held by the hotkey, 0 if it is not registered."""
+        if self.total_stake <= 0:
+            return 0.0
+        return self.stake_of(hotkey) / self.total_stake
+
+    def has_validator_permit(self, hotkey: str) -> bool:
+        """Returns whether the hotkey is registered and has a validator permit."""
+        uid = self.uids.get(hotkey)
+        return uid is not None and self.validator_permit[uid]
+
+    def is_current(self, metagraph: "ct.metagraph", delta: MetagraphDelta) -> bool:
+        """
+        Returns whether the index still matches the metagraph after a sync.
+
+        Args:
+            metagraph (cybertensor.metagraph): The freshly synced metagraph.
+            delta (MetagraphDelta): The changes of the sync, see `MetagraphDiffer.update`.
+        """
+        # Axon changes leave the index untouched, new hotkeys and changed stakes or permits do not.
+        if delta.replaced or delta.added or delta.removed:
+            return False
+        return (
+            self.stake == [float(stake) for stake in metagraph.S.tolist()]
+            and self.validator_permit == [bool(permit) for permit in metagraph.validator_permit.tolist()]
+        )
+
+
+class MetagraphSyncScheduler:
+    """
+    Decides when a full metagraph sync is due without pulling the whole metagraph.
+
+    Only the last update block of the neuron's own uid is queried, and at most once per block. A full sync is
+    reported as due once more than `epoch_length` blocks have passed since that last update.
+
+    Args:
+        epoch_length (int): Number of blocks between full syncs.
+        query_last_update (Callable[[], int]): Returns the last update block of the neuron's uid from the chain.
+    """
+
+    def __init__(self, epoch_length: int, query_last_update: Callable[[], int]):
+        self.epoch_length = epoch_length
+        self.query_last_update = query_last_update
+        self.full_syncs: int = 0
+        self.avoided_syncs: int = 0
+        self._last_update: Optional[int] = None
+        self._checked_block: Optional[int] = None
+
+    def last_update(self, block: int) -> int:
+        """Returns the last update block of the neuron's uid, querying the chain only once per block."""
+        if self._last_update is None or self._checked_block != block:
+            self._last_update = int(self.query_last_update())
+            self._checked_block = block
+        return self._last_update
+
+    def blocks_until_sync(self, block: int) -> int:
+        """Number of blocks left until the next full sync is due."""
+        return self.epoch_length - (block - self.last_update(block))
+
+    def should_sync(self, block: int) -> bool:
+        """Returns True if an epoch boundary was crossed and a full metagraph sync is due."""
+        if self.blocks_until_sync(block) < 0:
+            return True
+        self.avoided_syncs += 1
+        return False
+
+    def record_full_sync(self):
+        """Counts a full sync and forgets the cached last update, as setting weights moves it on chain."""
+        self.full_syncs += 1
+        self._last_update = None
@@ -18,94 +18,109 @@
 # DEALINGS IN THE SOFTWARE.
 
 import time
-from math import floor
-from typing import Callable, Any
-from functools import lru_cache, update_wrapper
+import asyncio
+import threading
+import concurrent.futures
+from typing import Callable, Optional, Tuple
 
 
-# LRU Cache with TTL
-def ttl_cache(maxsize: int = 128, typed: bool = False, ttl: int = -1):
+class BlockCache:
     """
-    Decorator that creates a cache of the most recently used function calls with a time-to-live (TTL) feature.
-    The cache evicts the least recently used entries if the cache exceeds the `maxsize` or if an entry has
-    been in the cache longer than the `ttl` period.
+    Caches the current block of a single chain connection for `ttl` seconds.
 
-    Args:
-        maxsize (int): Maximum size of the cache. Once the cache grows to this size, subsequent entries
-                       replace the least recently used ones. Defaults to 128.
-        typed (bool): If set to True, arguments of different types will be cached separately. For example,
-                      f(3) and f(3.0) will be treated as distinct calls with distinct results. Defaults to False.
-        ttl (int): The time-to-live for each cache entry, measured in seconds. If set to a non-positive value,
-                   the TTL is set to a very large number, effectively making the cache entries permanent. Defaults to -1.
-
-    Returns:
-        Callable: A decorator that can be applied to functions to cache their return values.
-
-    The decorator is useful for caching results of functions that are expensive to compute and are called
-    with the same arguments frequently within short periods of time. The TTL feature helps in ensuring
-    that the cached values are not stale.
-
-    Example:
-        @ttl_cache(ttl=10)
-        def get_data(param):
-            # Expensive data retrieval operation
-            return data
-    """
-    if ttl <= 0:
-        ttl = 65536
-    hash_gen = _ttl_hash_gen(ttl)
-
-    def wrapper(func: Callable) -> Callable:
-        @lru_cache(maxsize, typed)
-        def ttl_func(ttl_hash, *args, **kwargs):
-            return func(*args, **kwargs)
-
-        def wrapped(*args, **kwargs) -> Any:
-            th = next(hash_gen)
-            return ttl_func(th, *args, **kwargs)
-
-        return update_wrapper(wrapped, func)
+    All callers share one fetch: when the cached block expired, the first caller queries the chain and every other
+    caller, on any thread or event loop, waits for that same query instead of sending its own. Once a cached block
+    is older than `refresh_ahead * ttl` it is still returned, while a fetch in the background refreshes it, so
+    callers rarely wait at all.
 
-    return wrapper
-
-
-def _ttl_hash_gen(seconds: int):
-    """
-    Internal generator function used by the `ttl_cache` decorator to generate a new hash value at regular
-    time intervals specified by `seconds`.
+    Keep one instance per neuron, e.g. `BlockCache(fetch=self.cwtensor.get_current_block)`.
 
     Args:
-        seconds (int): The number of seconds after which a new hash value will be generated.
-
-    Yields:
-        int: A hash value that represents the current time interval.
-
-    This generator is used to create time-based hash values that enable the `ttl_cache` to determine
-    whether cached entries are still valid or if they have expired and should be recalculated.
-    """
-    start_time = time.time()
-    while True:
-        yield floor((time.time() - start_time) / seconds)
-
-
-# 12 seconds updating block.
-@ttl_cache(maxsize=1, ttl=12)
-def ttl_get_block(self) -> int:
+        fetch (Callable[[], int]): Queries the current block, e.g. `cwtensor.get_current_block`.
+        ttl (float): Seconds a fetched block is served from the cache.
+        refresh_ahead (float): Fraction of `ttl` after which a cached block is refreshed in the background.
+        time_fn (Callable[[], float]): Monotonic time source in seconds.
     """
-    Retrieves the current block number from the blockchain. This method is cached with a time-to-live (TTL)
-    of 12 seconds, meaning that it will only refresh the block number from the blockchain at most every 12 seconds,
-    reducing the number of calls to the underlying blockchain interface.
 
-    Returns:
-        int: The current block number on the blockchain.
-
-    This method is useful for applications that need to access the current block number frequently and can
-    tolerate a delay of up to 12 seconds for the latest information. By using a cache with TTL, the method
-    efficiently reduces the workload on the blockchain interface.
-
-    Example:
-        current_block = ttl_get_block(self)
-
-    Note: self here is the miner or validator instance
-    """
-    return self.cwtensor.get_current_block()
+    def __init__(
+        self,
+        fetch: Callable[[], int],
+        ttl: float = 1.0,
+        refresh_ahead: float = 0.5,
+        time_fn: Callable[[], float] = time.monotonic,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.time_fn = time_fn
+
+        self.fetches: int = 0
+        self.hits: int = 0
+        self.joined: int = 0
+        self._block: Optional[int] = None
+        self._fetched_at: Optional[float] = None
+        self._in_flight: Optional[concurrent.futures.Future] = None
+        self._lock = threading.Lock()
+
+    def _run_fetch(self, future: concurrent.futures.Future):
+        try:
+            block = int(self.fetch())
+        except BaseException as err:
+            with self._lock:
+                self._in_flight = None
+            future.set_exception(err)
+            return
+        with self._lock:
+            self._block, self._fetched_at = block, self.time_fn()
+            self._in_flight = None
+            self.fetches += 1
+        future.set_result(block)
+
+    def _lookup(self) -> Tuple[Optional[int], Optional[concurrent.futures.Future], bool]:
+        """
+        Returns the cached block if it is fresh, and the fetch the caller has to wait for or, if the caller owns it,
+        to run. A fresh block comes with an owned fetch when it is due for a refresh in the background.
+        """
+        now = self.time_fn()
+        with self._lock:
+            age = None if self._fetched_at is None else now - self._fetched_at
+            if age is not None and age < self.ttl:
+                self.hits += 1
+                if age >= self.ttl * self.refresh_ahead and self._in_flight is None:
+                    self._in_flight = concurrent.futures.Future()
+                    return self._block, self._in_flight, True
+                return self._block, None, False
+            if self._in_flight is not None:
+                self.joined += 1
+                return None, self._in_flight, False
+            self._in_flight = concurrent.futures.Future()
+            return None, self._in_flight, True
+
+    def get(self) -> int:
+        """Returns the current block, blocking while it is fetched."""
+        block, future, owner = self._lookup()
+        if block is not None:
+            if owner:
+                threading.Thread(
+                    target=self._run_fetch, args=(future,), daemon=True
+                ).start()
+            return block
+        if owner:
+            self._run_fetch(future)
+        return future.result()
+
+    async def get_async(self) -> int:
+        """Returns the current block, fetching it in the default executor so the event loop is not blocked."""
+        block, future, owner = self._lookup()
+        if owner:
+            asyncio.get_running_loop().run_in_executor(
+                None, self._run_fetch, future
+            )
+        if block is not None:
+            return block
+        return await asyncio.wrap_future(future)
+
+    def __str__(self) -> str:
+        return (
+            f"BlockCache(block={self._block}, fetches={self.fetches}, hits={self.hits}, joined={self.joined})"
+        )
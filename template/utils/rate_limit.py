@@ -0,0 +1,203 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import time
+import heapq
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+@dataclass
+class CallerStats:
+    """
+    Admission counters of a single caller.
+
+    Attributes:
+        admitted (int): Requests let through.
+        throttled (int): Requests refused because the caller exceeded its quota.
+        rejected (int): Requests refused because the admission queue was full.
+    """
+
+    admitted: int = 0
+    throttled: int = 0
+    rejected: int = 0
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average and bursts of up to `capacity` requests.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens held.
+        now (float): Current time, the bucket starts full.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def take(self, now: float) -> bool:
+        """Takes a token if one is available."""
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class AdmissionController:
+    """
+    Decides in the blacklist, before the request body is deserialized, whether a request is served.
+
+    Every caller gets a token bucket refilled at `min_rate` plus its share of the stake times `rate`, so high stake
+    validators get the largest quotas and no caller can starve the others by flooding. Independently of the quotas,
+    at most `max_pending` admitted requests are served at once; requests beyond that are shed immediately instead of
+    queueing up behind work the miner cannot finish in time.
+
+    Admitted requests hold a lease until `release` is called with the same key, or until their timeout expires if
+    the request never reaches the forward function, e.g. because verification failed.
+
+    Args:
+        rate (float): Requests per second shared by all callers in proportion to their stake.
+        min_rate (float): Requests per second every caller gets regardless of its stake.
+        burst (float): Seconds worth of quota a caller may spend at once.
+        max_pending (int): Maximum number of admitted requests in flight.
+        max_callers (int): Number of callers whose buckets and counters are kept, least recently seen are dropped.
+        time_fn (Callable[[], float]): Monotonic time source in seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = 1.0,
+        burst: float = 10.0,
+        max_pending: int = 256,
+        max_callers: int = 4096,
+        time_fn: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.max_pending = max_pending
+        self.max_callers = max_callers
+        self.time_fn = time_fn
+
+        self.stats: "OrderedDict[str, CallerStats]" = OrderedDict()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._leases: Dict[Hashable, float] = {}
+        # (expiry, sequence, key) heap, the sequence keeps keys from being compared.
+        self._expiries: List[Tuple[float, int, Hashable]] = []
+        self._sequence: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of admitted requests in flight."""
+        with self._lock:
+            self._expire(self.time_fn())
+            return len(self._leases)
+
+    def quota(self, stake_share: float) -> float:
+        """Requests per second allowed for a caller holding `stake_share` (0 to 1) of the stake."""
+        return self.min_rate + self.rate * stake_share
+
+    def _expire(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expiry, _, key = heapq.heappop(self._expiries)
+            if self._leases.get(key) == expiry:
+                del self._leases[key]
+
+    def _caller(self, hotkey: str, stake_share: float, now: float) -> Tuple[CallerStats, TokenBucket]:
+        stats = self.stats.get(hotkey)
+        if stats is None:
+            stats = self.stats[hotkey] = CallerStats()
+            if len(self.stats) > self.max_callers:
+                dropped, _ = self.stats.popitem(last=False)
+                self._buckets.pop(dropped, None)
+        else:
+            self.stats.move_to_end(hotkey)
+
+        # The quota follows the stake, which changes whenever the metagraph is synced.
+        rate = self.quota(stake_share)
+        bucket = self._buckets.get(hotkey)
+        if bucket is None:
+            bucket = self._buckets[hotkey] = TokenBucket(
+                rate, max(1.0, rate * self.burst), now
+            )
+        else:
+            bucket.rate, bucket.capacity = rate, max(1.0, rate * self.burst)
+        return stats, bucket
+
+    def admit(
+        self,
+        hotkey: str,
+        stake_share: float,
+        key: Optional[Hashable] = None,
+        timeout: float = 12.0,
+    ) -> Tuple[bool, str]:
+        """
+        Admits or refuses a request of `hotkey`.
+
+        Args:
+            hotkey (str): The hotkey of the caller.
+            stake_share (float): The share of the total stake held by the caller, 0 to 1.
+            key (Hashable, optional): Identifies the request in `release`. Without a key the lease only expires.
+            timeout (float): Seconds after which the lease of the request expires if it is not released.
+
+        Returns:
+            Tuple[bool, str]: Whether the request is admitted, and the reason if it is not.
+        """
+        now = self.time_fn()
+        with self._lock:
+            self._expire(now)
+            stats, bucket = self._caller(hotkey, stake_share, now)
+            if len(self._leases) >= self.max_pending:
+                stats.rejected += 1
+                return False, "Miner saturated"
+            if not bucket.take(now):
+                stats.throttled += 1
+                return False, "Rate limit exceeded"
+            stats.admitted += 1
+
+            key = key if key is not None else object()
+            expiry = now + timeout
+            self._leases[key] = expiry
+            self._sequence += 1
+            heapq.heappush(self._expiries, (expiry, self._sequence, key))
+            return True, "Admitted"
+
+    def release(self, key: Hashable):
+        """Ends the lease of the request admitted with `key`."""
+        with self._lock:
+            self._leases.pop(key, None)
+
+    def totals(self) -> CallerStats:
+        """Counters summed over all callers."""
+        with self._lock:
+            return CallerStats(
+                admitted=sum(stats.admitted for stats in self.stats.values()),
+                throttled=sum(stats.throttled for stats in self.stats.values()),
+                rejected=sum(stats.rejected for stats in self.stats.values()),
+            )
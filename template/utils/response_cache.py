@@ -0,0 +1,155 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import copy
+import json
+import time
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import cybertensor as ct
+
+# Header and terminal fields every synapse has. They differ between requests and are not part of the query.
+SYNAPSE_BASE_FIELDS: Set[str] = set(ct.Synapse.__fields__)
+
+
+def synapse_cache_key(synapse: ct.Synapse) -> str:
+    """
+    Returns a key identifying the query of a synapse. Synapses declaring `required_hash_fields` are keyed by their
+    body hash, others by a hash of all their own fields.
+
+    Args:
+        synapse (cybertensor.Synapse): The incoming request.
+
+    Returns:
+        str: The cache key.
+    """
+    if synapse.required_hash_fields:
+        return f"{type(synapse).__name__}:{synapse.body_hash}"
+    body = json.dumps(
+        synapse.dict(exclude=SYNAPSE_BASE_FIELDS), sort_keys=True, default=str
+    )
+    return f"{type(synapse).__name__}:{hashlib.sha3_256(body.encode()).hexdigest()}"
+
+
+class ResponseCache:
+    """
+    Time and size bounded LRU cache of the fields a forward function filled in, keyed by the query.
+
+    Args:
+        ttl (float): Seconds a response is served from the cache.
+        max_size (int): Maximum number of responses kept, least recently used are evicted first.
+        time_fn (Callable[[], float]): Monotonic time source in seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 12.0,
+        max_size: int = 1024,
+        time_fn: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.time_fn = time_fn
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached fields of the query, or None if they are missing or expired."""
+        now = self.time_fn()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, fields: Dict[str, Any]):
+        """Caches the fields of the response to the query."""
+        with self._lock:
+            self._entries[key] = (self.time_fn() + self.ttl, fields)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __str__(self) -> str:
+        return (
+            f"ResponseCache(size={len(self)}, hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions}, hit_rate={self.hit_rate:.2f})"
+        )
+
+
+def cached_forward(
+    forward_fn: Callable[[Any, ct.Synapse], Awaitable[ct.Synapse]]
+) -> Callable[[Any, ct.Synapse], Awaitable[ct.Synapse]]:
+    """
+    Decorates the forward function of a miner to answer repeated queries from `self.response_cache` instead of
+    computing them again. Only the fields of the synapse subclass are cached and copied into later requests with
+    the same query; a forward raising an exception is not cached.
+
+    Only use it when the response depends on the query alone, not on the caller or the time of the request.
+
+    Example:
+        class Miner(BaseMinerNeuron):
+            @cached_forward
+            async def forward(self, synapse: Dummy) -> Dummy:
+                ...
+    """
+
+    @functools.wraps(forward_fn)
+    async def forward(self, synapse: ct.Synapse) -> ct.Synapse:
+        key = synapse_cache_key(synapse)
+        fields = self.response_cache.get(key)
+        if fields is not None:
+            for name, value in copy.deepcopy(fields).items():
+                setattr(synapse, name, value)
+            return synapse
+
+        response = await forward_fn(self, synapse)
+        self.response_cache.put(
+            key,
+            copy.deepcopy(
+                {
+                    name: getattr(response, name)
+                    for name in response.__fields__
+                    if name not in SYNAPSE_BASE_FIELDS
+                }
+            ),
+        )
+        return response
+
+    return forward
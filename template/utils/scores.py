@@ -0,0 +1,66 @@
+# The MIT License (MIT)
+# Copyright © 2024 cyber~Congress
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import torch
+
+
+def sparse_ema_update_(
+    scores: torch.FloatTensor,
+    uids: torch.LongTensor,
+    rewards: torch.FloatTensor,
+    alpha: float,
+    unique: bool = False,
+) -> torch.FloatTensor:
+    """
+    Updates the exponential moving average of the scores in place, touching only the given uids.
+
+    The uids may contain duplicates, e.g. when the rewards of several forwards are concatenated into one call.
+    A uid rewarded k times gets k moving average steps towards the mean of its rewards, i.e.
+    `score = (1 - alpha) ** k * score + (1 - (1 - alpha) ** k) * mean_reward`.
+
+    Args:
+        scores (torch.FloatTensor): Scores of all uids, shape [ metagraph.n ]. Updated in place.
+        uids (torch.LongTensor): Uids that were rewarded, shape [ k ].
+        rewards (torch.FloatTensor): Rewards of the uids, shape [ k ].
+        alpha (float): Moving average alpha, how much of a new reward is added.
+        unique (bool): Set if the uids are known to be distinct, e.g. the uids of a single forward, to skip
+            the deduplication.
+
+    Returns:
+        torch.FloatTensor: The updated `scores`.
+    """
+    if len(uids) == 0:
+        return scores
+    uids = uids.to(device=scores.device, dtype=torch.long)
+    rewards = rewards.to(device=scores.device, dtype=scores.dtype)
+
+    if unique:
+        previous = scores[uids]
+        scores[uids] = previous + alpha * (rewards - previous)
+        return scores
+
+    unique_uids, inverse = torch.unique(uids, return_inverse=True)
+    counts = torch.zeros_like(unique_uids, dtype=scores.dtype).index_add_(
+        0, inverse, torch.ones_like(rewards)
+    )
+    mean_rewards = torch.zeros_like(counts).index_add_(0, inverse, rewards) / counts
+    decay = (1 - alpha) ** counts
+
+    scores[unique_uids] = (
+        decay * scores[unique_uids] + (1 - decay) * mean_rewards
+    )
+    return scores
@@ -1,5 +1,4 @@
 import torch
-import random
 from typing import List
 
 import cybertensor as ct
@@ -27,6 +26,46 @@ def check_uid_availability(
     return True
 
 
+def get_available_uids_mask(
+    metagraph: ct.metagraph, vpermit_limit: int
+) -> torch.BoolTensor:
+    """Computes the availability of every uid at once, see `check_uid_availability` for the rules.
+    Args:
+        metagraph (:obj: cybertensor.metagraph): Metagraph object
+        vpermit_limit (int): Validator permit token limit
+    Returns:
+        mask (torch.BoolTensor): Boolean mask of shape [ metagraph.n ], True where the uid is available.
+    """
+    # Filter non serving axons.
+    is_serving = torch.tensor(
+        [axon.is_serving for axon in metagraph.axons], dtype=torch.bool
+    )
+    # Filter validator permit > vpermit_limit stake.
+    over_limit = metagraph.validator_permit.bool() & (
+        metagraph.S > vpermit_limit
+    )
+    return is_serving & ~over_limit
+
+
+def get_cached_available_uids_mask(self) -> torch.BoolTensor:
+    """Returns the availability mask of the neuron's metagraph, recomputing it only after the metagraph was synced.
+    Args:
+        self (template.base.neuron.BaseNeuron): Neuron
+    Returns:
+        mask (torch.BoolTensor): Boolean mask of shape [ metagraph.n ], True where the uid is available.
+    """
+    # A sync always moves the metagraph block (and possibly n), so both together identify a metagraph state.
+    key = (int(self.metagraph.block), int(self.metagraph.n))
+    cache = getattr(self, "_available_uids_mask_cache", None)
+    if cache is None or cache[0] != key:
+        mask = get_available_uids_mask(
+            self.metagraph, self.config.neuron.vpermit_limit
+        )
+        cache = (key, mask)
+        self._available_uids_mask_cache = cache
+    return cache[1]
+
+
 def get_random_uids(
     self, k: int, exclude: List[int] = None
 ) -> torch.LongTensor:
@@ -40,29 +79,19 @@ def get_random_uids(
     Notes:
         If `k` is larger than the number of available `uids`, set `k` to the number of available `uids`.
     """
-    candidate_uids = []
-    avail_uids = []
+    candidate_mask = get_cached_available_uids_mask(self).clone()
+    if exclude is not None and len(exclude) > 0:
+        exclude_tensor = torch.as_tensor(exclude, dtype=torch.long)
+        # Uids outside the metagraph, e.g. of deregistered neurons, have nothing to exclude.
+        exclude_tensor = exclude_tensor[
+            (exclude_tensor >= 0) & (exclude_tensor < len(candidate_mask))
+        ]
+        candidate_mask[exclude_tensor] = False
 
-    for uid in range(self.metagraph.n.item()):
-        uid_is_available = check_uid_availability(
-            self.metagraph, uid, self.config.neuron.vpermit_limit
-        )
-        uid_is_not_excluded = exclude is None or uid not in exclude
-
-        if uid_is_available:
-            avail_uids.append(uid)
-            if uid_is_not_excluded:
-                candidate_uids.append(uid)
-
-    # Check if candidate_uids contain enough for querying, if not grab all avaliable uids
-    available_uids = candidate_uids
     # If k is larger than the number of available uids, set k to the number of available uids.
-    k = min(k, len(available_uids))
+    k = min(k, int(candidate_mask.sum()))
+    if k <= 0:
+        return torch.tensor([], dtype=torch.long)
 
-    if len(candidate_uids) < k:
-        available_uids += random.sample(
-            [uid for uid in avail_uids if uid not in candidate_uids],
-            k - len(candidate_uids),
-        )
-    uids = torch.tensor(random.sample(available_uids, k))
-    return uids
+    # Sample k distinct uids uniformly among the candidates in a single call.
+    return torch.multinomial(candidate_mask.float(), k, replacement=False)
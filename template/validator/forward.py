@@ -37,6 +37,9 @@ async def forward(self: BaseValidatorNeuron) -> None:
             state for the validator.
 
     """
+    # Forwards run concurrently and the step moves on as each of them completes, so keep the query of this one.
+    query = self.step
+
     # TODO(developer): Define how the validator selects a miner to query, how often, etc.
     # get_random_uids is an example method, but you can replace it with your own.
     miner_uids = get_random_uids(self, k=self.config.neuron.sample_size)
@@ -46,7 +49,7 @@ async def forward(self: BaseValidatorNeuron) -> None:
         # Send the query to selected miner axons in the network.
         axons=[self.metagraph.axons[uid] for uid in miner_uids],
         # Construct a dummy query. This simply contains a single integer.
-        synapse=Dummy(dummy_input=self.step),
+        synapse=Dummy(dummy_input=query),
         # All responses have the deserialize function called on them before returning.
         # You are encouraged to define your own deserialization function.
         deserialize=True,
@@ -57,7 +60,7 @@ async def forward(self: BaseValidatorNeuron) -> None:
 
     # TODO(developer): Define how the validator scores responses.
     # Adjust the scores based on responses from miners.
-    rewards = get_rewards(self, query=self.step, responses=responses)
+    rewards = get_rewards(self, query=query, responses=responses)
 
     ct.logging.info(f"Scored responses: {rewards}")
     # Update the scores based on the rewards. You may want to define your own update_scores function for custom behavior.
@@ -19,7 +19,11 @@
 # DEALINGS IN THE SOFTWARE.
 
 import torch
-from typing import List
+from typing import Any, Callable, List, Optional, Tuple
+
+# A batched reward function scores all responses to a query in one call. It receives the deserialized responses as
+# they are, None where the miner did not respond (timeout, error, empty output), and returns a reward tensor.
+BatchRewardFn = Callable[[int, List[Any]], torch.FloatTensor]
 
 
 def reward(query: int, response: int) -> float:
@@ -34,22 +38,106 @@ def reward(query: int, response: int) -> float:
     return 1.0 if response == query * 2 else 0
 
 
+# Bounds of the int64 tensors integer responses are encoded in.
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+def _is_encodable(response: Any) -> bool:
+    """Whether the response is a number a tensor can hold, miners control the type and size of their outputs."""
+    if isinstance(response, float):
+        return True
+    return isinstance(response, int) and INT64_MIN <= response <= INT64_MAX
+
+
+def responses_to_tensor(
+    responses: List[Optional[float]], device: Optional[str] = None
+) -> Tuple[torch.Tensor, torch.BoolTensor]:
+    """
+    Encodes the deserialized responses of the miners as a tensor and a mask of the responses that are present.
+    Missing responses (None) and responses that are not numbers or do not fit in 64 bits are masked out and
+    encoded as 0, so a single malformed response can't fail the scoring of the others.
+
+    Args:
+    - responses (List[Optional[float]]): A list of responses from the miners.
+    - device (str, optional): The device of the returned tensors.
+
+    Returns:
+    - Tuple[torch.Tensor, torch.BoolTensor]: The responses and the mask, both of shape [ len(responses) ].
+    """
+    present = [_is_encodable(response) for response in responses]
+    mask = torch.tensor(present, dtype=torch.bool)
+    values = torch.tensor(
+        [response if ok else 0 for response, ok in zip(responses, present)]
+    )
+    return values.to(device), mask.to(device)
+
+
+def batch_reward(
+    query: int, responses: List[Optional[float]]
+) -> torch.FloatTensor:
+    """
+    Reward all miner responses to the dummy request at once. Equivalent to calling `reward` for every response
+    and rewarding missing responses with 0.
+
+    Args:
+    - query (int): The query sent to the miners.
+    - responses (List[Optional[float]]): The numeric responses of the miners, None if missing. Other values
+      are rewarded with 0.
+
+    Returns:
+    - torch.FloatTensor: The rewards of the miners, shape [ len(responses) ].
+    """
+    # Encode all responses at once and compare them in a single tensor operation.
+    values, mask = responses_to_tensor(responses)
+    return ((values == query * 2) & mask).float()
+
+
+def scalar_reward_adapter(
+    reward_fn: Callable[[int, Any], float]
+) -> BatchRewardFn:
+    """
+    Adapts a per-response reward function such as `reward` to the batched interface of `get_rewards`. The
+    responses are passed to `reward_fn` as they are, so they may be of any type, e.g. text or dicts. Missing
+    responses are rewarded with 0 without calling `reward_fn`.
+
+    Args:
+    - reward_fn (Callable[[int, Any], float]): Returns the reward of a single response to the query.
+
+    Returns:
+    - BatchRewardFn: A batched reward function calling `reward_fn` for every present response.
+    """
+
+    def batched(query: int, responses: List[Any]) -> torch.FloatTensor:
+        return torch.tensor(
+            [
+                0.0 if response is None else float(reward_fn(query, response))
+                for response in responses
+            ],
+            dtype=torch.float32,
+        )
+
+    return batched
+
+
 def get_rewards(
     self,
     query: int,
     responses: List[float],
+    reward_fn: BatchRewardFn = batch_reward,
 ) -> torch.FloatTensor:
     """
     Returns a tensor of rewards for the given query and responses.
 
     Args:
     - query (int): The query sent to the miner.
-    - responses (List[float]): A list of responses from the miner.
+    - responses (List[float]): A list of responses from the miner, passed to `reward_fn` as they are.
+    - reward_fn (BatchRewardFn): Batched reward function. Wrap a per-response function with
+      `scalar_reward_adapter` to use it here.
 
     Returns:
     - torch.FloatTensor: A tensor of rewards for the given query and responses.
     """
-    # Get all the reward results by iteratively calling your reward() function.
-    return torch.FloatTensor(
-        [reward(query, response) for response in responses]
-    ).to(self.device)
+    if len(responses) == 0:
+        return torch.FloatTensor([]).to(self.device)
+    # Score all responses with a single call of the reward function.
+    return reward_fn(query, responses).to(self.device)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from template.base.miner import BatchedMinerMixin, RequestBatcher
+from template.protocol import Dummy
+
+
+def test_concurrent_requests_are_coalesced_and_fanned_out():
+    batches = []
+
+    async def forward_batch(synapses):
+        batches.append(len(synapses))
+        await asyncio.sleep(0.01)
+        for synapse in synapses:
+            synapse.dummy_output = synapse.dummy_input * 2
+        return synapses
+
+    async def run():
+        batcher = RequestBatcher(forward_batch, max_batch_size=4, max_delay=0.05)
+        responses = await asyncio.gather(
+            *[batcher.submit(Dummy(dummy_input=i)) for i in range(10)]
+        )
+        # A lone request is dispatched once the delay expired.
+        lone = await batcher.submit(Dummy(dummy_input=10))
+        return batcher.stats, responses + [lone]
+
+    stats, responses = asyncio.run(run())
+    assert [response.dummy_output for response in responses] == [
+        2 * i for i in range(11)
+    ]
+    assert batches == [4, 4, 2, 1]
+    assert stats.batch_sizes == {4: 2, 2: 1, 1: 1}
+    assert stats.requests == 11 and stats.batches == 4
+    # Full batches leave right away, the rest wait for the delay.
+    assert stats.percentile(0.0) < 0.01
+    assert 0.04 < stats.percentile(1.0) < 0.2
+
+
+def test_batch_failure_is_raised_in_every_request():
+    async def forward_batch(synapses):
+        raise RuntimeError("model crashed")
+
+    async def run():
+        batcher = RequestBatcher(forward_batch, max_batch_size=2, max_delay=0.01)
+        results = await asyncio.gather(
+            batcher.submit(Dummy(dummy_input=1)),
+            batcher.submit(Dummy(dummy_input=2)),
+            return_exceptions=True,
+        )
+        return batcher.stats, results
+
+    stats, results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats.failed_batches == 1
+
+
+def test_close_waits_for_running_batches():
+    finished = []
+
+    async def forward_batch(synapses):
+        await asyncio.sleep(0.02)
+        finished.append(len(synapses))
+        return synapses
+
+    async def run():
+        batcher = RequestBatcher(forward_batch, max_batch_size=4, max_delay=1.0)
+        # One full batch is running, one request still waits for its batch.
+        requests = [asyncio.ensure_future(batcher.submit(Dummy(dummy_input=i))) for i in range(5)]
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        await batcher.close()
+        assert not batcher._tasks
+        return [request.done() for request in requests]
+
+    assert asyncio.run(run()) == [True] * 5
+    assert finished == [4, 1]
+
+
+def test_batched_miner_mixin_requires_forward_batch():
+    class Miner(BatchedMinerMixin):
+        pass
+
+    with pytest.raises(TypeError, match="forward_batch"):
+        Miner()
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from template.utils.misc import BlockCache
+
+
+class CountingCwtensor:
+    """Mock cwtensor whose block queries are slow and counted."""
+
+    def __init__(self, block: int = 100, latency: float = 0.05):
+        self.block = block
+        self.latency = latency
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def get_current_block(self) -> int:
+        with self._lock:
+            self.queries += 1
+        time.sleep(self.latency)
+        return self.block
+
+
+def test_concurrent_threads_share_one_fetch():
+    cwtensor = CountingCwtensor()
+    cache = BlockCache(fetch=cwtensor.get_current_block, ttl=10.0)
+    start = threading.Barrier(32)
+    results = []
+
+    def read():
+        start.wait()
+        results.append(cache.get())
+
+    threads = [threading.Thread(target=read) for _ in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [100] * 32
+    assert cwtensor.queries == 1
+    assert cache.joined + cache.hits == 31
+
+
+def test_concurrent_coroutines_and_threads_share_one_fetch():
+    cwtensor = CountingCwtensor()
+    cache = BlockCache(fetch=cwtensor.get_current_block, ttl=10.0)
+
+    async def run():
+        thread = threading.Thread(target=cache.get)
+        thread.start()
+        blocks = await asyncio.gather(*[cache.get_async() for _ in range(32)])
+        thread.join()
+        return blocks
+
+    assert asyncio.run(run()) == [100] * 32
+    assert cwtensor.queries == 1
+
+
+def test_instances_do_not_share_blocks():
+    first, second = CountingCwtensor(block=1, latency=0), CountingCwtensor(block=2, latency=0)
+    caches = [BlockCache(fetch=first.get_current_block), BlockCache(fetch=second.get_current_block)]
+    assert [cache.get() for cache in caches * 3] == [1, 2] * 3
+    assert first.queries == second.queries == 1
+
+
+def test_block_is_refreshed_ahead_of_expiry():
+    now = [0.0]
+    cwtensor = CountingCwtensor(latency=0)
+    cache = BlockCache(
+        fetch=cwtensor.get_current_block, ttl=12.0, refresh_ahead=0.5, time_fn=lambda: now[0]
+    )
+    assert cache.get() == 100
+
+    # Past half of the ttl the cached block is returned right away and refreshed in the background.
+    cwtensor.block = 101
+    now[0] = 7.0
+    assert cache.get() == 100
+    deadline = time.monotonic() + 5
+    while cache.fetches < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get() == 101
+    assert cwtensor.queries == 2
+
+
+def test_failed_fetch_is_raised_to_all_waiters_and_retried():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("chain unreachable")
+        return 5
+
+    cache = BlockCache(fetch=fetch)
+    with pytest.raises(ConnectionError):
+        cache.get()
+    assert cache.get() == 5
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from template.utils.block_clock import BlockClock
+
+
+class SimulatedChain:
+    """A chain producing a block every `block_time` seconds on a virtual clock."""
+
+    def __init__(self, block_time: float, start: float = 0.3):
+        self.block_time = block_time
+        self.now = start
+        self.queries = 0
+
+    def time(self) -> float:
+        return self.now
+
+    def get_current_block(self) -> int:
+        self.queries += 1
+        return int(self.now // self.block_time)
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds)
+
+
+def make_clock(chain: SimulatedChain, block_time: float = 5.0) -> BlockClock:
+    return BlockClock(
+        get_block=chain.get_current_block,
+        block_time=block_time,
+        min_poll_interval=0.5,
+        time_fn=chain.time,
+        sleep=chain.sleep,
+        blocking_sleep=chain.advance,
+    )
+
+
+def test_block_is_not_queried_before_next_block_is_due():
+    chain = SimulatedChain(block_time=6.0)
+    clock = make_clock(chain, block_time=6.0)
+    assert clock.block == 0
+    for _ in range(10):
+        chain.advance(0.5)
+        assert clock.block == 0
+    assert chain.queries == 1
+
+
+@pytest.mark.parametrize("block_time", [2.0, 6.0, 12.0])
+def test_clock_learns_block_time_and_wakes_on_time(block_time):
+    chain = SimulatedChain(block_time=block_time)
+    clock = make_clock(chain, block_time=5.0)
+
+    for _ in range(20):
+        clock.wait_for_next_block_blocking()
+    assert clock.block_time == pytest.approx(block_time, abs=0.5)
+
+    # Once the block time is known, waiting for a block far ahead needs only a handful of queries
+    # and wakes up less than one poll interval after the block was produced.
+    queries = chain.queries
+    target = clock.block + 10
+    block = asyncio.run(clock.wait_for_block(target))
+    assert block == target
+    assert chain.queries - queries <= 3
+    assert chain.now - target * block_time < clock.min_poll_interval + 1e-9
+
+
+def test_wait_for_block_returns_on_timeout():
+    chain = SimulatedChain(block_time=6.0)
+    clock = make_clock(chain, block_time=6.0)
+    block = asyncio.run(clock.wait_for_block(100, timeout=10.0))
+    assert block < 100
+    assert chain.now == pytest.approx(10.3)
+
+
+def test_clock_follows_mock_cwtensor_blocks():
+    # MockCwtensor has no notion of time, so a virtual clock steps its chain every `block_time` seconds.
+    import cybertensor as ct
+
+    ct.MockCwtensor.reset()
+    cwtensor = ct.MockCwtensor()
+    block_time = 4.0
+    now = [0.1]
+
+    def advance(seconds):
+        target = now[0] + seconds
+        while int(now[0] // block_time) < int(target // block_time):
+            cwtensor.do_block_step()
+            now[0] = (int(now[0] // block_time) + 1) * block_time
+        now[0] = target
+
+    async def sleep(seconds):
+        advance(seconds)
+
+    clock = BlockClock(
+        get_block=cwtensor.get_current_block,
+        block_time=10.0,
+        min_poll_interval=0.5,
+        time_fn=lambda: now[0],
+        sleep=sleep,
+        blocking_sleep=advance,
+    )
+    for _ in range(12):
+        clock.wait_for_next_block_blocking()
+    assert clock.block == cwtensor.get_current_block()
+    assert clock.block_time == pytest.approx(block_time, abs=0.5)
+
+    # Once the block time is learned, every wait ends on the block it waited for.
+    for _ in range(5):
+        target = clock.block + 1
+        assert asyncio.run(clock.wait_for_block(target)) == target == cwtensor.get_current_block()
+
+
+def test_readers_do_not_race_observe():
+    import threading
+
+    chain = SimulatedChain(block_time=0.001)
+    clock = BlockClock(get_block=chain.get_current_block, max_samples=8, time_fn=chain.time)
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            chain.advance(0.001)
+            clock.observe()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(20000):
+            clock.next_block_eta()
+            clock.block_time
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_async_waits_never_query_the_chain_on_the_event_loop():
+    import threading
+
+    chain = SimulatedChain(block_time=6.0)
+    loop_threads = []
+
+    def get_block():
+        loop_threads.append(threading.current_thread() is threading.main_thread())
+        return chain.get_current_block()
+
+    clock = BlockClock(
+        get_block=get_block,
+        block_time=6.0,
+        min_poll_interval=0.5,
+        time_fn=chain.time,
+        sleep=chain.sleep,
+    )
+    assert asyncio.run(clock.wait_for_block(3)) == 3
+    assert loop_threads and not any(loop_threads)
+
+    async def get_block_async():
+        return chain.get_current_block()
+
+    clock.get_block = None
+    clock.get_block_async = get_block_async
+    assert asyncio.run(clock.wait_for_next_block()) == 4
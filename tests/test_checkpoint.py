@@ -0,0 +1,77 @@
+import os
+
+import torch
+
+from template.utils.checkpoint import CheckpointStore
+
+
+def hotkeys(n, prefix="hk"):
+    return [f"{prefix}{uid}" for uid in range(n)]
+
+
+def test_round_trip_and_unchanged_state_is_not_written(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    scores = torch.rand(256)
+    assert store.save(step=3, scores=scores, hotkeys=hotkeys(256))
+    mtime = os.stat(store.state_path).st_mtime_ns
+    assert not store.save(step=3, scores=scores.clone(), hotkeys=hotkeys(256))
+    assert store.writes == 1 and store.skipped_writes == 1
+    assert os.stat(store.state_path).st_mtime_ns == mtime
+
+    state = CheckpointStore(str(tmp_path)).load()
+    assert state["step"] == 3
+    assert torch.equal(state["scores"], scores)
+    assert state["hotkeys"] == hotkeys(256)
+
+
+def test_hotkey_changes_are_appended_and_compacted(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    keys = hotkeys(100)
+    store.save(step=0, scores=torch.zeros(100), hotkeys=keys)
+    table_size = os.path.getsize(tmp_path / "hotkeys.0.bin")
+
+    # A replaced uid and a registration only append two small records.
+    keys = list(keys)
+    keys[7] = "new7"
+    keys.append("hk100")
+    store.save(step=1, scores=torch.zeros(101), hotkeys=keys)
+    assert os.path.getsize(tmp_path / "hotkeys.0.log") < table_size / 10
+    assert CheckpointStore(str(tmp_path)).load()["hotkeys"] == keys
+
+    # Once the log outgrows the table a new generation replaces both.
+    keys = hotkeys(90, prefix="other")
+    store.save(step=2, scores=torch.ones(90), hotkeys=keys)
+    assert sorted(os.listdir(tmp_path)) == ["hotkeys.1.bin", "hotkeys.1.log", "state.bin"]
+    state = CheckpointStore(str(tmp_path)).load()
+    assert state["hotkeys"] == keys
+    assert torch.equal(state["scores"], torch.ones(90))
+
+
+def test_interrupted_save_keeps_last_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save(step=0, scores=torch.zeros(10), hotkeys=hotkeys(10))
+
+    # Records appended to the log by a save that crashed before state.bin was replaced are not loaded,
+    # neither is a torn temporary state file.
+    with open(tmp_path / "hotkeys.0.log", "ab") as f:
+        f.write(b"\x01\x00\x00\x00\x04\x00bad!")
+    with open(tmp_path / "state.bin.tmp", "wb") as f:
+        f.write(b"CTVS")
+
+    restarted = CheckpointStore(str(tmp_path))
+    state = restarted.load()
+    assert state["hotkeys"] == hotkeys(10)
+
+    keys = hotkeys(10)
+    keys[2] = "new2"
+    restarted.save(step=1, scores=torch.ones(10), hotkeys=keys)
+    assert CheckpointStore(str(tmp_path)).load()["hotkeys"] == keys
+
+
+def test_corrupt_state_is_ignored(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save(step=0, scores=torch.rand(10), hotkeys=hotkeys(10))
+    with open(store.state_path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\xff")
+    assert CheckpointStore(str(tmp_path)).load() is None
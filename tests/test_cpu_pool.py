@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import time
+
+import pytest
+
+from template.base.cpu_pool import CpuPool
+
+
+def hash_rounds(data: bytes, rounds: int) -> str:
+    for _ in range(rounds):
+        data = hashlib.sha256(data).digest()
+    return data.hex()
+
+
+def fail():
+    raise ValueError("bad input")
+
+
+@pytest.mark.parametrize("kind", ["process", "thread"])
+def test_pool_runs_work_and_counts_it(kind):
+    pool = CpuPool(kind=kind, workers=2)
+
+    async def run():
+        results = await asyncio.gather(
+            *[pool.run(hash_rounds, bytes([i]), 1000) for i in range(6)]
+        )
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+        return results
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    assert results == [hash_rounds(bytes([i]), 1000) for i in range(6)]
+    assert (pool.completed, pool.failed, pool.in_flight) == (6, 1, 0)
+    assert pool.peak_queue_depth == 4
+
+
+def test_event_loop_stays_responsive_during_cpu_work():
+    pool = CpuPool(kind="thread", workers=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await pool.run(time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(run()) >= 10
+    finally:
+        pool.shutdown()
@@ -0,0 +1,27 @@
+from template.base.miner import BatchStats
+from template.base.pipeline import ForwardStats
+from template.utils.latency import LatencySamples
+
+
+def test_latency_samples_keep_the_most_recent_window():
+    samples = LatencySamples(max_samples=100)
+    assert samples.percentile(0.5) is None
+    assert samples.summary() == "p50=Nones, p95=Nones"
+
+    samples.extend(float(i) for i in range(200))
+    assert len(samples) == 100
+    assert samples.percentile(0.0) == 100.0
+    assert samples.percentile(0.5) == 150.0
+    assert samples.percentile(1.0) == 199.0
+    assert samples.summary(prefix="delay_", digits=1) == "delay_p50=150.0s, delay_p95=195.0s"
+
+
+def test_stats_share_the_latency_percentiles():
+    forward_stats, batch_stats = ForwardStats(), BatchStats()
+    forward_stats.latencies.append(0.12345)
+    batch_stats.queue_delays.extend([0.00123, 0.00456])
+
+    assert forward_stats.percentile(0.5) == 0.12345
+    assert batch_stats.percentile(0.95) == 0.00456
+    assert str(forward_stats).endswith("p50=0.123s, p95=0.123s)")
+    assert str(batch_stats).endswith("queue_delay_p50=0.0046s, queue_delay_p95=0.0046s)")
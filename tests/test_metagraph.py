@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import torch
+
+from template.utils.metagraph import (
+    HotkeyIndex,
+    MetagraphDiffer,
+    MetagraphSyncScheduler,
+    synced_metagraph,
+)
+
+
+def make_metagraph(hotkeys, ports=None):
+    ports = ports or [8091] * len(hotkeys)
+    return SimpleNamespace(
+        hotkeys=list(hotkeys),
+        axons=[
+            SimpleNamespace(ip="127.0.0.1", port=port, version=1)
+            for port in ports
+        ],
+    )
+
+
+def test_unchanged_metagraph_has_empty_delta():
+    differ = MetagraphDiffer(make_metagraph(["a", "b", "c"]))
+    delta = differ.update(make_metagraph(["a", "b", "c"]))
+    assert not delta
+    assert delta.changed == []
+
+
+def test_delta_reports_replaced_changed_added_and_removed():
+    differ = MetagraphDiffer(make_metagraph(["a", "b", "c"]))
+
+    delta = differ.update(
+        make_metagraph(["a", "x", "c", "d"], ports=[8091, 8091, 9000, 8091])
+    )
+    assert delta.replaced == [1]
+    assert delta.axons_changed == [2]
+    assert delta.added == [3]
+    assert delta.removed == []
+    assert delta.changed == [1, 2]
+
+    delta = differ.update(make_metagraph(["a", "x"], ports=[8091, 8091]))
+    assert delta.removed == [2, 3]
+    assert delta.replaced == delta.axons_changed == delta.added == []
+
+
+def test_sync_scheduler_queries_once_per_block_and_counts_avoided_syncs():
+    calls = []
+
+    def query_last_update():
+        calls.append(1)
+        return 100
+
+    scheduler = MetagraphSyncScheduler(
+        epoch_length=10, query_last_update=query_last_update
+    )
+    assert not scheduler.should_sync(105)
+    assert not scheduler.should_sync(105)
+    assert len(calls) == 1
+    assert scheduler.blocks_until_sync(105) == 5
+
+    assert scheduler.should_sync(111)
+    scheduler.record_full_sync()
+    assert scheduler.avoided_syncs == 2
+    assert scheduler.full_syncs == 1
+    # A full sync forgets the cached last update, even within the same block.
+    scheduler.should_sync(111)
+    assert len(calls) == 3
+
+
+def test_hotkey_index_lookups():
+    metagraph = SimpleNamespace(
+        block=torch.tensor(7),
+        hotkeys=["a", "b", "c"],
+        S=torch.tensor([1.0, 250.0, 0.0]),
+        validator_permit=torch.tensor([False, True, False]),
+    )
+    index = HotkeyIndex(metagraph)
+    assert index.block == 7 and len(index) == 3
+    assert index.uid("b") == 1 and index.uid("z") is None
+    assert "c" in index and "z" not in index
+    assert index.stake_of("b") == 250.0 and index.stake_of("z") == 0.0
+    assert index.has_validator_permit("b")
+    assert not index.has_validator_permit("a")
+    assert not index.has_validator_permit("z")
+
+
+def test_synced_metagraph_leaves_the_original_untouched(monkeypatch):
+    import cybertensor as ct
+
+    from template.mock import MockMetagraph, MockSubnet
+
+    calls = []
+
+    def sync(self, cwtensor=None, lite=True, **kwargs):
+        calls.append((cwtensor, lite))
+        MockMetagraph.load_subnet(self, MockSubnet.build(6, seed=1))
+
+    monkeypatch.setattr(ct.metagraph, "sync", sync)
+    metagraph = MockMetagraph(netuid=3, subnet=MockSubnet.build(4, seed=0))
+    cwtensor = object()
+
+    synced = synced_metagraph(metagraph, cwtensor=cwtensor)
+
+    assert synced is not metagraph and synced.netuid == 3 and synced.network == metagraph.network
+    assert calls == [(cwtensor, True)]
+    assert synced.n.item() == 6 and len(synced.axons) == 6
+    assert metagraph.n.item() == 4 and len(metagraph.axons) == 4
+    assert len(metagraph.S) == len(metagraph.validator_permit) == 4
+
+
+def test_hotkey_index_is_current_until_hotkeys_or_stakes_change():
+    def state(hotkeys, stake, ports=None):
+        metagraph = make_metagraph(hotkeys, ports=ports)
+        metagraph.block = torch.tensor(1)
+        metagraph.S = torch.tensor(stake)
+        metagraph.validator_permit = torch.tensor([s > 10 for s in stake])
+        return metagraph
+
+    metagraph = state(["a", "b"], [1.0, 20.0])
+    index, differ = HotkeyIndex(metagraph), MetagraphDiffer(metagraph)
+
+    moved = state(["a", "b"], [1.0, 20.0], ports=[8091, 9000])
+    assert index.is_current(moved, differ.update(moved))
+    restaked = state(["a", "b"], [1.0, 30.0], ports=[8091, 9000])
+    assert not index.is_current(restaked, differ.update(restaked))
+    grown = state(["a", "b", "c"], [1.0, 20.0, 0.0], ports=[8091, 9000, 8091])
+    assert not index.is_current(grown, differ.update(grown))
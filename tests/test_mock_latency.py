@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import cybertensor as ct
+import pytest
+from cybertensor.mock.wallet_mock import get_mock_wallet
+
+from template.mock import (
+    AxonProfile,
+    LatencyModel,
+    MockDendrite,
+    VirtualClock,
+    bimodal,
+    fixed,
+    lognormal,
+)
+from template.protocol import Dummy
+
+
+def axon(hotkey):
+    return ct.AxonInfo(
+        version=1, ip="127.0.0.1", port=8091, ip_type=4, hotkey=hotkey, coldkey="mock-coldkey"
+    )
+
+
+def test_latency_model_is_reproducible_and_follows_profiles():
+    profiles = {"flaky": AxonProfile(latency=fixed(0.1), error_rate=0.3, timeout_rate=0.2)}
+    samples = []
+    for _ in range(2):
+        model = LatencyModel(AxonProfile(latency=bimodal(0.1, 2.0)), profiles, seed=7)
+        samples.append([model.sample(axon(hotkey)) for hotkey in ("flaky", "other") * 500])
+    assert samples[0] == samples[1]
+
+    flaky = [status for (_, status) in samples[0][::2]]
+    assert 0.25 < flaky.count(500) / len(flaky) < 0.35
+    assert 0.15 < flaky.count(408) / len(flaky) < 0.25
+    other = [delay for (delay, status) in samples[0][1::2]]
+    assert all(status == 200 for (_, status) in samples[0][1::2])
+    assert 0.05 < sum(delay > 1.0 for delay in other) / len(other) < 0.15
+
+
+def test_virtual_clock_wakes_sleepers_in_order():
+    clock = VirtualClock()
+    woke = []
+
+    async def sleeper(delay):
+        await clock.sleep(delay)
+        woke.append((delay, clock.time()))
+
+    async def run():
+        await asyncio.gather(*(sleeper(delay) for delay in (3.0, 1.0, 2.0)))
+
+    start = time.monotonic()
+    asyncio.run(run())
+
+    assert woke == [(1.0, 1.0), (2.0, 2.0), (3.0, 3.0)]
+    assert time.monotonic() - start < 1.0
+
+
+def test_mock_dendrite_waits_on_drawn_latency(monkeypatch):
+    monkeypatch.setattr(ct.utils.networking, "get_external_ip", lambda: "127.0.0.1")
+    clock = VirtualClock()
+    latency = LatencyModel(
+        default=AxonProfile(latency=fixed(0.5)),
+        profiles={
+            "slow": AxonProfile(latency=lognormal(60.0, 0.1)),
+            "broken": AxonProfile(latency=fixed(0.2), error_rate=1.0),
+        },
+        seed=0,
+    )
+    dendrite = MockDendrite(get_mock_wallet(), latency=latency, clock=clock)
+
+    async def run():
+        return await dendrite(
+            [axon("fast"), axon("slow"), axon("broken")],
+            Dummy(dummy_input=3),
+            deserialize=False,
+            timeout=12,
+        )
+
+    fast, slow, broken = asyncio.run(run())
+
+    assert (fast.dendrite.status_code, fast.dummy_output) == (200, 6)
+    assert float(fast.dendrite.process_time) == pytest.approx(0.5)
+    assert slow.dendrite.status_code == 408
+    assert float(slow.dendrite.process_time) == pytest.approx(12)
+    assert broken.dendrite.status_code == 500
+    assert clock.time() == pytest.approx(12)
@@ -0,0 +1,106 @@
+import asyncio
+import importlib.util
+import os
+
+import cybertensor as ct
+import pytest
+from cybertensor.mock.wallet_mock import get_mock_wallet
+
+from template.mock import AxonProfile, LatencyModel, MockDendrite, MockStream, fixed
+
+PROTOCOL_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "docs", "stream_tutorial", "protocol.py"
+)
+
+
+def load_stream_prompting():
+    spec = importlib.util.spec_from_file_location("stream_protocol", PROTOCOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.StreamPrompting
+
+
+StreamPrompting = load_stream_prompting()
+
+
+@pytest.fixture
+def make_dendrite(monkeypatch):
+    monkeypatch.setattr(
+        ct.utils.networking, "get_external_ip", lambda: "127.0.0.1"
+    )
+    return lambda stream, latency=None: MockDendrite(
+        get_mock_wallet(),
+        stream=stream,
+        latency=latency or LatencyModel(AxonProfile(latency=fixed(0))),
+    )
+
+
+def axons(n):
+    return [
+        ct.AxonInfo(
+            version=1,
+            ip="127.0.0.1",
+            port=8091 + i,
+            ip_type=4,
+            hotkey=f"miner-hotkey-{i}",
+            coldkey="mock-coldkey",
+        )
+        for i in range(n)
+    ]
+
+
+def consume(dendrite, synapse, n, timeout=12):
+    async def run():
+        streams = await dendrite(
+            axons(n), synapse, deserialize=False, streaming=True, timeout=timeout
+        )
+        results = []
+        for stream in streams:
+            chunks = [chunk async for chunk in stream]
+            results.append((chunks[:-1], chunks[-1]))
+        return results
+
+    return asyncio.run(run())
+
+
+def test_mock_stream_splits_multibyte_characters(make_dendrite):
+    message = "héllo wörld, 日本語のテキスト"
+    dendrite = make_dendrite(MockStream(chunk_sizes=(1, 2)))
+    synapse = StreamPrompting(roles=["user"], messages=[message])
+
+    results = consume(dendrite, synapse, n=3)
+
+    assert len(results) == 3
+    for chunks, final in results:
+        assert "".join(token for tokens in chunks for token in tokens) == message
+        assert final.dendrite.status_code == 200
+        assert final.completion == message.replace("\n", "")
+    # The synapse passed in is not modified.
+    assert synapse.completion == ""
+
+
+def test_mock_stream_failure_patterns(make_dendrite):
+    dendrite = make_dendrite(
+        MockStream(chunk_sizes=(4,), failure_rate=0.5, fail_after=2, seed=0)
+    )
+    synapse = StreamPrompting(roles=["user"], messages=["a" * 64])
+
+    results = consume(dendrite, synapse, n=16)
+
+    failed = [final for _, final in results if final.dendrite.status_code != 200]
+    assert 0 < len(failed) < 16
+    for chunks, final in results:
+        if final.dendrite.status_code == 200:
+            assert len(chunks) == 16 and final.completion == "a" * 64
+        else:
+            assert len(chunks) == 2 and final.completion == "a" * 8
+
+
+def test_mock_stream_times_out(make_dendrite):
+    dendrite = make_dendrite(MockStream(chunk_sizes=(1,), chunk_delay=0.01))
+    synapse = StreamPrompting(roles=["user"], messages=["a" * 100])
+
+    [(chunks, final)] = consume(dendrite, synapse, n=1, timeout=0.05)
+
+    assert int(final.dendrite.status_code) == 408
+    assert 0 < len(chunks) < 100
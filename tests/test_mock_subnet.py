@@ -0,0 +1,70 @@
+import time
+
+import torch
+
+from template.mock import MockMetagraph, MockSubnet
+from template.utils.metagraph import HotkeyIndex
+
+
+def test_build_defaults_give_permits_to_largest_stakes():
+    subnet = MockSubnet.build(4096, max_validators=64, seed=1)
+
+    assert len(subnet) == 4096
+    assert int(subnet.validator_permit.sum()) == 64
+    smallest_validator = subnet.stake[subnet.validator_permit].min()
+    assert (subnet.stake[~subnet.validator_permit] <= smallest_validator).all()
+    assert torch.equal(MockSubnet.build(4096, seed=1).stake, subnet.stake)
+
+
+def test_metagraph_from_subnet_arrays():
+    stake = torch.arange(8, dtype=torch.float32)
+    permit = stake > 5
+    subnet = MockSubnet.build(8, stake=stake, validator_permit=permit, ports=torch.arange(9000, 9008), block=42)
+
+    metagraph = MockMetagraph(netuid=3, subnet=subnet)
+
+    assert metagraph.n.item() == 8 and metagraph.block.item() == 42
+    assert torch.equal(metagraph.S, stake)
+    assert torch.equal(metagraph.validator_permit, permit)
+    assert metagraph.uids.tolist() == list(range(8))
+    assert metagraph.hotkeys[5] == "miner-hotkey-5"
+    assert [axon.port for axon in metagraph.axons] == list(range(9000, 9008))
+    index = HotkeyIndex(metagraph)
+    assert index.uid("miner-hotkey-7") == 7 and index.has_validator_permit("miner-hotkey-7")
+
+
+def test_snapshot_restores_large_subnet(tmp_path):
+    path = str(tmp_path / "subnets" / "mock-65536.pt")
+
+    start = time.monotonic()
+    built = MockSubnet.load_or_build(path, 65536, seed=0)
+    metagraph = MockMetagraph(subnet=built)
+    assert time.monotonic() - start < 10
+
+    restored = MockSubnet.load_or_build(path, 65536, seed=0)
+
+    assert restored.hotkeys == built.hotkeys
+    assert torch.equal(restored.stake, built.stake)
+    assert torch.equal(restored.validator_permit, built.validator_permit)
+    assert torch.equal(MockMetagraph(subnet=restored).S, metagraph.S)
+
+
+def test_snapshot_is_rebuilt_when_build_parameters_change(tmp_path, monkeypatch):
+    path = str(tmp_path / "mock-64.pt")
+    built = MockSubnet.load_or_build(path, 64, seed=0)
+
+    reseeded = MockSubnet.load_or_build(path, 64, seed=1)
+    assert not torch.equal(reseeded.stake, built.stake)
+    assert torch.equal(MockSubnet.build(64, seed=1).stake, reseeded.stake)
+
+    fewer_validators = MockSubnet.load_or_build(path, 64, seed=1, max_validators=8)
+    assert int(fewer_validators.validator_permit.sum()) == 8
+
+    ports = torch.arange(9000, 9064)
+    with_ports = MockSubnet.load_or_build(path, 64, seed=1, max_validators=8, ports=ports)
+    assert torch.equal(with_ports.ports, ports)
+
+    # The last snapshot is reused as long as the parameters stay the same.
+    monkeypatch.setattr(MockSubnet, "build", None)
+    restored = MockSubnet.load_or_build(path, 64, seed=1, max_validators=8, ports=torch.arange(9000, 9064))
+    assert torch.equal(restored.stake, with_ports.stake)
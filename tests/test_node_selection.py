@@ -0,0 +1,74 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import torch
+
+from template.api.get_query_axons import get_candidate_uids
+from template.api.node_selection import NodeSelector
+
+
+def response(status_code=200):
+    return SimpleNamespace(dendrite=SimpleNamespace(status_code=status_code))
+
+
+def test_candidates_are_top_stake_uids_with_validator_trust():
+    metagraph = SimpleNamespace(
+        uids=torch.arange(10),
+        S=torch.arange(10, dtype=torch.float32),
+        validator_trust=torch.tensor([1.0] * 8 + [0.0, 1.0]),
+    )
+    # uid 8 is in the top stake quantile but has no validator trust.
+    assert get_candidate_uids(metagraph, n=0.3) == [7, 9]
+
+
+def test_traffic_goes_to_fast_healthy_nodes():
+    selector = NodeSelector(rng=random.Random(0))
+    for _ in range(20):
+        selector.record(0, latency=0.05, success=True)
+        selector.record(1, latency=2.0, success=True)
+        selector.record(2, latency=0.05, success=False)
+        selector.record(3, latency=0.5, success=True)
+
+    picks = [selector.choose([0, 1, 2, 3])[0] for _ in range(1000)]
+    # The best node wins every pair it is drawn in, i.e. half of all picks; the worst never wins.
+    assert picks.count(0) == max(picks.count(uid) for uid in range(4))
+    assert picks.count(0) > 400
+    assert picks.count(1) + picks.count(2) < 300
+    assert sorted(selector.choose([0, 1, 2, 3], k=3, exclude=[1])) == [0, 2, 3]
+
+
+def test_slow_request_is_hedged_to_second_node():
+    selector = NodeSelector(min_hedge_delay=0.05, default_latency=0.01, rng=random.Random(0))
+    sent = []
+
+    async def send(uid):
+        sent.append(uid)
+        await asyncio.sleep(1.0 if uid == sent[0] else 0.01)
+        return response()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await selector.query([0, 1], send)
+        return result, loop.time() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result.dendrite.status_code == 200
+    assert len(sent) == 2 and selector.hedges == 1
+    assert elapsed < 0.5
+    # The cancelled slow request is not counted as finished, and nothing is left in flight.
+    assert sum(health.requests for health in selector.nodes.values()) == 1
+    assert all(health.in_flight == 0 for health in selector.nodes.values())
+
+
+def test_failed_request_is_retried_on_second_node():
+    selector = NodeSelector(rng=random.Random(0))
+
+    async def send(uid):
+        return response(200 if uid == 1 else 503)
+
+    selector.record(0, latency=0.01, success=True)
+    result = asyncio.run(selector.query([0, 1], send))
+    assert result.dendrite.status_code == 200
+    assert selector.nodes[0].failures == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+from template.base.pipeline import ForwardPipeline
+
+
+def test_pipeline_keeps_slots_busy_despite_slow_forwards():
+    async def run():
+        calls = []
+
+        async def forward():
+            calls.append(1)
+            # Every fourth forward is a slow straggler.
+            await asyncio.sleep(0.2 if len(calls) % 4 == 0 else 0.01)
+
+        pipeline = ForwardPipeline(forward_fn=forward, concurrency=4)
+        task = asyncio.ensure_future(pipeline.run())
+        await asyncio.sleep(0.25)
+        assert pipeline.stats.in_flight == 4
+        pipeline.stop()
+        await task
+        return pipeline.stats
+
+    stats = asyncio.run(run())
+    # Batched gather-and-wait rounds would only get through ~2 rounds (8 forwards) in 0.25s.
+    assert stats.completed > 20
+    assert stats.in_flight == 0
+    assert stats.failed == 0
+    assert stats.percentile(0.99) >= 0.2
+
+
+def test_pipeline_pause_and_failures():
+    async def run():
+        completed = []
+
+        async def forward():
+            await asyncio.sleep(0.01)
+            if len(completed) % 2:
+                completed.append(0)
+                raise ValueError("miner exploded")
+            completed.append(1)
+
+        pipeline = ForwardPipeline(forward_fn=forward, concurrency=2)
+        task = asyncio.ensure_future(pipeline.run())
+        await asyncio.sleep(0.05)
+        pipeline.pause()
+        await asyncio.sleep(0.03)
+        started = pipeline.stats.started
+        await asyncio.sleep(0.05)
+        # No new forwards are started while paused.
+        assert pipeline.stats.started == started
+        assert pipeline.stats.in_flight == 0
+        pipeline.resume()
+        await asyncio.sleep(0.05)
+        assert pipeline.stats.started > started
+        pipeline.stop()
+        await task
+        return pipeline.stats
+
+    stats = asyncio.run(run())
+    assert stats.failed > 0
+    assert stats.completed > 0
+    assert stats.in_flight == 0
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import torch
+
+from template.api import get_query_axons
+from template.api.get_query_axons import QueryAxonResolver
+
+
+class FakeMetagraph:
+    def __init__(self, n: int = 20):
+        self.netuid = 1
+        self.uids = torch.arange(n)
+        self.S = torch.arange(n, dtype=torch.float32)
+        self.validator_trust = torch.ones(n)
+        self.hotkeys = [f"hk{uid}" for uid in range(n)]
+        self.axons = [
+            SimpleNamespace(ip="10.0.0.1", port=8000 + uid, version=1, hotkey=self.hotkeys[uid])
+            for uid in range(n)
+        ]
+        self.syncs = 0
+        # uid -> axon ip the chain reports on the next sync.
+        self.updates = {}
+
+
+def fake_synced_metagraph(metagraph, cwtensor=None):
+    # A new metagraph with the axons the chain reports, the old one is left as is.
+    synced = FakeMetagraph(len(metagraph.uids))
+    synced.syncs = metagraph.syncs + 1
+    for uid, ip in metagraph.updates.items():
+        synced.axons[uid].ip = ip
+    return synced
+
+
+class CountingDendrite:
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.pinged = []
+
+    async def __call__(self, axons, synapse, deserialize=False, timeout=12):
+        self.pinged.extend(axon.port - 8000 for axon in axons)
+        return [
+            SimpleNamespace(
+                dendrite=SimpleNamespace(status_code=500 if axon.port - 8000 in self.down else 200)
+            )
+            for axon in axons
+        ]
+
+
+def test_resolver_reuses_metagraph_and_ping_results_until_they_expire(monkeypatch):
+    monkeypatch.setattr(get_query_axons, "synced_metagraph", fake_synced_metagraph)
+    now = [0.0]
+    metagraph = FakeMetagraph()
+    dendrite = CountingDendrite(down={19})
+    resolver = QueryAxonResolver(
+        wallet=None,
+        metagraph=metagraph,
+        n=0.25,
+        metagraph_ttl=15.0,
+        ping_ttl=10.0,
+        dendrite=dendrite,
+        time_fn=lambda: now[0],
+    )
+
+    async def resolve_many(count):
+        return [await resolver.get_query_api_axons() for _ in range(count)]
+
+    results = asyncio.run(resolve_many(50))
+    # The top stake candidates are pinged once, the failing one is never returned.
+    assert sorted(dendrite.pinged) == [15, 16, 17, 18, 19]
+    assert all(len(axons) == 3 for axons in results)
+    assert all(axon.port != 8019 for axons in results for axon in axons)
+    assert metagraph.syncs == 0
+
+    now[0] = 11.0
+    asyncio.run(resolve_many(5))
+    assert len(dendrite.pinged) == 10
+    assert metagraph.syncs == 0
+
+    # On re-sync only the ping results of changed axons are dropped.
+    now[0] = 16.0
+    metagraph.updates = {16: "10.0.0.2"}
+    asyncio.run(resolve_many(1))
+    assert resolver.metagraph.syncs == 1
+    assert dendrite.pinged[10:] == [16]
+    # The synced metagraph replaced the old one, concurrent queries never saw it change.
+    assert resolver.metagraph is not metagraph
+    assert metagraph.syncs == 0 and metagraph.axons[16].ip == "10.0.0.1"
+    assert resolver.metagraph.axons[16].ip == "10.0.0.2"
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+from template.api.dummy import DummyAPI
+
+
+class EchoDendrite:
+    """Answers every axon with twice the input after a delay that shrinks with the input."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+
+    async def __call__(self, axons, synapse, deserialize=False, timeout=12):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001 * (10 - synapse.dummy_input % 10))
+            if synapse.dummy_input in self.fail:
+                raise ConnectionError("axon unreachable")
+            return [
+                SimpleNamespace(
+                    dendrite=SimpleNamespace(status_code=200),
+                    dummy_output=synapse.dummy_input * 2,
+                )
+                for _ in axons
+            ]
+        finally:
+            self.in_flight -= 1
+
+
+def make_api(dendrite) -> DummyAPI:
+    api = DummyAPI.__new__(DummyAPI)
+    api.dendrite = dendrite
+    api.netuid = 1
+    api.name = "dummy"
+    return api
+
+
+def collect(api, inputs, **kwargs):
+    async def run():
+        return [item async for item in api.query_many(inputs, **kwargs)]
+
+    return asyncio.run(run())
+
+
+def test_query_many_bounds_concurrency_and_yields_every_input():
+    dendrite = EchoDendrite()
+    api = make_api(dendrite)
+    axons = [SimpleNamespace(), SimpleNamespace()]
+
+    results = collect(api, range(50), axons=axons, concurrency=8)
+
+    assert sorted(index for index, _ in results) == list(range(50))
+    assert all(outputs == [index * 2, index * 2] for index, outputs in results)
+    assert dendrite.peak_in_flight == 8
+    # Results come in order of completion, not of input.
+    assert [index for index, _ in results] != list(range(50))
+
+
+def test_query_many_accepts_keyword_inputs_and_yields_failures():
+    dendrite = EchoDendrite(fail={3})
+    api = make_api(dendrite)
+
+    results = dict(
+        collect(
+            api,
+            [{"dummy_input": i} for i in range(5)],
+            axons=[SimpleNamespace()],
+            concurrency=2,
+        )
+    )
+
+    assert isinstance(results.pop(3), ConnectionError)
+    assert results == {0: [0], 1: [2], 2: [4], 4: [8]}
+
+
+def test_query_many_cancels_queries_when_consumer_stops():
+    dendrite = EchoDendrite()
+    api = make_api(dendrite)
+
+    async def run():
+        stream = api.query_many(range(100), axons=[SimpleNamespace()], concurrency=4)
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+    asyncio.run(run())
+
+    assert dendrite.in_flight == 0
+    assert dendrite.calls < 10
@@ -0,0 +1,84 @@
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+from template.base.miner import BaseMinerNeuron
+from template.protocol import Dummy
+from template.utils.rate_limit import AdmissionController
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_quotas_follow_stake_and_flooding_caller_is_throttled():
+    clock = FakeTime()
+    admission = AdmissionController(
+        rate=100.0, min_rate=1.0, burst=1.0, max_pending=10_000, time_fn=clock
+    )
+
+    # Over ten seconds, a caller with 90% of the stake and one with none both send 1000 requests per second.
+    for step in range(10_000):
+        clock.now = step / 1000
+        admission.admit("whale", stake_share=0.9, key=("whale", step))
+        admission.admit("flood", stake_share=0.0, key=("flood", step))
+        admission.release(("whale", step))
+        admission.release(("flood", step))
+
+    whale, flood = admission.stats["whale"], admission.stats["flood"]
+    # Bucket capacity plus the refill over ten seconds.
+    assert 91 + 910 - 1 <= whale.admitted <= 91 + 910 + 1
+    assert 1 + 10 - 1 <= flood.admitted <= 1 + 10 + 1
+    assert flood.throttled == 10_000 - flood.admitted
+    assert whale.rejected == flood.rejected == 0
+
+
+def test_pending_requests_are_bounded_and_leases_expire():
+    clock = FakeTime()
+    admission = AdmissionController(
+        rate=1000.0, min_rate=1000.0, max_pending=2, time_fn=clock
+    )
+    assert admission.admit("a", 0.5, key=1, timeout=5.0)[0]
+    assert admission.admit("b", 0.5, key=2, timeout=5.0)[0]
+    admitted, reason = admission.admit("a", 0.5, key=3, timeout=5.0)
+    assert not admitted and reason == "Miner saturated"
+    assert admission.stats["a"].rejected == 1
+
+    # A released request frees its slot right away.
+    admission.release(1)
+    assert admission.pending == 1
+    assert admission.admit("a", 0.5, key=3, timeout=5.0)[0]
+
+    # A request that never reached the forward function frees its slot once its timeout passed.
+    clock.now = 5.0
+    assert admission.pending == 0
+    totals = admission.totals()
+    assert (totals.admitted, totals.throttled, totals.rejected) == (3, 0, 1)
+
+
+def test_release_after_frees_the_admission_whatever_the_argument_is_called():
+    miner = SimpleNamespace(
+        admission=AdmissionController(rate=100.0, max_pending=10, time_fn=FakeTime()),
+        admission_key=BaseMinerNeuron.admission_key,
+    )
+
+    async def forward(query: Dummy) -> Dummy:
+        query.dummy_output = query.dummy_input * 2
+        return query
+
+    wrapped = BaseMinerNeuron.release_after(miner, forward)
+    # The axon routes requests by the signature of the forward function.
+    assert list(inspect.signature(wrapped).parameters) == ["query"]
+
+    for call in (lambda synapse: wrapped(query=synapse), lambda synapse: wrapped(synapse)):
+        synapse = Dummy(dummy_input=3)
+        synapse.dendrite.hotkey = "validator"
+        key = BaseMinerNeuron.admission_key(synapse)
+        assert miner.admission.admit("validator", stake_share=1.0, key=key)[0]
+        assert miner.admission.pending == 1
+        assert asyncio.run(call(synapse)).dummy_output == 6
+        assert miner.admission.pending == 0
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+from template.protocol import Dummy
+from template.utils.response_cache import (
+    ResponseCache,
+    cached_forward,
+    synapse_cache_key,
+)
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingMiner:
+    def __init__(self, cache: ResponseCache):
+        self.response_cache = cache
+        self.calls = 0
+
+    @cached_forward
+    async def forward(self, synapse: Dummy) -> Dummy:
+        self.calls += 1
+        synapse.dummy_output = synapse.dummy_input * 2
+        return synapse
+
+
+def request(dummy_input: int, hotkey: str = "validator") -> Dummy:
+    synapse = Dummy(dummy_input=dummy_input)
+    synapse.dendrite.hotkey = hotkey
+    return synapse
+
+
+def test_repeated_queries_are_served_from_cache_until_ttl():
+    clock = FakeTime()
+    miner = CountingMiner(ResponseCache(ttl=10.0, time_fn=clock))
+
+    # The key only depends on the query, not on who sends it.
+    assert synapse_cache_key(request(3, "a")) == synapse_cache_key(request(3, "b"))
+    assert synapse_cache_key(request(3)) != synapse_cache_key(request(4))
+
+    responses = [
+        asyncio.run(miner.forward(request(3, hotkey)))
+        for hotkey in ("a", "b", "c")
+    ]
+    assert [response.dummy_output for response in responses] == [6, 6, 6]
+    assert miner.calls == 1
+    assert (miner.response_cache.hits, miner.response_cache.misses) == (2, 1)
+
+    clock.now = 10.0
+    assert asyncio.run(miner.forward(request(3))).dummy_output == 6
+    assert miner.calls == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(ttl=60.0, max_size=2)
+    cache.put("a", {"dummy_output": 1})
+    cache.put("b", {"dummy_output": 2})
+    assert cache.get("a") is not None
+    cache.put("c", {"dummy_output": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.evictions == 1 and len(cache) == 2
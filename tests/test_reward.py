@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import torch
+
+from template.validator.reward import (
+    get_rewards,
+    reward,
+    scalar_reward_adapter,
+)
+
+
+def test_batched_rewards_match_scalar_rewards_and_mask_missing_responses():
+    neuron = SimpleNamespace(device="cpu")
+    responses = [8, None, 7, 8.0, None, 0]
+
+    rewards = get_rewards(neuron, query=4, responses=responses)
+    fallback = get_rewards(
+        neuron, query=4, responses=responses, reward_fn=scalar_reward_adapter(reward)
+    )
+
+    assert torch.equal(rewards, torch.FloatTensor([1, 0, 0, 1, 0, 0]))
+    assert torch.equal(rewards, fallback)
+
+
+def test_rewards_of_no_or_only_missing_responses():
+    neuron = SimpleNamespace(device="cpu")
+    assert len(get_rewards(neuron, query=0, responses=[])) == 0
+    # A missing response must not match a query whose expected answer is 0.
+    assert torch.equal(
+        get_rewards(neuron, query=0, responses=[None, None]), torch.zeros(2)
+    )
+
+
+def test_scalar_adapter_scores_non_numeric_responses():
+    neuron = SimpleNamespace(device="cpu")
+
+    def text_reward(query, response):
+        return 1.0 if response["text"] == str(query * 2) else 0.5
+
+    responses = [{"text": "8"}, None, {"text": "eight"}]
+    rewards = get_rewards(
+        neuron, query=4, responses=responses, reward_fn=scalar_reward_adapter(text_reward)
+    )
+    assert torch.equal(rewards, torch.FloatTensor([1.0, 0.0, 0.5]))
+
+    rewards = get_rewards(
+        neuron,
+        query=4,
+        responses=["8", "7", None],
+        reward_fn=scalar_reward_adapter(lambda query, response: float(response == str(query * 2))),
+    )
+    assert torch.equal(rewards, torch.FloatTensor([1.0, 0.0, 0.0]))
+
+
+def test_malformed_responses_are_rewarded_zero_without_failing_the_others():
+    neuron = SimpleNamespace(device="cpu")
+    responses = [6, None, 2**70, -(2**70), "6", {"value": 6}, 6.0]
+
+    rewards = get_rewards(neuron, query=3, responses=responses)
+
+    assert torch.equal(rewards, torch.FloatTensor([1, 0, 0, 0, 0, 0, 1]))
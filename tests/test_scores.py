@@ -0,0 +1,46 @@
+import pytest
+import torch
+
+from template.utils.scores import sparse_ema_update_
+
+
+def test_sparse_update_only_touches_rewarded_uids():
+    scores = torch.rand(100)
+    before = scores.clone()
+    uids = torch.tensor([3, 50, 99])
+    rewards = torch.tensor([1.0, 0.0, 0.5])
+
+    sparse_ema_update_(scores, uids, rewards, alpha=0.1, unique=True)
+
+    expected = before.clone()
+    expected[uids] = 0.1 * rewards + 0.9 * before[uids]
+    assert torch.allclose(scores, expected)
+
+
+def test_batched_duplicates_match_sequential_updates_with_same_reward():
+    scores = torch.rand(10)
+    sequential = scores.clone()
+    for _ in range(3):
+        sparse_ema_update_(sequential, torch.tensor([4]), torch.tensor([1.0]), alpha=0.2)
+
+    sparse_ema_update_(
+        scores, torch.tensor([4, 7, 4, 4]), torch.tensor([1.0, 0.5, 1.0, 1.0]), alpha=0.2
+    )
+    assert scores[4] == pytest.approx(sequential[4].item())
+    assert scores[7] != sequential[7]
+
+
+def test_empty_update_is_a_no_op():
+    scores = torch.rand(10)
+    before = scores.clone()
+    sparse_ema_update_(scores, torch.tensor([], dtype=torch.long), torch.tensor([]), alpha=0.1)
+    assert torch.equal(scores, before)
+
+
+def test_unique_fast_path_matches_deduplicating_path():
+    scores = torch.rand(1000)
+    uids = torch.randperm(1000)[:50]
+    rewards = torch.rand(50)
+    fast = sparse_ema_update_(scores.clone(), uids, rewards, alpha=0.3, unique=True)
+    slow = sparse_ema_update_(scores.clone(), uids, rewards, alpha=0.3)
+    assert torch.allclose(fast, slow)
@@ -0,0 +1,140 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import threading
+
+STREAM_TUTORIAL = os.path.join(
+    os.path.dirname(__file__), "..", "docs", "stream_tutorial"
+)
+
+
+def load_stream_miner():
+    # The tutorial miner imports its protocol and config as top level modules.
+    sys.path.insert(0, STREAM_TUTORIAL)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "stream_miner", os.path.join(STREAM_TUTORIAL, "miner.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(STREAM_TUTORIAL)
+    return module
+
+
+stream_miner = load_stream_miner()
+
+
+def test_registry_loads_each_model_once():
+    loads, warm_ups = [], []
+    registry = stream_miner.ModelRegistry()
+    registry.register("model", loader=lambda: loads.append(1) or object(), warm_up=warm_ups.append)
+    assert not loads
+
+    threads = [threading.Thread(target=registry.get, args=("model",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+
+    registry.load_all()
+    assert len(loads) == 1 and not warm_ups
+    registry.load_all(warm_up=True)
+    assert warm_ups == [registry.get("model")]
+
+
+def test_chunker_grows_on_slow_sends_and_shrinks_on_fast_ones():
+    chunker = stream_miner.AdaptiveChunker(min_size=2, max_size=16, slow_send=0.01)
+    assert chunker.size == 2
+
+    sizes = []
+    for _ in range(5):
+        chunker.record(0.05)
+        sizes.append(chunker.size)
+    assert sizes == [4, 8, 16, 16, 16]
+
+    sizes = []
+    for _ in range(4):
+        chunker.record(0.001)
+        sizes.append(chunker.size)
+    assert sizes == [8, 4, 2, 2]
+
+
+def test_prompt_cache_hits_misses_and_evictions():
+    cache = stream_miner.PromptCache(max_size=2, max_age=10)
+
+    assert cache.get("a", block=0) is None
+    cache.put("a", "completion a", block=0)
+    assert cache.get("a", block=10) == "completion a"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Entries older than `max_age` blocks are dropped.
+    assert cache.get("a", block=11) is None
+    assert len(cache) == 0 and cache.evictions == 1
+
+    # Beyond `max_size` the least recently used entry goes first.
+    cache.put("a", "completion a", block=20)
+    cache.put("b", "completion b", block=20)
+    assert cache.get("a", block=20) == "completion a"
+    cache.put("c", "completion c", block=20)
+    assert cache.get("b", block=20) is None
+    assert cache.get("a", block=20) == "completion a"
+    assert cache.get("c", block=20) == "completion c"
+    assert cache.evictions == 2
+    assert cache.hit_rate == 4 / 7
+
+
+class CountingMiner(stream_miner.StreamMiner):
+    """A stream miner without chain or axon, streaming the prompt back in two chunks."""
+
+    def __init__(self, max_age: int = 10):
+        self.prompt_cache = stream_miner.PromptCache(max_size=8, max_age=max_age)
+        self.current_block = 0
+        self.prompts = 0
+
+    def config(self):
+        ...
+
+    @classmethod
+    def add_args(cls, parser):
+        ...
+
+    def prompt(self, synapse):
+        self.prompts += 1
+        text = synapse.messages[0]
+
+        async def token_streamer(send):
+            for part, more_body in ((text[:2], True), (text[2:], False)):
+                await send({"type": "http.response.body", "body": part.encode("utf-8"), "more_body": more_body})
+
+        return synapse.create_streaming_response(token_streamer)
+
+
+def stream(miner, message):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    synapse = stream_miner.StreamPrompting(roles=["user"], messages=[message])
+    response = miner._prompt(synapse)
+    asyncio.run(response.token_streamer(send))
+    assert not sent[-1]["more_body"]
+    return b"".join(message["body"] for message in sent).decode("utf-8")
+
+
+def test_repeated_prompts_are_replayed_from_the_cache():
+    miner = CountingMiner(max_age=5)
+
+    assert stream(miner, "héllo") == "héllo"
+    assert stream(miner, "héllo") == "héllo"
+    assert stream(miner, "other") == "other"
+    assert miner.prompts == 2
+    assert miner.prompt_cache.hits == 1
+
+    # Once the completion is too old the model runs again.
+    miner.current_block = 6
+    assert stream(miner, "héllo") == "héllo"
+    assert miner.prompts == 3
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from template.utils.uids import (
+    check_uid_availability,
+    get_available_uids_mask,
+    get_random_uids,
+)
+
+
+def make_neuron(n, serving=None, permit=None, stake=None, vpermit_limit=4096):
+    serving = serving if serving is not None else [True] * n
+    axons = [
+        SimpleNamespace(is_serving=is_serving) for is_serving in serving
+    ]
+    metagraph = SimpleNamespace(
+        n=torch.tensor(n),
+        block=torch.tensor(1),
+        axons=axons,
+        validator_permit=torch.tensor(
+            permit if permit is not None else [False] * n, dtype=torch.bool
+        ),
+        S=torch.tensor(
+            stake if stake is not None else [0.0] * n, dtype=torch.float32
+        ),
+    )
+    config = SimpleNamespace(
+        neuron=SimpleNamespace(vpermit_limit=vpermit_limit)
+    )
+    return SimpleNamespace(metagraph=metagraph, config=config)
+
+
+def test_mask_matches_check_uid_availability():
+    neuron = make_neuron(
+        6,
+        serving=[True, False, True, True, True, False],
+        permit=[False, False, True, True, False, True],
+        stake=[0.0, 0.0, 5000.0, 10.0, 9000.0, 5000.0],
+    )
+    mask = get_available_uids_mask(neuron.metagraph, 4096)
+    expected = [
+        check_uid_availability(neuron.metagraph, uid, 4096) for uid in range(6)
+    ]
+    assert mask.tolist() == expected
+
+
+@pytest.mark.parametrize("k", [0, 3, 8, 100])
+def test_get_random_uids_respects_mask_and_exclude(k):
+    neuron = make_neuron(
+        10, serving=[True] * 8 + [False] * 2
+    )
+    uids = get_random_uids(neuron, k=k, exclude=[0, 1])
+    assert len(uids) == min(k, 6)
+    assert len(set(uids.tolist())) == len(uids)
+    assert all(2 <= uid < 8 for uid in uids.tolist())
+
+
+def test_mask_is_cached_until_metagraph_sync():
+    neuron = make_neuron(4)
+    get_random_uids(neuron, k=4)
+    neuron.metagraph.axons[0].is_serving = False
+    assert 0 in get_random_uids(neuron, k=4).tolist()
+
+    # A sync moves the metagraph block, which invalidates the cached mask.
+    neuron.metagraph.block = torch.tensor(2)
+    assert 0 not in get_random_uids(neuron, k=4).tolist()
+
+
+def test_get_random_uids_ignores_out_of_range_exclude():
+    neuron = make_neuron(4)
+    uids = get_random_uids(neuron, k=4, exclude=[-1, 4, 100, 2])
+    assert sorted(uids.tolist()) == [0, 1, 3]
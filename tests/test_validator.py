@@ -0,0 +1,236 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from template.base import validator as validator_module
+from template.base.neuron import BaseNeuron
+from template.base.validator import BaseValidatorNeuron
+from template.mock import MockMetagraph, MockSubnet
+from template.utils.block_clock import BlockClock
+from template.utils.checkpoint import CheckpointStore
+from template.utils.metagraph import MetagraphSyncScheduler
+
+BLOCK_TIME = 0.05
+
+
+class FakeCwtensor:
+    """Chain whose blocks advance every BLOCK_TIME seconds."""
+
+    network = "mock"
+
+    def __init__(self):
+        self.start = time.monotonic()
+
+    def get_current_block(self) -> int:
+        return int((time.monotonic() - self.start) / BLOCK_TIME)
+
+    def is_hotkey_registered(self, netuid, hotkey) -> bool:
+        return True
+
+    def neuron_for_uid(self, uid, netuid):
+        return None
+
+
+class FakeDendrite:
+    def __init__(self, wallet=None):
+        self.closed_sessions = 0
+
+    async def aclose_session(self):
+        self.closed_sessions += 1
+
+
+def build_metagraph(n: int) -> MockMetagraph:
+    return MockMetagraph(subnet=MockSubnet.build(n, seed=0))
+
+
+def fake_neuron_init(self, config=None):
+    # Stands in for the chain setup of `BaseNeuron.__init__`.
+    self.config = config
+    self.device = "cpu"
+    self.wallet = SimpleNamespace(hotkey=SimpleNamespace(address="miner-hotkey-0"))
+    self.cwtensor = FakeCwtensor()
+    self.metagraph = build_metagraph(8)
+    self.block_clock = BlockClock(get_block=self.cwtensor.get_current_block, block_time=BLOCK_TIME)
+    self.uid = 0
+    self.step = 0
+    self.sync_scheduler = MetagraphSyncScheduler(
+        epoch_length=config.neuron.epoch_length, query_last_update=self.get_last_update
+    )
+
+
+class FakeValidator(BaseValidatorNeuron):
+    forward_time = 0.01
+    set_weights_time = 0.0
+
+    async def forward(self):
+        # The uids are picked before the miners are queried, a resync may change the metagraph meanwhile.
+        uids = list(range(int(self.metagraph.n)))
+        await asyncio.sleep(self.forward_time)
+        self.update_scores(torch.ones(len(uids)), uids)
+
+    def set_weights(self, scores=None):
+        completed = self.forward_pipeline.stats.completed
+        time.sleep(self.set_weights_time)
+        self.weights_set.append(
+            (completed, self.forward_pipeline.stats.completed)
+        )
+
+
+@pytest.fixture
+def make_validator(tmp_path, monkeypatch):
+    monkeypatch.setattr(BaseNeuron, "__init__", fake_neuron_init)
+    monkeypatch.setattr(validator_module, "MockDendrite", FakeDendrite)
+
+    validators = []
+
+    def synced_metagraph(metagraph, cwtensor=None):
+        return validators[-1].next_metagraph or metagraph
+
+    monkeypatch.setattr(validator_module, "synced_metagraph", synced_metagraph)
+
+    def make(epoch_length: int = 1000, **neuron):
+        config = SimpleNamespace(
+            mock=True,
+            netuid=1,
+            neuron=SimpleNamespace(
+                full_path=str(tmp_path),
+                epoch_length=epoch_length,
+                num_concurrent_forwards=2,
+                min_forward_interval=0.0,
+                moving_average_alpha=0.1,
+                disable_set_weights=False,
+                axon_off=True,
+                **neuron,
+            ),
+        )
+        validator = FakeValidator.__new__(FakeValidator)
+        # The metagraph the next sync returns, the current one if None.
+        validator.next_metagraph = None
+        validator.weights_set = []
+        validators.append(validator)
+        validator.__init__(config)
+        return validator
+
+    return make
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def start(validator):
+    previous_loop = validator.loop
+    validator.run_in_background_thread()
+    wait_until(
+        lambda: validator.loop is not previous_loop and validator.loop.is_running()
+    )
+
+
+def pause_until_idle(validator):
+    validator.loop.call_soon_threadsafe(validator.forward_pipeline.pause)
+    wait_until(lambda: validator.forward_pipeline.stats.in_flight == 0)
+
+
+def test_run_accepts_work_from_other_threads_and_restarts(make_validator):
+    validator = make_validator()
+
+    start(validator)
+    first_loop = validator.loop
+    validator.submit_forward().result(timeout=5)
+    validator.submit_sync().result(timeout=5)
+    # The pipeline waits for `resume` on the first loop.
+    pause_until_idle(validator)
+    validator.stop_run_thread()
+    assert not validator.thread.is_alive()
+    assert first_loop.is_closed()
+    assert validator.dendrite.closed_sessions == 1
+    with pytest.raises(RuntimeError):
+        validator.submit_forward()
+
+    start(validator)
+    assert validator.loop is not first_loop
+    step = validator.step
+    validator.submit_forward().result(timeout=5)
+    assert validator.step > step
+
+    # Pausing and resuming works on the loop of the restarted thread.
+    pause_until_idle(validator)
+    started = validator.forward_pipeline.stats.started
+    validator.loop.call_soon_threadsafe(validator.forward_pipeline.resume)
+    wait_until(lambda: validator.forward_pipeline.stats.started > started)
+    validator.stop_run_thread()
+    assert not validator.thread.is_alive()
+    assert validator.dendrite.closed_sessions == 2
+    assert validator.forward_pipeline.stats.failed == 0
+
+
+def test_forwards_keep_running_while_setting_weights(make_validator):
+    validator = make_validator(epoch_length=1)
+    validator.set_weights_time = 0.5
+
+    start(validator)
+    wait_until(lambda: validator.weights_set)
+    validator.stop_run_thread()
+
+    completed_before, completed_after = validator.weights_set[0]
+    # Forwards of 10ms on two slots keep completing while weights are being set.
+    assert completed_after - completed_before > 10
+
+
+def test_resync_that_shrinks_the_metagraph_mid_forward(make_validator):
+    validator = make_validator()
+    validator.sync_scheduler.epoch_length = -1
+    validator.forward_time = 0.2
+    validator.next_metagraph = build_metagraph(4)
+
+    async def run():
+        validator.loop = asyncio.get_running_loop()
+        validator.lock = asyncio.Lock()
+        forward = asyncio.ensure_future(validator.forward())
+        await asyncio.sleep(0.05)
+        assert await validator.sync_async()
+        assert len(validator.scores) == 4
+        # The forward rewards all 8 uids it picked before the resync.
+        await forward
+
+    asyncio.run(run())
+    assert validator.hotkeys == validator.metagraph.hotkeys
+    assert torch.allclose(validator.scores, torch.full((4,), 0.1))
+
+
+def test_load_state_migrates_a_legacy_checkpoint(make_validator, tmp_path):
+    hotkeys = list(build_metagraph(8).hotkeys)
+    # Saved with two more uids, and uid 2 was taken by a new hotkey while the validator was down.
+    saved_hotkeys = hotkeys[:2] + ["old-hotkey"] + hotkeys[3:] + ["gone-1", "gone-2"]
+    torch.save(
+        {"step": 7, "scores": torch.arange(1, 11, dtype=torch.float32), "hotkeys": saved_hotkeys},
+        tmp_path / "state.pt",
+    )
+
+    validator = make_validator()
+
+    assert validator.step == 7
+    assert validator.hotkeys == hotkeys
+    assert validator.scores.tolist() == [1, 2, 0, 4, 5, 6, 7, 8]
+    # The next save converts the legacy state.
+    state = CheckpointStore(str(tmp_path)).load()
+    assert state["step"] == 7
+    assert state["hotkeys"] == hotkeys
+    assert state["scores"].tolist() == [1, 2, 0, 4, 5, 6, 7, 8]
+
+
+def test_load_state_grows_to_the_current_metagraph(make_validator, tmp_path):
+    hotkeys = list(build_metagraph(8).hotkeys)
+    CheckpointStore(str(tmp_path)).save(step=3, scores=torch.ones(4), hotkeys=hotkeys[:4])
+
+    validator = make_validator()
+
+    assert validator.step == 3
+    assert validator.hotkeys == hotkeys
+    assert validator.scores.tolist() == [1, 1, 1, 1, 0, 0, 0, 0]